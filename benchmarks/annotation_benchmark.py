@@ -0,0 +1,85 @@
+"""Benchmark of the windowed annotation labelling against the full-resolution canvas.
+
+Random polygons are labelled on a synthetic slide in both modes. Each mode runs in
+a fresh process so that the reported peak RSS is not shared between the modes.
+
+Example:
+    python3 -m benchmarks.annotation_benchmark --width 40000 --height 80000
+"""
+# Standard Imports
+from multiprocessing import Pool
+from types import SimpleNamespace
+from time import perf_counter
+import argparse
+import resource
+
+# Third-party Imports
+import numpy as np
+
+# Local Imports
+from rationai.data.tiler.tiling import grid_coordinates
+from rationai.data.tiler.xml_annot_patcher import SlideConverter
+
+
+def random_polygons(width: int, height: int, n_polygons: int, seed: int):
+    """Creates star-shaped polygons with float vertices."""
+    rng = np.random.default_rng(seed)
+    polygons = []
+    for _ in range(n_polygons):
+        cx, cy = rng.uniform(0, width), rng.uniform(0, height)
+        angles = np.sort(rng.uniform(0, 2 * np.pi, size=rng.integers(8, 64)))
+        radii = rng.uniform(0.3, 1.0, size=len(angles)) * rng.uniform(width / 200, width / 20)
+        polygons.append(np.stack([cx + radii * np.cos(angles), cy + radii * np.sin(angles)], axis=1))
+    return polygons
+
+
+def label_slide(args, windowed: bool):
+    config = SimpleNamespace(tile_size=args.tile_size, center_size=args.center_size,
+                             step_size=args.step_size, negative_mode=False,
+                             windowed_mode=windowed, max_band_width=16384, stripe_workers=1)
+    converter = SlideConverter(config)
+    converter.slide_name = 'synthetic'
+    polygons = random_polygons(args.width, args.height, args.n_polygons, args.seed)
+
+    t0 = perf_counter()
+    annot_mask_img, annot_mask_draw = converter._prepare_empty_canvas(
+        (args.width, args.height), 'BLACK', windowed)
+    converter._draw_polygons_on_mask(polygons, annot_mask_draw, polygon_color='WHITE')
+
+    # Every grid position is considered a ROI tile
+    grid_x, grid_y = grid_coordinates(args.width, args.height, args.step_size)
+    is_roi = np.ones((len(grid_y), len(grid_x)), dtype=bool)
+    labels = converter._determine_label(annot_mask_img, grid_x, grid_y, is_roi)
+    elapsed = perf_counter() - t0
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return labels, elapsed, peak_rss_mb
+
+
+def main(args):
+    results = {}
+    for windowed in (False, True):
+        with Pool(1, maxtasksperchild=1) as p:
+            results[windowed] = p.apply(label_slide, (args, windowed))
+
+    canvas_labels, canvas_time, canvas_rss = results[False]
+    windowed_labels, windowed_time, windowed_rss = results[True]
+    abs_diff = np.abs(canvas_labels - windowed_labels)
+    print(f'Tiles:               {len(canvas_labels)}')
+    print(f'Canvas:              {canvas_time:.2f}s, peak RSS {canvas_rss:.0f} MB')
+    print(f'Windowed:            {windowed_time:.2f}s, peak RSS {windowed_rss:.0f} MB')
+    print(f'Max |diff|:          {abs_diff.max():.6f}')
+    print(f'Mean |diff|:         {abs_diff.mean():.8f}')
+    print(f'is_cancer mismatch:  {np.count_nonzero((canvas_labels > 0) != (windowed_labels > 0))}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Annotation labelling benchmark.')
+    parser.add_argument('--width', type=int, default=20000, help='Width of the synthetic slide.')
+    parser.add_argument('--height', type=int, default=40000, help='Height of the synthetic slide.')
+    parser.add_argument('--n_polygons', type=int, default=200)
+    parser.add_argument('--tile_size', type=int, default=512)
+    parser.add_argument('--center_size', type=int, default=256)
+    parser.add_argument('--step_size', type=int, default=128)
+    parser.add_argument('--seed', type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,80 @@
+"""Benchmark of ArrowDataSource against HDF5DataSource.
+
+A synthetic index file with `n_slides` coordinate maps is written into a temporary
+directory (see `benchmarks.lazy_loading_benchmark`) and exported into an Arrow IPC
+file. For both data sources, the time to open the dataset and list its tables,
+the time and peak traced memory of `get_table` and the time to sample all leaves
+of a SequentialTreeSampler are measured. The tables loaded by both data sources
+are compared.
+
+Example:
+    python3 -m benchmarks.arrow_benchmark --n_slides 2000 --max_rows 2000
+"""
+# Standard Imports
+from pathlib import Path
+from time import perf_counter
+import argparse
+import tempfile
+import tracemalloc
+
+# Third-party Imports
+import pandas as pd
+
+# Local Imports
+from benchmarks.lazy_loading_benchmark import write_dataset
+from benchmarks.metadata_benchmark import traverse
+from rationai.data.tiler.arrow_export import export_arrow
+from rationai.datagens.datasources import ArrowDataSource
+from rationai.datagens.datasources import HDF5DataSource
+from rationai.datagens.samplers import SequentialTreeSampler
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dataset_fp = Path(tmp_dir) / 'dataset.h5'
+        arrow_fp = Path(tmp_dir) / 'dataset.arrow'
+        write_dataset(dataset_fp, args)
+        start = perf_counter()
+        export_arrow(dataset_fp, arrow_fp)
+        print(f'Export:  {args.n_slides} tables in {perf_counter() - start:.2f}s')
+
+        sampler_config = SequentialTreeSampler.Config({'index_levels': ['slide_name']})
+        sampler_config.parse()
+        tables = {}
+        for name, data_source_cls, fp in (('HDF5', HDF5DataSource, dataset_fp),
+                                          ('Arrow', ArrowDataSource, arrow_fp)):
+            config = data_source_cls.Config({'keys': ['test'], 'names': ['test']})
+            config.parse()
+            start = perf_counter()
+            data_source = data_source_cls.load_dataset(fp, config)['test']
+            open_time = perf_counter() - start
+
+            start = perf_counter()
+            tables[name] = data_source.get_table()
+            table_time = perf_counter() - start
+            tracemalloc.start()
+            data_source.get_table()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            start = perf_counter()
+            n_entries = traverse(SequentialTreeSampler(sampler_config, data_source))
+            sequential_time = perf_counter() - start
+            print(f'{name + ":":<9}open {open_time:.3f}s, get_table {table_time:.2f}s '
+                  f'(peak memory {peak / 2 ** 20:.0f} MB), sequential {n_entries} entries '
+                  f'in {sequential_time:.2f}s')
+            if isinstance(data_source, HDF5DataSource):
+                data_source.source.close()
+
+    pd.testing.assert_frame_equal(tables['HDF5'], tables['Arrow'])
+    print('Tables equal: True')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='ArrowDataSource benchmark.')
+    parser.add_argument('--n_slides', type=int, default=500)
+    parser.add_argument('--n_columns', type=int, default=8)
+    parser.add_argument('--min_rows', type=int, default=100)
+    parser.add_argument('--max_rows', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,117 @@
+"""Benchmark of the streamed background mask engine against the whole-level engine.
+
+The slide is either a real slide opened by OpenSlide or a synthetic slide rendered
+on demand, so that neither engine holds the source image beyond what it reads.
+Each engine runs in a fresh process so that the reported peak RSS is not shared
+between the engines. The resulting masks are required to be identical.
+
+Example:
+    python3 -m benchmarks.background_benchmark --width 8000 --height 16000
+    python3 -m benchmarks.background_benchmark --slide_fp slide.mrxs --level 4
+"""
+# Standard Imports
+from multiprocessing import Pool
+from time import perf_counter
+import argparse
+import resource
+
+# Third-party Imports
+import numpy as np
+from PIL import Image
+from skimage import color
+from skimage import filters
+from skimage import morphology
+from openslide import OpenSlide
+
+# Local Imports
+from rationai.data.tiler.background import create_background_mask
+
+
+class SyntheticSlide:
+    """Single level slide with elliptic tissue regions on a noisy background."""
+    def __init__(self, width: int, height: int, n_regions: int, seed: int):
+        rng = np.random.default_rng(seed)
+        self.level_dimensions = [(width, height)]
+        self.level_downsamples = [1.0]
+        self.regions = [(rng.uniform(0, width), rng.uniform(0, height),
+                         rng.uniform(width / 30, width / 8), rng.uniform(width / 30, width / 8),
+                         rng.integers(150, 230), rng.integers(60, 140), rng.integers(140, 200))
+                        for _ in range(n_regions)]
+
+    def read_region(self, location, level, size) -> Image.Image:
+        (x0, y0), (width, height) = location, size
+        region_np = np.empty((height, width, 4), dtype=np.uint8)
+        x = np.arange(x0, x0 + width, dtype=np.float64)
+        for row in range(0, height, 256):
+            y = np.arange(y0 + row, y0 + min(row + 256, height), dtype=np.float64)[:, None]
+            noise = ((x.astype(np.int64) * 73856093) ^ (y.astype(np.int64) * 19349663)) % 24
+            rgb_np = np.broadcast_to(np.array([235, 232, 238]) - noise[..., None], (len(y), width, 3)).copy()
+            for cx, cy, rx, ry, r, g, b in self.regions:
+                inside = ((x - cx) / rx) ** 2 + ((y - cy) / ry) ** 2 < 1.
+                rgb_np[inside] = np.array([r, g, b]) - noise[inside][:, None] * 2
+            region_np[row:row + len(y), :, :3] = rgb_np
+            region_np[row:row + len(y), :, 3] = 255
+        return Image.fromarray(region_np, 'RGBA')
+
+
+def whole_level_mask(oslide_wsi, level: int, disk_size: int) -> Image.Image:
+    """Reference engine processing the whole level at once."""
+    wsi_img = oslide_wsi.read_region(
+        location=(0, 0),
+        level=level,
+        size=oslide_wsi.level_dimensions[level]).convert('RGB')
+    slide_hsv = color.rgb2hsv(np.array(wsi_img))
+    saturation = slide_hsv[:, :, 1]
+    threshold = filters.threshold_otsu(saturation)
+    high_saturation = (saturation > threshold)
+    disk_object = morphology.disk(disk_size)
+    mask = morphology.closing(high_saturation, disk_object)
+    mask = morphology.opening(mask, disk_object)
+    return Image.fromarray(mask)
+
+
+def create_mask(args, streamed: bool):
+    if args.slide_fp:
+        oslide_wsi, level = OpenSlide(args.slide_fp), args.level
+    else:
+        oslide_wsi, level = SyntheticSlide(args.width, args.height, args.n_regions, args.seed), 0
+
+    t0 = perf_counter()
+    if streamed:
+        mask_img = create_background_mask(oslide_wsi, level, args.disk_size, args.stripe_height)
+    else:
+        mask_img = whole_level_mask(oslide_wsi, level, args.disk_size)
+    elapsed = perf_counter() - t0
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return np.packbits(np.asarray(mask_img)), elapsed, peak_rss_mb
+
+
+def main(args):
+    results = {}
+    for streamed in (False, True):
+        with Pool(1, maxtasksperchild=1) as p:
+            results[streamed] = p.apply(create_mask, (args, streamed))
+
+    reference_mask, reference_time, reference_rss = results[False]
+    streamed_mask, streamed_time, streamed_rss = results[True]
+    identical = np.array_equal(reference_mask, streamed_mask)
+    print(f'Whole level:      {reference_time:.2f}s, peak RSS {reference_rss:.0f} MB')
+    print(f'Streamed:         {streamed_time:.2f}s, peak RSS {streamed_rss:.0f} MB '
+          f'({reference_time / streamed_time:.1f}x)')
+    print(f'Identical masks:  {identical}')
+    if not identical:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Background mask engine benchmark.')
+    parser.add_argument('--slide_fp', type=str, default=None, help='Benchmark a real slide instead.')
+    parser.add_argument('--level', type=int, default=4, help='Level of the real slide.')
+    parser.add_argument('--width', type=int, default=6000, help='Width of the synthetic slide.')
+    parser.add_argument('--height', type=int, default=12000, help='Height of the synthetic slide.')
+    parser.add_argument('--n_regions', type=int, default=40)
+    parser.add_argument('--disk_size', type=int, default=10)
+    parser.add_argument('--stripe_height', type=int, default=2048)
+    parser.add_argument('--seed', type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,143 @@
+"""Benchmark of the columnar SampledEpoch against lists of SampledEntry.
+
+A synthetic index file with `n_slides` coordinate maps is written into a temporary
+directory (see `benchmarks.sampler_benchmark`). An epoch is sampled by a
+RandomTreeSampler returning a list of SampledEntry and by one with `columnar` set.
+For both representations, the sampling time, the memory traced while holding the
+epoch, the size and time of pickling the epoch (as done when it is sent to worker
+processes) and the time to slice all batches of the epoch and pass them to a
+GenericExtractor and to a TileStoreExtractor are measured. Tile stores of random
+pixels are written for the TileStoreExtractor. The batches of both representations
+are compared.
+
+Example:
+    python3 -m benchmarks.epoch_benchmark --epoch_size 1000000 --batch_size 64
+"""
+# Standard Imports
+from pathlib import Path
+from time import perf_counter
+import argparse
+import pickle
+import tempfile
+import tracemalloc
+
+# Third-party Imports
+import numpy as np
+import pandas as pd
+
+# Local Imports
+from benchmarks.sampler_benchmark import write_dataset
+from rationai.datagens.datasources import HDF5DataSource
+from rationai.datagens.extractors import GenericExtractor
+from rationai.datagens.extractors import TileStoreExtractor
+from rationai.datagens.samplers import RandomTreeSampler
+
+
+RETURN_DEFINITION = {
+    'coords': [{'entry': 'coord_x'}, {'entry': 'coord_y'}],
+    'label': [{'entry': 'is_cancer', 'dtype': 'float'}],
+    'tile_size': [{'metadata': 'tile_size'}]
+}
+
+
+def write_tile_stores(dataset_fp: Path, tile_size: int, seed: int) -> None:
+    """Adds a `tile_idx` column to every coordinate map and writes its tile store of random pixels."""
+    rng = np.random.default_rng(seed)
+    with pd.HDFStore(dataset_fp, 'a') as dataset_h5:
+        for table_key in dataset_h5.keys():
+            metadata = dataset_h5.get_storer(table_key).attrs.metadata
+            coord_map_df = dataset_h5[table_key]
+            coord_map_df['tile_idx'] = np.arange(len(coord_map_df))
+            tile_store_fp = dataset_fp.parent / f'{coord_map_df["slide_name"].iloc[0]}.npy'
+            np.save(tile_store_fp, rng.integers(0, 256, (len(coord_map_df), tile_size, tile_size, 3), dtype=np.uint8))
+            dataset_h5.put(table_key, coord_map_df, format='table')
+            dataset_h5.get_storer(table_key).attrs.metadata = {**metadata, 'tile_store_fp': str(tile_store_fp)}
+
+
+def extract_batches(epoch, extractor, batch_size: int) -> list:
+    """Slices the epoch into batches as BaseGeneratorKeras and extracts them."""
+    return [extractor(epoch[start:start + batch_size]) for start in range(0, len(epoch), batch_size)]
+
+
+def same_batches(batches, columnar_batches) -> bool:
+    """Compares batches of dicts or tuples of arrays."""
+    return all(
+        batch.keys() == columnar_batch.keys()
+        and all(np.array_equal(batch[key], columnar_batch[key]) for key in batch)
+        if isinstance(batch, dict) else
+        all(np.array_equal(array, columnar_array) for array, columnar_array in zip(batch, columnar_batch))
+        for batch, columnar_batch in zip(batches, columnar_batches)
+    )
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dataset_fp = Path(tmp_dir) / 'dataset.h5'
+        write_dataset(dataset_fp, args)
+        write_tile_stores(dataset_fp, args.tile_size, args.seed)
+
+        data_source_config = HDF5DataSource.Config({'keys': [f'group_{idx}' for idx in range(args.n_groups)],
+                                                    'names': ['all']})
+        data_source_config.parse()
+        data_source = HDF5DataSource.load_dataset(dataset_fp, data_source_config)['all']
+        extractor_config = GenericExtractor.Config({'return': RETURN_DEFINITION})
+        extractor_config.parse()
+        tile_store_config = TileStoreExtractor.Config({})
+        tile_store_config.parse()
+        extractors = {'GenericExtractor': GenericExtractor(extractor_config),
+                      'TileStoreExtractor': TileStoreExtractor(config=tile_store_config, augmenter=None)}
+
+        batches = {extractor_name: {} for extractor_name in extractors}
+        for name, columnar in (('List', False), ('Columnar', True)):
+            sampler_config = RandomTreeSampler.Config({'epoch_size': args.epoch_size,
+                                                       'index_levels': args.index_levels,
+                                                       'columnar': columnar,
+                                                       'seed': args.seed})
+            sampler_config.parse()
+            sampler = RandomTreeSampler(sampler_config, data_source)
+            start = perf_counter()
+            epoch = sampler.sample()
+            sample_time = perf_counter() - start
+            del epoch
+
+            # Traced separately, as tracing slows the sampling down
+            sampler = RandomTreeSampler(sampler_config, data_source)
+            tracemalloc.start()
+            epoch = sampler.sample()
+            memory, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            start = perf_counter()
+            pickled = pickle.dumps(epoch, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.loads(pickled)
+            pickle_time = perf_counter() - start
+
+            print(f'{name + ":":<10}sampling {sample_time:.2f}s, memory {memory / 2 ** 20:.0f} MB, '
+                  f'pickle {len(pickled) / 2 ** 20:.0f} MB in {pickle_time:.2f}s')
+            for extractor_name, extractor in extractors.items():
+                start = perf_counter()
+                batches[extractor_name][name] = extract_batches(epoch, extractor, args.batch_size)
+                batch_time = perf_counter() - start
+                n_batches = len(batches[extractor_name][name])
+                print(f'{"":<10}{extractor_name}: {n_batches} batches in {batch_time:.2f}s '
+                      f'({batch_time / n_batches * 1e6:.0f} us/batch)')
+            del epoch, pickled
+        data_source.source.close()
+
+    for extractor_name, extractor_batches in batches.items():
+        print(f'Same batches ({extractor_name}): '
+              f'{same_batches(extractor_batches["List"], extractor_batches["Columnar"])}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SampledEpoch benchmark.')
+    parser.add_argument('--epoch_size', type=int, default=200000)
+    parser.add_argument('--batch_size', type=int, default=32)
+    parser.add_argument('--n_slides', type=int, default=50)
+    parser.add_argument('--n_groups', type=int, default=2)
+    parser.add_argument('--min_rows', type=int, default=100)
+    parser.add_argument('--max_rows', type=int, default=5000)
+    parser.add_argument('--tile_size', type=int, default=16)
+    parser.add_argument('--index_levels', type=str, nargs='+', default=['is_cancer', 'slide_name'])
+    parser.add_argument('--seed', type=int, default=0)
+    main(parser.parse_args())
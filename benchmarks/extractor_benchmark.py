@@ -0,0 +1,101 @@
+"""Benchmark of the TileStoreExtractor against the OpenslideExtractor.
+
+Random tiles of a slide are written into a tile store, as done by the slide
+converter with `tile_store` set. Batches of tiles sampled with replacement are
+then extracted by both extractors and the throughput is reported. Both extractors
+are required to return identical batches.
+
+Example:
+    python3 -m benchmarks.extractor_benchmark --slide_fp slide.mrxs --n_tiles 512
+"""
+# Standard Imports
+from pathlib import Path
+from time import perf_counter
+import argparse
+import tempfile
+
+# Third-party Imports
+import numpy as np
+import pandas as pd
+from openslide import OpenSlide
+
+# Local Imports
+from rationai.data.tiler.tile_store import write_tile_store
+from rationai.datagens.extractors import OpenslideExtractor
+from rationai.datagens.extractors import TileStoreExtractor
+from rationai.datagens.samplers import SampledEntry
+
+
+def random_coord_map(slide_fp: Path, n_tiles: int, tile_size: int, level: int, seed: int) -> pd.DataFrame:
+    """Creates a coordinate map of random grid tiles of a slide."""
+    rng = np.random.default_rng(seed)
+    with OpenSlide(str(slide_fp)) as oslide_wsi:
+        width, height = oslide_wsi.level_dimensions[level]
+        scale_factor = int(oslide_wsi.level_downsamples[level])
+    n_cols, n_rows = max(width // tile_size, 1), max(height // tile_size, 1)
+    grid_idx = rng.choice(n_cols * n_rows, size=min(n_tiles, n_cols * n_rows), replace=False)
+    return pd.DataFrame.from_dict({
+        'coord_x': (grid_idx % n_cols) * tile_size * scale_factor,
+        'coord_y': (grid_idx // n_cols) * tile_size * scale_factor,
+        'is_cancer': rng.random(len(grid_idx)) < 0.5,
+        'tile_idx': np.arange(len(grid_idx))
+    })
+
+
+def extraction_time(extractor, batches) -> float:
+    start = perf_counter()
+    for batch in batches:
+        extractor(batch)
+    return perf_counter() - start
+
+
+def main(args):
+    coord_map_df = random_coord_map(args.slide_fp, args.n_tiles, args.tile_size, args.level, args.seed)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tile_store_fp = Path(tmp_dir) / f'{args.slide_fp.stem}.npy'
+        start = perf_counter()
+        with OpenSlide(str(args.slide_fp)) as oslide_wsi:
+            write_tile_store(oslide_wsi, coord_map_df, args.tile_size, args.level, tile_store_fp)
+        write_time = perf_counter() - start
+        store_size_mb = tile_store_fp.stat().st_size / 2 ** 20
+
+        metadata = {'slide_fp': str(args.slide_fp), 'tile_size': args.tile_size,
+                    'sample_level': args.level, 'tile_store_fp': str(tile_store_fp)}
+        entries = coord_map_df.to_dict('records')
+        rng = np.random.default_rng(args.seed)
+        batches = [[SampledEntry(entry=entries[idx], metadata=metadata)
+                    for idx in rng.integers(0, len(entries), size=args.batch_size)]
+                   for _ in range(args.n_batches)]
+
+        tile_store_config = TileStoreExtractor.Config({})
+        tile_store_config.parse()
+        openslide_extractor = OpenslideExtractor(augmenter=None)
+        tile_store_extractor = TileStoreExtractor(config=tile_store_config, augmenter=None)
+        openslide_time = extraction_time(openslide_extractor, batches)
+        tile_store_time = extraction_time(tile_store_extractor, batches)
+
+        identical = True
+        for batch in batches[:4]:
+            (x_o, y_o), (x_t, y_t) = openslide_extractor(batch), tile_store_extractor(batch)
+            identical &= np.array_equal(x_o, x_t) and np.array_equal(y_o, y_t)
+
+    n_extracted = args.batch_size * args.n_batches
+    print(f'Tile store:         {len(coord_map_df)} tiles written in {write_time:.2f}s, {store_size_mb:.0f} MB')
+    print(f'OpenslideExtractor: {n_extracted / openslide_time:.1f} tiles/s')
+    print(f'TileStoreExtractor: {n_extracted / tile_store_time:.1f} tiles/s '
+          f'({openslide_time / tile_store_time:.1f}x)')
+    print(f'Identical batches:  {identical}')
+    if not identical:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tile extraction benchmark.')
+    parser.add_argument('--slide_fp', type=Path, required=True, help='Path to WSI file.')
+    parser.add_argument('--level', type=int, default=0)
+    parser.add_argument('--tile_size', type=int, default=512)
+    parser.add_argument('--n_tiles', type=int, default=256, help='Number of tiles in the tile store.')
+    parser.add_argument('--batch_size', type=int, default=32)
+    parser.add_argument('--n_batches', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,133 @@
+"""Benchmark of column projection and lazy loading of HDF5DataSource.
+
+A synthetic index file with `n_slides` coordinate maps of `n_columns` extra coverage
+columns is written into a temporary directory. For the samplers of the train, test
+and eval generators, the startup (loading of the tables and building of the
+SamplingTree) and the peak memory traced during it are measured when all columns
+are loaded, when only the columns used by the generator are loaded and, for the
+sequential samplers, in the lazy mode. The sampled entries of every mode are
+compared with those of loading all columns.
+
+Example:
+    python3 -m benchmarks.lazy_loading_benchmark --n_slides 100 --max_rows 50000
+"""
+# Standard Imports
+from pathlib import Path
+from time import perf_counter
+import argparse
+import tempfile
+import tracemalloc
+
+# Third-party Imports
+import numpy as np
+import pandas as pd
+
+# Local Imports
+from rationai.datagens.datasources import HDF5DataSource
+from rationai.datagens.samplers import RandomTreeSampler
+from rationai.datagens.samplers import SequentialTreeSampler
+
+
+GENERATORS = {
+    'train': (RandomTreeSampler, ['is_cancer', 'slide_name'], ['coord_x', 'coord_y', 'is_cancer', 'slide_name']),
+    'test': (SequentialTreeSampler, ['slide_name'], ['coord_x', 'coord_y', 'is_cancer', 'slide_name']),
+    'eval': (SequentialTreeSampler, ['slide_name'], ['is_cancer', 'pred', 'slide_name'])
+}
+
+
+def write_dataset(dataset_fp: Path, args) -> None:
+    """Writes coordinate maps of random sizes with extra coverage columns."""
+    rng = np.random.default_rng(args.seed)
+    with pd.HDFStore(dataset_fp, 'w') as dataset_h5:
+        for slide_idx in range(args.n_slides):
+            n_rows = int(rng.integers(args.min_rows, args.max_rows))
+            slide_name = f'slide_{slide_idx:04d}'
+            table_key = f'test/{slide_name}'
+            coord_map_df = pd.DataFrame({
+                'coord_x': rng.integers(0, 100000, n_rows),
+                'coord_y': rng.integers(0, 100000, n_rows),
+                'annot_coverage': rng.random(n_rows),
+                'is_cancer': rng.random(n_rows) < rng.random(),
+                'pred': rng.random(n_rows),
+                'slide_name': slide_name,
+                **{f'extra_{idx}_coverage': rng.random(n_rows) for idx in range(args.n_columns)}
+            })
+            dataset_h5.append(table_key, coord_map_df)
+            dataset_h5.get_storer(table_key).attrs.metadata = {
+                'slide_fp': f'/data/{slide_name}.mrxs', 'tile_size': 512, 'sample_level': 1}
+
+
+def sample_entries(sampler) -> list:
+    """Samples an epoch, or all leaves of a SequentialTreeSampler."""
+    if isinstance(sampler, RandomTreeSampler):
+        return [sampled_entry.entry for sampled_entry in sampler.sample()]
+    entries = []
+    while sampler.active_node is not None:
+        entries += [sampled_entry.entry for sampled_entry in sampler.sample()]
+        sampler.next()
+    return entries
+
+
+def run(dataset_fp: Path, sampler_cls, sampler_config, data_source_config: dict, columns) -> tuple:
+    """Builds the sampler and samples from it.
+
+    The peak memory is traced while building the sampler once more, as tracing
+    slows the startup down.
+
+    Returns:
+        tuple: Startup time, peak traced memory during the startup, time and entries of sampling.
+    """
+    config = HDF5DataSource.Config({'keys': ['test'], 'names': ['test'], **data_source_config})
+    config.parse()
+    data_source = HDF5DataSource.load_dataset(dataset_fp, config)['test']
+    start = perf_counter()
+    sampler = sampler_cls(sampler_config, data_source)
+    startup_time = perf_counter() - start
+    start = perf_counter()
+    entries = [{column: entry[column] for column in columns} for entry in sample_entries(sampler)]
+    sample_time = perf_counter() - start
+    del sampler
+
+    tracemalloc.start()
+    sampler_cls(sampler_config, data_source)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    data_source.source.close()
+    return startup_time, peak, sample_time, entries
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dataset_fp = Path(tmp_dir) / 'dataset.h5'
+        write_dataset(dataset_fp, args)
+
+        for name, (sampler_cls, index_levels, columns) in GENERATORS.items():
+            sampler_config = sampler_cls.Config({'epoch_size': args.epoch_size,
+                                                 'index_levels': index_levels,
+                                                 'seed': args.seed})
+            sampler_config.parse()
+            modes = {'all columns': {}, 'projected': {'columns': columns}}
+            if sampler_cls is SequentialTreeSampler:
+                modes['lazy'] = {'columns': columns, 'lazy': True}
+
+            baseline = None
+            for mode, data_source_config in modes.items():
+                startup_time, peak, sample_time, entries = run(
+                    dataset_fp, sampler_cls, sampler_config, data_source_config, columns + ['_table_key'])
+                if baseline is None:
+                    baseline = startup_time, peak, entries
+                print(f'{name + ":":<7}{mode + ":":<13}startup {startup_time:.2f}s '
+                      f'({baseline[0] / startup_time:.1f}x), peak memory {peak / 2 ** 20:.0f} MB '
+                      f'({baseline[1] / peak:.1f}x), sampling {sample_time:.2f}s, '
+                      f'same entries: {entries == baseline[2]}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='HDF5DataSource lazy loading benchmark.')
+    parser.add_argument('--epoch_size', type=int, default=50000)
+    parser.add_argument('--n_slides', type=int, default=50)
+    parser.add_argument('--n_columns', type=int, default=8)
+    parser.add_argument('--min_rows', type=int, default=1000)
+    parser.add_argument('--max_rows', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    main(parser.parse_args())
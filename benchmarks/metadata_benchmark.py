@@ -0,0 +1,114 @@
+"""Benchmark of the table metadata lookups of HDF5DataSource.
+
+A synthetic index file with `n_slides` coordinate maps is written into a temporary
+directory (see `benchmarks.sampler_benchmark`). All leaves of a SequentialTreeSampler
+are then traversed, and an epoch is sampled by a RandomTreeSampler, once reading the
+metadata from the HDF5 file for every entry, as the samplers did before the metadata
+cache, and once with the metadata cache of HDF5DataSource shared by all entries of a table.
+As the per-entry lookups are slow, the uncached epoch has at most `reference_epoch_size`
+entries and the throughputs are compared.
+
+Example:
+    python3 -m benchmarks.metadata_benchmark --n_slides 200 --max_rows 50000
+"""
+# Standard Imports
+from pathlib import Path
+from time import perf_counter
+from typing import List
+import argparse
+import tempfile
+
+# Third-party Imports
+
+# Local Imports
+from benchmarks.sampler_benchmark import write_dataset
+from rationai.datagens.datasources import HDF5DataSource
+from rationai.datagens.samplers import RandomTreeSampler
+from rationai.datagens.samplers import SequentialTreeSampler
+
+
+class UncachedHDF5DataSource(HDF5DataSource):
+    """Reads the metadata from the HDF5 file for every entry."""
+    def get_metadata(self, entry: dict) -> dict:
+        try:
+            return self.source.get_storer(entry['_table_key']).attrs.metadata
+        except AttributeError:
+            return {}
+
+
+class UncachedRandomTreeSampler(RandomTreeSampler):
+    """Looks up the metadata of every entry separately."""
+    def _get_metadata(self, entries: List[dict]) -> List[dict]:
+        return [self.data_source.get_metadata(entry) for entry in entries]
+
+
+class UncachedSequentialTreeSampler(SequentialTreeSampler):
+    """Looks up the metadata of every entry separately."""
+    def _get_metadata(self, entries: List[dict]) -> List[dict]:
+        return [self.data_source.get_metadata(entry) for entry in entries]
+
+
+def traverse(sampler: SequentialTreeSampler) -> int:
+    """Samples all leaves of a SequentialTreeSampler."""
+    n_entries = 0
+    while sampler.active_node is not None:
+        n_entries += len(sampler.sample())
+        sampler.next()
+    return n_entries
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dataset_fp = Path(tmp_dir) / 'dataset.h5'
+        write_dataset(dataset_fp, args)
+
+        data_source_config = HDF5DataSource.Config({'keys': [f'group_{idx}' for idx in range(args.n_groups)],
+                                                    'names': ['all']})
+        data_source_config.parse()
+        sequential_config = SequentialTreeSampler.Config({'index_levels': ['slide_name']})
+        sequential_config.parse()
+
+        results = {}
+        variants = (
+            ('Uncached', UncachedHDF5DataSource, UncachedSequentialTreeSampler, UncachedRandomTreeSampler,
+             min(args.reference_epoch_size, args.epoch_size)),
+            ('Cached', HDF5DataSource, SequentialTreeSampler, RandomTreeSampler, args.epoch_size)
+        )
+        for name, data_source_cls, sequential_cls, random_cls, epoch_size in variants:
+            random_config = RandomTreeSampler.Config({'epoch_size': epoch_size,
+                                                      'index_levels': args.index_levels,
+                                                      'seed': args.seed})
+            random_config.parse()
+            data_source = data_source_cls.load_dataset(dataset_fp, data_source_config)['all']
+            sequential_sampler = sequential_cls(sequential_config, data_source)
+            start = perf_counter()
+            n_entries = traverse(sequential_sampler)
+            sequential_time = perf_counter() - start
+
+            random_sampler = random_cls(random_config, data_source)
+            start = perf_counter()
+            random_sampler.sample()
+            random_time = perf_counter() - start
+            data_source.source.close()
+            results[name] = n_entries / sequential_time, epoch_size / random_time
+            print(f'{name + ":":<10}sequential {n_entries} entries in {sequential_time:.2f}s '
+                  f'({results[name][0]:.0f} entries/s), '
+                  f'random {epoch_size} entries in {random_time:.2f}s '
+                  f'({results[name][1]:.0f} entries/s)')
+
+    (uncached_sequential, uncached_random), (cached_sequential, cached_random) = results.values()
+    print(f'Speedup:  sequential {cached_sequential / uncached_sequential:.1f}x, '
+          f'random {cached_random / uncached_random:.1f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='HDF5DataSource metadata benchmark.')
+    parser.add_argument('--epoch_size', type=int, default=100000)
+    parser.add_argument('--reference_epoch_size', type=int, default=5000)
+    parser.add_argument('--n_slides', type=int, default=50)
+    parser.add_argument('--n_groups', type=int, default=2)
+    parser.add_argument('--min_rows', type=int, default=100)
+    parser.add_argument('--max_rows', type=int, default=5000)
+    parser.add_argument('--index_levels', type=str, nargs='+', default=['is_cancer', 'slide_name'])
+    parser.add_argument('--seed', type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,84 @@
+"""Benchmark of the multi-level conversion against one conversion per level.
+
+The supplied slide converter config must contain `levels` in its `_global` group.
+The slides are converted once with all levels and then once per level with the
+level specification merged into `_global`, as done before multi-level conversion.
+All outputs are written into a temporary directory and the tables of both
+approaches are required to be identical.
+
+Example:
+    python3 -m benchmarks.multilevel_benchmark --config_fp multilevel.json
+"""
+# Standard Imports
+from pathlib import Path
+from time import perf_counter
+from types import SimpleNamespace
+import argparse
+import copy
+import json
+import tempfile
+
+# Third-party Imports
+import pandas as pd
+
+# Local Imports
+from rationai.data.tiler.xml_annot_patcher import main as convert
+
+
+def run_conversion(config: dict, output_dir: Path) -> float:
+    """Runs the slide converter writing into `output_dir`."""
+    config = copy.deepcopy(config)
+    config['slide-converter']['_global'].update({'output_dir': str(output_dir), 'force': True,
+                                                 'incremental_mode': False})
+    config_fp = output_dir.with_suffix('.json')
+    with open(config_fp, 'w') as f:
+        json.dump(config, f)
+    start = perf_counter()
+    convert(SimpleNamespace(config_fp=config_fp, dry_run=False))
+    return perf_counter() - start
+
+
+def read_tables(dataset_fp: Path) -> dict:
+    with pd.HDFStore(dataset_fp, 'r') as dataset_h5:
+        return {key: dataset_h5[key].reset_index(drop=True) for key in dataset_h5.keys()}
+
+
+def main(args):
+    with open(args.config_fp) as f:
+        config = json.load(f)
+    levels = config['slide-converter']['_global'].pop('levels')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        multi_config = copy.deepcopy(config)
+        multi_config['slide-converter']['_global']['levels'] = levels
+        multi_time = run_conversion(multi_config, tmp_dir / 'multi')
+        multi_tables = read_tables(tmp_dir / 'multi' / 'multi.h5')
+
+        separate_time = 0.
+        identical = True
+        for level in levels:
+            level_config = copy.deepcopy(config)
+            level_config['slide-converter']['_global'].update(level)
+            level_name = f'level_{level_config["slide-converter"]["_global"]["sample_level"]}'
+            separate_time += run_conversion(level_config, tmp_dir / level_name)
+
+            for key, table in read_tables(tmp_dir / level_name / f'{level_name}.h5').items():
+                group, slide_name = key.lstrip('/').split('/')
+                multi_table = multi_tables.get(f'/{group}/{level_name}/{slide_name}')
+                identical &= multi_table is not None and multi_table.equals(table)
+
+    print(f'Levels:             {len(levels)}')
+    print(f'One run per level:  {separate_time:.2f}s')
+    print(f'Multi-level run:    {multi_time:.2f}s ({separate_time / multi_time:.2f}x, '
+          f'{separate_time - multi_time:.2f}s saved)')
+    print(f'Identical tables:   {identical}')
+    if not identical:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Multi-level conversion benchmark.')
+    parser.add_argument('--config_fp', type=Path, required=True,
+                        help='Slide converter config with `levels` in `_global`.')
+    main(parser.parse_args())
@@ -0,0 +1,140 @@
+"""Benchmark of the vectorized RandomTreeSampler against per-entry sampling.
+
+A synthetic index file with `n_slides` coordinate maps in `n_groups` groups is
+written into a temporary directory and loaded by HDF5DataSource. An epoch is then
+sampled by the reference implementation, which walks the SamplingTree and reads
+the metadata for every entry, and by RandomTreeSampler. As the reference is slow,
+it samples at most `reference_epoch_size` entries and the throughputs are compared.
+The frequencies of the leaves of both samplers are compared with the expected ones.
+Finally, the time to build the SamplingTree is compared with the time to load it
+memory-mapped from `index_dir`, and the epochs sampled from both are compared.
+
+Example:
+    python3 -m benchmarks.sampler_benchmark --epoch_size 200000 --n_slides 200
+"""
+# Standard Imports
+from pathlib import Path
+from time import perf_counter
+import argparse
+import tempfile
+
+# Third-party Imports
+import numpy as np
+import pandas as pd
+
+# Local Imports
+from rationai.datagens.datasources import HDF5DataSource
+from rationai.datagens.samplers import RandomTreeSampler
+from rationai.datagens.samplers import SampledEntry
+
+
+def write_dataset(dataset_fp: Path, args) -> None:
+    """Writes coordinate maps of random sizes with slide metadata."""
+    rng = np.random.default_rng(args.seed)
+    with pd.HDFStore(dataset_fp, 'w') as dataset_h5:
+        for slide_idx in range(args.n_slides):
+            n_rows = int(rng.integers(args.min_rows, args.max_rows))
+            slide_name = f'slide_{slide_idx:04d}'
+            table_key = f'group_{slide_idx % args.n_groups}/{slide_name}'
+            coord_map_df = pd.DataFrame({
+                'coord_x': rng.integers(0, 100000, n_rows),
+                'coord_y': rng.integers(0, 100000, n_rows),
+                'annot_coverage': rng.random(n_rows),
+                'is_cancer': rng.random(n_rows) < rng.random(),
+                'slide_name': slide_name
+            })
+            dataset_h5.append(table_key, coord_map_df)
+            dataset_h5.get_storer(table_key).attrs.metadata = {
+                'slide_fp': f'/data/{slide_name}.mrxs', 'tile_size': 512, 'sample_level': 1}
+
+
+def reference_sample(sampler: RandomTreeSampler, epoch_size: int, rng: np.random.Generator):
+    """Per-entry sampling walking the SamplingTree for every entry."""
+    result = []
+    for _ in range(epoch_size):
+        node = sampler.sampling_tree.root
+        while node.children:
+            node = node.children[rng.integers(low=0, high=len(node.children))]
+        entry = node.data.sample(random_state=rng.bit_generator).to_dict('records')[0]
+        result.append(SampledEntry(entry=entry, metadata=sampler.data_source.get_metadata(entry)))
+    return result
+
+
+def expected_frequencies(sampler: RandomTreeSampler) -> pd.Series:
+    """Probabilities of the leaves when a child is chosen uniformly at every level."""
+    probas = {}
+    nodes = [(sampler.sampling_tree.root, 1.)]
+    while nodes:
+        node, proba = nodes.pop()
+        if not node.children:
+            probas[node.node_name] = proba
+        nodes += [(child, proba / len(node.children)) for child in node.children]
+    return pd.Series(probas)
+
+
+def leaf_frequencies(sampled_entries, index_levels) -> pd.Series:
+    leaf_names = ['/'.join(['/ROOT'] + [str(sampled_entry.entry[column]) for column in index_levels])
+                  for sampled_entry in sampled_entries]
+    return pd.Series(leaf_names).value_counts(normalize=True)
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dataset_fp = Path(tmp_dir) / 'dataset.h5'
+        write_dataset(dataset_fp, args)
+
+        data_source_config = HDF5DataSource.Config({'keys': [f'group_{idx}' for idx in range(args.n_groups)],
+                                                    'names': ['all']})
+        data_source_config.parse()
+        data_source = HDF5DataSource.load_dataset(dataset_fp, data_source_config)['all']
+        sampler_config = RandomTreeSampler.Config({'epoch_size': args.epoch_size,
+                                                   'index_levels': args.index_levels,
+                                                   'seed': args.seed})
+        sampler_config.parse()
+        start = perf_counter()
+        sampler = RandomTreeSampler(sampler_config, data_source)
+        build_time = perf_counter() - start
+
+        start = perf_counter()
+        reference_size = min(args.epoch_size, args.reference_epoch_size)
+        reference_entries = reference_sample(sampler, reference_size, np.random.default_rng(args.seed))
+        reference_time = perf_counter() - start
+        start = perf_counter()
+        vectorized_entries = sampler.sample()
+        vectorized_time = perf_counter() - start
+        expected = expected_frequencies(sampler)
+
+        index_config = RandomTreeSampler.Config({**sampler_config.config, 'index_dir': str(Path(tmp_dir) / 'index')})
+        index_config.parse()
+        RandomTreeSampler(index_config, data_source)
+        start = perf_counter()
+        mmap_sampler = RandomTreeSampler(index_config, data_source)
+        load_time = perf_counter() - start
+        same_epoch = [sampled_entry.entry for sampled_entry in mmap_sampler.sample()] == \
+            [sampled_entry.entry for sampled_entry in RandomTreeSampler(sampler_config, data_source).sample()]
+        data_source.source.close()
+
+    reference_rate, vectorized_rate = reference_size / reference_time, args.epoch_size / vectorized_time
+    print(f'Reference:     {reference_size} entries in {reference_time:.2f}s ({reference_rate:.0f} entries/s)')
+    print(f'Vectorized:    {args.epoch_size} entries in {vectorized_time:.2f}s ({vectorized_rate:.0f} entries/s, '
+          f'{vectorized_rate / reference_rate:.1f}x)')
+    print(f'Tree build:    {build_time:.2f}s, memory-mapped load {load_time:.3f}s '
+          f'({build_time / load_time:.0f}x), same epoch: {same_epoch}')
+    for name, entries in (('Reference', reference_entries), ('Vectorized', vectorized_entries)):
+        deviation = (leaf_frequencies(entries, args.index_levels).reindex(expected.index, fill_value=0)
+                     - expected).abs().max()
+        cancer_ratio = np.mean([sampled_entry.entry['is_cancer'] for sampled_entry in entries])
+        print(f'{name + ":":<15}max leaf frequency deviation {deviation:.5f}, is_cancer ratio {cancer_ratio:.4f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='RandomTreeSampler benchmark.')
+    parser.add_argument('--epoch_size', type=int, default=100000)
+    parser.add_argument('--reference_epoch_size', type=int, default=5000)
+    parser.add_argument('--n_slides', type=int, default=100)
+    parser.add_argument('--n_groups', type=int, default=2)
+    parser.add_argument('--min_rows', type=int, default=100)
+    parser.add_argument('--max_rows', type=int, default=20000)
+    parser.add_argument('--index_levels', type=str, nargs='+', default=['is_cancer', 'slide_name'])
+    parser.add_argument('--seed', type=int, default=0)
+    main(parser.parse_args())
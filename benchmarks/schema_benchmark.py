@@ -0,0 +1,93 @@
+"""Benchmark of the compact coordinate map schema.
+
+A dataset resembling the converter output is written with the default and with
+the compact schema. Both files are then loaded by `HDF5DataSource` and the file
+size, load time and memory of the loaded table are reported. The default file is
+additionally loaded with `compact_schema` to show the conversion of existing files.
+
+Example:
+    python3 -m benchmarks.schema_benchmark --n_slides 500 --tiles_per_slide 20000
+"""
+# Standard Imports
+from pathlib import Path
+from time import perf_counter
+import argparse
+import tempfile
+
+# Third-party Imports
+import numpy as np
+import pandas as pd
+
+# Local Imports
+from rationai.datagens.datasources import HDF5DataSource
+from rationai.data.tiler.writers import write_table
+from rationai.utils.schema import compact_table
+
+
+def synthetic_coord_map(rng: np.random.Generator, slide_name: str, n_tiles: int) -> pd.DataFrame:
+    """Creates a coordinate map of a slide with grid coordinates and sparse annotations."""
+    grid_width = int(np.sqrt(n_tiles)) + 1
+    grid_idx = np.sort(rng.choice(grid_width * grid_width, size=n_tiles, replace=False))
+    annot_coverage = np.where(rng.random(n_tiles) < 0.2,
+                              rng.integers(1, 256 * 256 + 1, size=n_tiles) / (256 * 256), 0.)
+    return pd.DataFrame.from_dict({
+        'coord_x': (grid_idx % grid_width) * 256 * 2,
+        'coord_y': (grid_idx // grid_width) * 256 * 2,
+        'annot_coverage': annot_coverage,
+        'is_cancer': annot_coverage > 0,
+        'slide_name': [slide_name] * n_tiles
+    })
+
+
+def write_dataset(dataset_fp: Path, args, compact: bool) -> float:
+    rng = np.random.default_rng(args.seed)
+    start = perf_counter()
+    with pd.HDFStore(dataset_fp, 'w') as dataset_h5:
+        for slide_idx in range(args.n_slides):
+            slide_name = f'P-{2000 + slide_idx // 1000}_{slide_idx:05d}-1-1'
+            n_tiles = int(rng.integers(args.tiles_per_slide // 2, args.tiles_per_slide * 3 // 2))
+            coord_map_df = synthetic_coord_map(rng, slide_name, n_tiles)
+            if compact:
+                coord_map_df = compact_table(coord_map_df)
+            write_table(dataset_h5, f'train/{slide_name}', coord_map_df, {'slide_name': slide_name})
+    return perf_counter() - start
+
+
+def load_dataset(dataset_fp: Path, compact: bool):
+    config = HDF5DataSource.Config({'keys': ['train'], 'compact_schema': compact, 'seed': 0})
+    config.parse()
+    data_source = HDF5DataSource.load_dataset(dataset_fp, config)['train']
+    start = perf_counter()
+    table = data_source.get_table()
+    elapsed = perf_counter() - start
+    data_source.source.close()
+    return table, elapsed
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        default_fp, compact_fp = Path(tmp_dir) / 'default.h5', Path(tmp_dir) / 'compact.h5'
+        write_times = {False: write_dataset(default_fp, args, compact=False),
+                       True: write_dataset(compact_fp, args, compact=True)}
+
+        for label, dataset_fp, compact in [('default', default_fp, False),
+                                           ('compact', compact_fp, True),
+                                           ('default -> compact', default_fp, True)]:
+            table, load_time = load_dataset(dataset_fp, compact)
+            memory_mb = table.memory_usage(deep=True).sum() / 2 ** 20
+            print(f'{label:20s} rows {len(table)}, file {dataset_fp.stat().st_size / 2 ** 20:.0f} MB, '
+                  f'write {write_times[dataset_fp == compact_fp]:.2f}s, '
+                  f'load {load_time:.2f}s, memory {memory_mb:.0f} MB')
+            if compact:
+                reference = compact_table(load_dataset(default_fp, False)[0])
+                assert (table['coord_x'].to_numpy() == reference['coord_x'].to_numpy()).all()
+                assert (table['_table_key'].astype(str).to_numpy() == reference['_table_key'].astype(str).to_numpy()).all()
+            del table
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compact schema benchmark.')
+    parser.add_argument('--n_slides', type=int, default=300)
+    parser.add_argument('--tiles_per_slide', type=int, default=15000)
+    parser.add_argument('--seed', type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,64 @@
+"""Benchmark of slide startup through OpenSlide against the slide catalog.
+
+For every slide of a directory the startup of a conversion is timed: opening the
+slide, reading its level dimensions and downsamples and reading the whole
+background level. The startup is run directly through OpenSlide, through an empty
+(cold) catalog, which additionally stores the metadata and the level, and through
+the filled (warm) catalog. The levels read by all three ways are required to be
+identical.
+
+Example:
+    python3 -m benchmarks.slide_catalog_benchmark --slide_dir slides/ --pattern "*.mrxs" --level 4
+"""
+# Standard Imports
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import argparse
+
+# Third-party Imports
+import numpy as np
+
+# Local Imports
+from rationai.utils.slide_catalog import open_slide
+
+
+def startup(slide_fp: Path, level: int, cache_dir: Path):
+    t0 = perf_counter()
+    with open_slide(slide_fp, cache_dir, thumbnail_levels=[level]) as oslide_wsi:
+        level = min(level, oslide_wsi.level_count - 1)
+        _ = oslide_wsi.level_downsamples[level]
+        level_np = np.asarray(oslide_wsi.read_region((0, 0), level, oslide_wsi.level_dimensions[level]))
+    return perf_counter() - t0, level_np
+
+
+def main(args):
+    slide_fps = sorted(Path(args.slide_dir).glob(args.pattern))
+    if not slide_fps:
+        raise SystemExit(f'No slides matching {args.pattern} in {args.slide_dir}')
+
+    with TemporaryDirectory() as cache_dir:
+        times = {'OpenSlide': 0., 'Cold catalog': 0., 'Warm catalog': 0.}
+        identical = True
+        for slide_fp in slide_fps:
+            elapsed, reference_np = startup(slide_fp, args.level, None)
+            times['OpenSlide'] += elapsed
+            for name in ('Cold catalog', 'Warm catalog'):
+                elapsed, level_np = startup(slide_fp, args.level, Path(cache_dir))
+                times[name] += elapsed
+                identical &= np.array_equal(reference_np, level_np)
+
+    for name, elapsed in times.items():
+        print(f'{name + ":":<16}{elapsed / len(slide_fps) * 1000:.1f} ms/slide '
+              f'({times["OpenSlide"] / elapsed:.1f}x)')
+    print(f'Identical levels: {identical}')
+    if not identical:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Slide catalog startup benchmark.')
+    parser.add_argument('--slide_dir', type=str, required=True, help='Directory of the slides.')
+    parser.add_argument('--pattern', type=str, default='*.mrxs', help='Glob pattern of the slides.')
+    parser.add_argument('--level', type=int, default=4, help='Background level read at startup.')
+    main(parser.parse_args())
@@ -0,0 +1,126 @@
+"""Benchmark of the vectorized tiling engine against the per-tile tiling loop.
+
+A synthetic slide is described by a background mask at `bg_level` and an annotation
+mask at `sample_level`. Both implementations tile the slide and the resulting
+coordinate maps are required to be identical.
+
+Example:
+    python3 -m benchmarks.tiling_benchmark --width 16384 --height 32768
+"""
+# Standard Imports
+from types import SimpleNamespace
+from time import perf_counter
+import argparse
+
+# Third-party Imports
+import numpy as np
+import pandas as pd
+from PIL import Image
+from PIL import ImageDraw
+
+# Local Imports
+from rationai.data.tiler.xml_annot_patcher import SlideConverter
+
+
+def synthetic_slide(width: int, height: int, bg_scale_factor: int, seed: int):
+    """Creates a slide-like handler together with background and annotation masks."""
+    rng = np.random.default_rng(seed)
+    n_levels = int(np.log2(bg_scale_factor)) + 1
+    oslide_wsi = SimpleNamespace(
+        level_downsamples=[float(2 ** level) for level in range(n_levels)],
+        level_dimensions=[(width // 2 ** level, height // 2 ** level) for level in range(n_levels)]
+    )
+
+    bg_mask_img = Image.new('L', oslide_wsi.level_dimensions[-1], 'BLACK')
+    bg_draw = ImageDraw.Draw(bg_mask_img)
+    annot_mask_img = Image.new('L', (width, height), 'BLACK')
+    annot_draw = ImageDraw.Draw(annot_mask_img)
+    for _ in range(32):
+        cx, cy = rng.integers(0, width), rng.integers(0, height)
+        r = rng.integers(width // 32, width // 6)
+        bg_draw.ellipse([(cx - r) // bg_scale_factor, (cy - r) // bg_scale_factor,
+                         (cx + r) // bg_scale_factor, (cy + r) // bg_scale_factor], 'WHITE')
+        annot_draw.ellipse([cx - r // 2, cy - r // 3, cx + r // 2, cy + r // 3], 'WHITE')
+    return oslide_wsi, bg_mask_img, annot_mask_img
+
+
+def per_tile_coord_map(converter: SlideConverter, oslide_wsi, bg_mask_img: Image.Image,
+                       annot_mask_img: Image.Image) -> pd.DataFrame:
+    """Reference implementation cropping the masks for every grid position."""
+    config = converter.config
+    bg_scale_factor = int(oslide_wsi.level_downsamples[config.bg_level])
+    sampling_scale_factor = int(oslide_wsi.level_downsamples[config.sample_level])
+    effective_scale_factor = bg_scale_factor // sampling_scale_factor
+    wsi_width, wsi_height = oslide_wsi.level_dimensions[config.sample_level]
+
+    offset_size = int((config.tile_size - config.center_size) // 2)
+    center_filter = Image.new('L', (config.tile_size, config.tile_size), 'BLACK')
+    ImageDraw.Draw(center_filter).rectangle(
+        [(offset_size, offset_size),
+         (config.tile_size - offset_size, config.tile_size - offset_size)], 'WHITE')
+    center_filter_np = np.array(center_filter)
+
+    def crop(mask_img, coord_x, coord_y, scale_factor):
+        return mask_img.crop((int(coord_x // scale_factor),
+                              int(coord_y // scale_factor),
+                              int((coord_x + config.tile_size) // scale_factor),
+                              int((coord_y + config.tile_size) // scale_factor)))
+
+    coord_map = {'coord_x': [], 'coord_y': [], 'annot_coverage': [], 'is_cancer': [], 'slide_name': []}
+    for coord_y in range(0, wsi_height, config.step_size):
+        for coord_x in range(0, wsi_width, config.step_size):
+            bg_tile_np = np.array(crop(bg_mask_img, coord_x, coord_y, effective_scale_factor))
+            tissue_coverage = np.count_nonzero(bg_tile_np) / bg_tile_np.size
+            if not config.min_tissue <= tissue_coverage <= config.max_tissue:
+                continue
+            annot_tile_np = np.array(crop(annot_mask_img, coord_x, coord_y, 1))
+            label = np.count_nonzero(annot_tile_np & center_filter_np) / (config.center_size * config.center_size)
+            coord_map['coord_x'].append(coord_x * sampling_scale_factor)
+            coord_map['coord_y'].append(coord_y * sampling_scale_factor)
+            coord_map['annot_coverage'].append(label)
+            coord_map['is_cancer'].append(label > 0)
+            coord_map['slide_name'].append(converter.slide_name)
+    return pd.DataFrame.from_dict(coord_map)
+
+
+def main(args):
+    oslide_wsi, bg_mask_img, annot_mask_img = synthetic_slide(
+        args.width, args.height, 2 ** args.bg_level, args.seed)
+    config = SimpleNamespace(tile_size=args.tile_size, center_size=args.center_size,
+                             step_size=args.step_size, sample_level=0, bg_level=args.bg_level,
+                             min_tissue=0.5, max_tissue=1.0, negative_mode=False,
+                             max_band_width=16384, stripe_workers=1, compact_schema=False,
+                             tile_store=False, coverage_grids=False, coverage_center_sizes=None,
+                             label_schemes=None)
+    converter = SlideConverter(config)
+    converter.slide_name = 'synthetic'
+
+    t0 = perf_counter()
+    reference_df = per_tile_coord_map(converter, oslide_wsi, bg_mask_img, annot_mask_img)
+    t_reference = perf_counter() - t0
+
+    t0 = perf_counter()
+    vectorized_df = converter._tile_wsi_to_coord_map(oslide_wsi, bg_mask_img, annot_mask_img)
+    t_vectorized = perf_counter() - t0
+
+    n_grid = len(range(0, args.width, args.step_size)) * len(range(0, args.height, args.step_size))
+    identical = reference_df.equals(vectorized_df) and (reference_df.dtypes == vectorized_df.dtypes).all()
+    print(f'Grid positions:   {n_grid}')
+    print(f'ROI tiles:        {len(vectorized_df)}')
+    print(f'Per-tile loop:    {t_reference:.3f}s')
+    print(f'Vectorized:       {t_vectorized:.3f}s ({t_reference / t_vectorized:.1f}x)')
+    print(f'Identical tables: {identical}')
+    if not identical:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tiling engine benchmark.')
+    parser.add_argument('--width', type=int, default=8192, help='Width of the synthetic slide.')
+    parser.add_argument('--height', type=int, default=16384, help='Height of the synthetic slide.')
+    parser.add_argument('--tile_size', type=int, default=512)
+    parser.add_argument('--center_size', type=int, default=256)
+    parser.add_argument('--step_size', type=int, default=128)
+    parser.add_argument('--bg_level', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,101 @@
+"""Benchmark of the single-pass annotation parser against per-keyword parsing.
+
+A synthetic ASAP annotation file is read the way the slide converter reads it for
+a slide: include and exclude keywords for both the background-annotation mask and
+the label mask. The legacy reader parses the whole XML for every keyword set, the
+single-pass parser once; the on-disk cache skips parsing altogether. All readers
+are required to return identical polygons.
+
+Example:
+    python3 -m benchmarks.xml_benchmark --n_polygons 2000 --vertices 200
+"""
+# Standard Imports
+from pathlib import Path
+from time import perf_counter
+import argparse
+import tempfile
+import xml.etree.ElementTree as ET
+
+# Third-party Imports
+import numpy as np
+
+# Local Imports
+from rationai.utils import annotations
+from rationai.utils.annotations import load_annotations
+
+
+def write_annotations(annotation_fp: Path, n_polygons: int, n_vertices: int, seed: int) -> None:
+    """Writes an ASAP annotation file with random polygons of several groups."""
+    rng = np.random.default_rng(seed)
+    groups = ['Carcinoma', 'Exclude', 'Other']
+    with open(annotation_fp, 'w') as f:
+        f.write('<?xml version="1.0"?>\n<ASAP_Annotations>\n\t<Annotations>\n')
+        for idx in range(n_polygons):
+            f.write(f'\t\t<Annotation Name="Annotation {idx}" Type="Polygon" '
+                    f'PartOfGroup="{groups[idx % len(groups)]}" Color="#F4FA58">\n\t\t\t<Coordinates>\n')
+            center = rng.uniform(0, 100000, size=2)
+            angles = np.sort(rng.uniform(0, 2 * np.pi, size=n_vertices))
+            radii = rng.uniform(100, 2000, size=n_vertices)
+            for order, (angle, radius) in enumerate(zip(angles, radii)):
+                f.write(f'\t\t\t\t<Coordinate Order="{order}" X="{center[0] + radius * np.cos(angle):.4f}" '
+                        f'Y="{center[1] + radius * np.sin(angle):.4f}" />\n')
+            f.write('\t\t\t</Coordinates>\n\t\t</Annotation>\n')
+        f.write('\t</Annotations>\n\t<AnnotationGroups />\n</ASAP_Annotations>\n')
+
+
+def legacy_read_polygons(annotation_fp: Path, scale_factor: float, keywords):
+    """Per-keyword ElementTree reader used by the slide converter before."""
+    polygons = []
+    root = ET.parse(str(annotation_fp)).getroot()
+    for anno_tag in root.findall('Annotations/Annotation'):
+        polygon = []
+        if anno_tag.get('PartOfGroup') in keywords:
+            for coord in anno_tag.findall('Coordinates/Coordinate'):
+                polygon.append((float(coord.get('X')) / scale_factor,
+                                float(coord.get('Y')) / scale_factor))
+        if polygon:
+            polygons.append(polygon)
+    return polygons
+
+
+# (scale_factor, keywords) of the reads done by the slide converter for a slide
+READS = [(16, ['Carcinoma']), (16, ['Exclude']), (1, ['Carcinoma']), (1, [])]
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        annotation_fp, cache_dir = Path(tmp_dir) / 'slide.xml', Path(tmp_dir) / 'cache'
+        write_annotations(annotation_fp, args.n_polygons, args.vertices, args.seed)
+        size_mb = annotation_fp.stat().st_size / 2 ** 20
+
+        start = perf_counter()
+        legacy = [legacy_read_polygons(annotation_fp, scale_factor, keywords)
+                  for scale_factor, keywords in READS]
+        legacy_time = perf_counter() - start
+
+        results = {}
+        for label, cache in [('single-pass', None), ('cache miss', cache_dir), ('cache hit', cache_dir)]:
+            annotations._memory_cache.clear()
+            start = perf_counter()
+            parsed = load_annotations(annotation_fp, cache)
+            results[label] = ([parsed.polygons(keywords, scale_factor) for scale_factor, keywords in READS],
+                              perf_counter() - start)
+
+    print(f'Annotation file: {size_mb:.1f} MB, {args.n_polygons * args.vertices} vertices')
+    print(f'{"legacy":12s} {legacy_time:.2f}s')
+    identical = True
+    for label, (polygons, elapsed) in results.items():
+        identical &= all(len(l) == len(p) and all(np.array_equal(np.array(lp), pp) for lp, pp in zip(l, p))
+                         for l, p in zip(legacy, polygons))
+        print(f'{label:12s} {elapsed:.2f}s ({legacy_time / elapsed:.1f}x)')
+    print(f'Identical polygons: {identical}')
+    if not identical:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Annotation parsing benchmark.')
+    parser.add_argument('--n_polygons', type=int, default=1000)
+    parser.add_argument('--vertices', type=int, default=200, help='Number of vertices of a polygon.')
+    parser.add_argument('--seed', type=int, default=0)
+    main(parser.parse_args())
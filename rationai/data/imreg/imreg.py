@@ -51,6 +51,7 @@ from rationai.data.imreg.muni.sample_segmentation.ignore_annotation import draw_
 from rationai.data.imreg.muni.sample_segmentation.segment_samples import get_samples_generator
 
 from rationai.utils.config import ConfigProto
+from rationai.utils.slide_catalog import open_slide
 
 log = logging.getLogger('image-reg')
 logging.basicConfig(level=logging.INFO,
@@ -273,8 +274,11 @@ class ImageRegistration:
 
         """Runs the alignment method for a pair of WSIs."""
         # load whole slide images
-        he_openslide = openslide.OpenSlide(str(he_slide_fp.resolve()))
-        ce_openslide = openslide.OpenSlide(str(hdab_slide_fp.resolve()))
+        # Segmentation level is read from the slide catalog if configured
+        he_openslide = open_slide(he_slide_fp, self.config.slide_catalog_dir,
+                                  thumbnail_levels=[self.config.segmentation_level])
+        ce_openslide = open_slide(hdab_slide_fp, self.config.slide_catalog_dir,
+                                  thumbnail_levels=[self.config.segmentation_level])
 
         he_annotation = None
         ce_annotation = None
@@ -318,6 +322,7 @@ class ImageRegistration:
             self.he_dir = None
             self.hdab_dir = None
             self.pattern = None
+            self.slide_catalog_dir = None
 
             # Output Path Parameters
             self.output_path = None
@@ -471,6 +476,8 @@ class ImageRegistration:
             self.he_dir = Path(self.he_dir)
             if self.hdab_dir:
                 self.hdab_dir = Path(self.hdab_dir)
+            if self.slide_catalog_dir:
+                self.slide_catalog_dir = Path(self.slide_catalog_dir)
 
 def main(args):
     for cfg in ImageRegistration.Config(args.config_fp):
@@ -1,10 +1,11 @@
 import numpy as np
-from xml.dom import minidom
 from shapely.geometry import Polygon
 from shapely.affinity import scale
 from shapely.geometry import MultiPolygon
 from skimage.draw import polygon
 
+from rationai.utils.annotations import load_annotations
+
 
 def polygon_to_annotation(polygon):
     return np.asarray(polygon.exterior.coords)[:-1, :]
@@ -93,18 +94,8 @@ def read_ignore_annotations(path, output_level):
 
     """
 
-    xml = minidom.parse(path)
-    polygons = xml.getElementsByTagName('Annotation')
-    out = []
-    for pol in polygons:
-        coordinates = pol.getElementsByTagName('Coordinate')
-        coords = []
-        for c in coordinates:
-            x = int(float(c.attributes['X'].value) / 2 ** output_level)
-            y = int(float(c.attributes['Y'].value) / 2 ** output_level)
-            coords.append(np.array([y, x]))
-        out.append(np.asarray(coords))
-    return out
+    return [(polygon / 2 ** output_level).astype(int)[:, ::-1]
+            for polygon in load_annotations(path).polygons()]
 
 
 def read_ignore_annotation_as_multipolygon(path, output_level):
@@ -0,0 +1,105 @@
+"""Arrow IPC copies of converted datasets.
+
+All coordinate maps of an index file are stored in a single Arrow IPC file, one
+after another in the order of their table keys. Every table is written as record
+batches of at most `chunk_rows` rows. The schema metadata holds, under
+`TABLES_METADATA_KEY`, the key, first row, number of rows and metadata of every
+table, so the tables are listed without reading the file. Columns missing in some
+of the tables are filled with nulls, categorical columns are stored decoded and
+the index of the tables is kept.
+
+The file is opened memory-mapped by `rationai.datagens.datasources.ArrowDataSource`,
+so the columns are read without copying and the mapping is shared by forked workers.
+
+Example:
+    python3 -m rationai.data.tiler.arrow_export --dataset_fp data.h5 --output_fp data.arrow
+"""
+# Standard Imports
+from pathlib import Path
+from time import perf_counter
+import argparse
+import json
+import logging
+import os
+
+# Third-party Imports
+import pandas as pd
+import pyarrow as pa
+
+# Local Imports
+
+
+log = logging.getLogger('slide-converter')
+
+TABLES_METADATA_KEY = b'rationai.tables'
+
+
+def export_arrow(dataset_fp: Path, output_fp: Path, chunk_rows: int = 1_000_000) -> None:
+    """Writes all tables of a HDF5 index file into an Arrow IPC file.
+
+    The output file is written under a temporary name and renamed once complete.
+
+    Args:
+        dataset_fp (Path): HDF5 index file.
+        output_fp (Path): Output Arrow IPC file.
+        chunk_rows (int): Maximum number of rows read and written at once.
+    """
+    start = perf_counter()
+    tmp_fp = output_fp.with_name(f'.{output_fp.name}.{os.getpid()}')
+    with pd.HDFStore(dataset_fp, 'r') as dataset_h5:
+        table_keys = sorted(dataset_h5.keys())
+
+        # Tables are listed in the schema, which is written before the data
+        tables_info = []
+        schemas = []
+        n_rows = 0
+        for table_key in table_keys:
+            storer = dataset_h5.get_storer(table_key)
+            length = int(storer.nrows)
+            tables_info.append({
+                'key': table_key,
+                'offset': n_rows,
+                'length': length,
+                'metadata': getattr(storer.attrs, 'metadata', None) or {}
+            })
+            n_rows += length
+            schemas.append(pa.Schema.from_pandas(_decode_categories(dataset_h5.select(table_key, stop=1)),
+                                                 preserve_index=True))
+        schema = pa.unify_schemas(schemas) if schemas else pa.schema([])
+        schema = schema.with_metadata({
+            **(schemas[0].metadata if schemas else {}),
+            TABLES_METADATA_KEY: json.dumps(tables_info, default=str).encode('UTF-8')
+        })
+
+        with pa.OSFile(str(tmp_fp), 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+            for table_key in table_keys:
+                for chunk in dataset_h5.select(table_key, chunksize=chunk_rows):
+                    writer.write_table(_to_arrow(chunk, schema), max_chunksize=chunk_rows)
+    os.replace(tmp_fp, output_fp)
+    elapsed = perf_counter() - start
+    log.info(f'{len(table_keys)} tables, {n_rows} rows exported to {output_fp} in {elapsed:.2f}s.')
+
+
+def _decode_categories(table: pd.DataFrame) -> pd.DataFrame:
+    """Replaces categorical columns by their values."""
+    return table.astype({column: table[column].cat.categories.dtype for column in table.columns
+                         if isinstance(table[column].dtype, pd.CategoricalDtype)})
+
+
+def _to_arrow(table: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+    """Converts a table into the schema of the Arrow file, filling missing columns with nulls."""
+    arrow_table = pa.Table.from_pandas(_decode_categories(table), preserve_index=True)
+    columns = [arrow_table.column(field.name).cast(field.type) if field.name in arrow_table.column_names
+               else pa.nulls(len(arrow_table), field.type)
+               for field in schema]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Exports a HDF5 index file into an Arrow IPC file.')
+    parser.add_argument('--dataset_fp', type=Path, required=True, help='HDF5 index file.')
+    parser.add_argument('--output_fp', type=Path, required=True, help='Output Arrow IPC file.')
+    parser.add_argument('--chunk_rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+    export_arrow(args.dataset_fp, args.output_fp, args.chunk_rows)
@@ -0,0 +1,148 @@
+"""Streamed background mask engine shared by the slide converters.
+
+Tissue is separated from the background by Otsu's thresholding of the HSV saturation
+followed by morphological closing and opening. Instead of converting the whole level
+into a float HSV image, the level is read in horizontal stripes and every pixel is
+reduced to the pair of its maximal and minimal RGB channel values, which fully
+determines its saturation. The histogram for Otsu's threshold is accumulated over
+these pairs and the morphology is applied stripe by stripe with overlapping halos,
+so the resulting mask is identical to processing the whole level at once.
+"""
+# Standard Imports
+from typing import Iterator
+from typing import Tuple
+
+# Third-party Imports
+import cv2
+import numpy as np
+from nptyping import NDArray
+from PIL import Image
+from skimage import color
+from skimage import filters
+from skimage import morphology
+from openslide import OpenSlide
+
+# Local Imports
+from rationai.data.tiler.profiling import profiler
+
+
+N_CHANNEL_PAIRS = 256 * 256
+
+
+def saturation_lut() -> NDArray:
+    """Computes HSV saturation for every pair of maximal and minimal channel values.
+
+    The saturation is computed by `skimage.color.rgb2hsv`, so that the values are
+    identical to those of a converted image.
+
+    Returns:
+        NDArray: Saturation of shape (65536,) indexed by `channel_pair_index`.
+    """
+    channel_max, channel_min = np.meshgrid(np.arange(256, dtype=np.uint8),
+                                           np.arange(256, dtype=np.uint8), indexing='ij')
+    rgb_np = np.stack([channel_max, channel_min, channel_min], axis=-1)
+    return color.rgb2hsv(rgb_np)[..., 1].ravel()
+
+
+def channel_pair_index(rgb_np: NDArray) -> NDArray:
+    """Encodes maximal and minimal channel values of every pixel into a single index.
+
+    Args:
+        rgb_np (NDArray): uint8 image of shape (height, width, 3).
+
+    Returns:
+        NDArray: uint16 index of shape (height, width).
+    """
+    return (rgb_np.max(axis=-1).astype(np.uint16) << 8) | rgb_np.min(axis=-1)
+
+
+def otsu_threshold(sat_lut: NDArray, counts: NDArray) -> float:
+    """Computes Otsu's threshold of saturation from channel pair counts.
+
+    The histogram is binned over the same range and with the same number of bins
+    as `skimage.filters.threshold_otsu` uses for the saturation image.
+
+    Args:
+        sat_lut (NDArray): Saturation of the channel pairs.
+        counts (NDArray): Number of pixels of the channel pairs.
+
+    Returns:
+        float: Threshold value.
+    """
+    present = counts > 0
+    values, weights = sat_lut[present], counts[present]
+    if np.all(values == values[0]):
+        return values[0]
+
+    hist, bin_edges = np.histogram(values, bins=256, range=(values.min(), values.max()),
+                                   weights=weights)
+    bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2.
+    return filters.threshold_otsu(hist=(hist.astype(np.int64), bin_centers))
+
+
+def stripe_bounds(height: int, stripe_height: int,
+                  halo: int = 0) -> Iterator[Tuple[int, int, int, int]]:
+    """Yields bounds of horizontal stripes covering an image.
+
+    Args:
+        height (int): Height of the image.
+        stripe_height (int): Height of a stripe.
+        halo (int): Number of rows by which a stripe is extended on both sides.
+
+    Yields:
+        Tuple[int, int, int, int]: Stripe bounds followed by the bounds extended by halo.
+    """
+    for y0 in range(0, height, stripe_height):
+        y1 = min(y0 + stripe_height, height)
+        yield y0, y1, max(y0 - halo, 0), min(y1 + halo, height)
+
+
+def create_background_mask(oslide_wsi: OpenSlide, level: int, disk_size: int,
+                           stripe_height: int) -> Image.Image:
+    """Draws binary background mask of a slide level.
+
+    Only a single stripe of the level is held as an RGBA image at a time. The level
+    itself is kept as uint16 channel pair indices.
+
+    Args:
+        oslide_wsi (OpenSlide): Handler to WSI.
+        level (int): Level of the slide to process.
+        disk_size (int): Radius of the disk used by the morphological operations.
+        stripe_height (int): Number of rows of the level processed at once.
+
+    Returns:
+        Image.Image: Binary background mask.
+    """
+    width, height = oslide_wsi.level_dimensions[level]
+    downsample = oslide_wsi.level_downsamples[level]
+    if downsample != int(downsample):
+        # Stripes would not be aligned with the level pixels
+        stripe_height = height
+
+    pair_index_np = np.empty((height, width), dtype=np.uint16)
+    counts = np.zeros(N_CHANNEL_PAIRS, dtype=np.int64)
+    for y0, y1, _, _ in stripe_bounds(height, stripe_height):
+        with profiler.stage('read_region'):
+            stripe_img = oslide_wsi.read_region(location=(0, int(y0 * downsample)),
+                                                level=level,
+                                                size=(width, y1 - y0))
+        with profiler.stage('saturation'):
+            pair_index_np[y0:y1] = channel_pair_index(np.asarray(stripe_img)[..., :3])
+            counts += np.bincount(pair_index_np[y0:y1].ravel(), minlength=N_CHANNEL_PAIRS)
+
+    with profiler.stage('threshold'):
+        sat_lut = saturation_lut()
+        high_saturation_lut = (sat_lut > otsu_threshold(sat_lut, counts)).astype(np.uint8)
+
+    # Closing and opening consist of four operations, each spreading by disk_size rows
+    disk_object = morphology.disk(disk_size).astype(np.uint8)
+    mask_np = np.empty((height, width), dtype=bool)
+    with profiler.stage('morphology'):
+        for y0, y1, halo_y0, halo_y1 in stripe_bounds(height, stripe_height, halo=4 * disk_size):
+            high_saturation = high_saturation_lut[pair_index_np[halo_y0:halo_y1]]
+            mask = cv2.morphologyEx(high_saturation, cv2.MORPH_CLOSE, disk_object,
+                                    borderType=cv2.BORDER_REFLECT)
+            mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, disk_object,
+                                    borderType=cv2.BORDER_REFLECT)
+            mask_np[y0:y1] = mask[y0 - halo_y0:y1 - halo_y0]
+    return Image.fromarray(mask_np)
@@ -0,0 +1,183 @@
+"""Dense coverage grids of converted slides.
+
+With `coverage_grids` set, the slide converter stores for every slide the tissue
+and center-annotation pixel counts of all tiles of the tiling grid, not only of the
+accepted ROI tiles. Coordinate maps for different `min_tissue`, `max_tissue` or
+`center_size` are then derived from the grids without opening the slides.
+
+The counts are exact integers in the smallest sufficient dtype and stored in a
+compressed `.npz` file, so that derived coordinate maps are identical to the maps
+of a full conversion with the same parameters.
+
+Example:
+    python3 -m rationai.data.tiler.coverage --dataset_fp data.h5 --output_fp data_t60.h5 \\
+        --min_tissue 0.6 --max_tissue 1.0
+"""
+# Standard Imports
+from dataclasses import dataclass
+from dataclasses import fields
+from pathlib import Path
+from time import perf_counter
+from typing import Optional
+import argparse
+import logging
+import os
+
+# Third-party Imports
+import numpy as np
+import pandas as pd
+from nptyping import NDArray
+
+# Local Imports
+from rationai.data.tiler.writers import write_table
+from rationai.utils.schema import compact_table
+
+
+log = logging.getLogger('slide-converter')
+
+
+@dataclass
+class CoverageGrids:
+    """Tissue and center-annotation pixel counts of the tiling grid of a slide.
+
+    Attributes:
+        coord_x (NDArray): Level 0 x-coordinates of the grid columns.
+        coord_y (NDArray): Level 0 y-coordinates of the grid rows.
+        tissue_count (NDArray): (rows, cols) tissue pixels of tiles in the background mask.
+        tissue_width (NDArray): Width of the tiles of each column in the background mask.
+        tissue_height (NDArray): Height of the tiles of each row in the background mask.
+        center_sizes (NDArray): Center sizes of the annotation counts.
+        annot_count (NDArray): (center_sizes, rows, cols) annotated pixels in the center
+                               area of tiles.
+        is_labelled (NDArray): (rows, cols) tiles with computed annotation counts, i.e.
+                               tiles containing tissue and ROI tiles of the conversion.
+    """
+    coord_x: NDArray
+    coord_y: NDArray
+    tissue_count: NDArray
+    tissue_width: NDArray
+    tissue_height: NDArray
+    center_sizes: NDArray
+    annot_count: NDArray
+    is_labelled: NDArray
+
+
+def save_coverage_grids(grids: CoverageGrids, coverage_fp: Path) -> None:
+    """Stores coverage grids, replacing an existing file only once complete.
+
+    Args:
+        grids (CoverageGrids): Coverage grids of a slide.
+        coverage_fp (Path): Output path.
+    """
+    coverage_fp.parent.mkdir(parents=True, exist_ok=True)
+    tmp_fp = coverage_fp.with_name(f'.{coverage_fp.stem}.{os.getpid()}.npz')
+    np.savez_compressed(tmp_fp, **{field.name: getattr(grids, field.name) for field in fields(grids)})
+    os.replace(tmp_fp, coverage_fp)
+
+
+def load_coverage_grids(coverage_fp: Path) -> CoverageGrids:
+    """Loads coverage grids of a slide.
+
+    Args:
+        coverage_fp (Path): Path to coverage grids.
+
+    Returns:
+        CoverageGrids: Coverage grids of a slide.
+    """
+    with np.load(coverage_fp) as grids:
+        return CoverageGrids(**grids)
+
+
+def coverage_table(grids: CoverageGrids, slide_name: str, min_tissue: float,
+                   max_tissue: float, center_size: int) -> pd.DataFrame:
+    """Derives coordinate map of ROI tiles for the given filtering parameters.
+
+    Args:
+        grids (CoverageGrids): Coverage grids of a slide.
+        slide_name (str): Slide identifier.
+        min_tissue (float): Minimum tissue coverage of ROI tiles.
+        max_tissue (float): Maximum tissue coverage of ROI tiles.
+        center_size (int): Size of the labelled center area. Must be
+                           one of the stored center sizes.
+
+    Returns:
+        pd.DataFrame: Coordinate map of ROI tiles.
+
+    Raises:
+        ValueError: If the center size is not stored or the filter accepts tiles
+                    whose annotation counts were not computed.
+    """
+    center_idx = np.flatnonzero(grids.center_sizes == center_size)
+    if not len(center_idx):
+        raise ValueError(f'[{slide_name}] Center size {center_size} not stored; '
+                         f'available: {grids.center_sizes.tolist()}')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tissue_coverage = grids.tissue_count / np.outer(grids.tissue_height, grids.tissue_width)
+    is_roi = (min_tissue <= tissue_coverage) & (tissue_coverage <= max_tissue)
+    if (is_roi & ~grids.is_labelled).any():
+        raise ValueError(f'[{slide_name}] Tiles without tissue are not labelled; '
+                         f'min_tissue {min_tissue} must be positive.')
+
+    roi_row, roi_col = np.nonzero(is_roi)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annot_coverage = grids.annot_count[center_idx[0]][is_roi] / (center_size * center_size)
+    return pd.DataFrame.from_dict({
+        'coord_x': grids.coord_x[roi_col],
+        'coord_y': grids.coord_y[roi_row],
+        'annot_coverage': annot_coverage,
+        'is_cancer': annot_coverage > 0,
+        'slide_name': [slide_name] * len(roi_col)
+    })
+
+
+def rethreshold_dataset(dataset_fp: Path, output_fp: Path, min_tissue: float, max_tissue: float,
+                        center_size: Optional[int] = None, compact_schema: bool = False) -> None:
+    """Derives a dataset for new filtering parameters from coverage grids of a converted dataset.
+
+    Tile stores are not carried over, as they hold only the tiles of the original dataset,
+    and neither are the coverage columns of `label_schemes`, which are not part of the grids.
+
+    Args:
+        dataset_fp (Path): Dataset converted with `coverage_grids` set.
+        output_fp (Path): Output dataset.
+        min_tissue (float): Minimum tissue coverage of ROI tiles.
+        max_tissue (float): Maximum tissue coverage of ROI tiles.
+        center_size (Optional[int]): Size of the labelled center area. If None,
+                                     the center size of the original dataset is kept.
+        compact_schema (bool): If set, coordinate maps are stored with compact dtypes.
+    """
+    start = perf_counter()
+    with pd.HDFStore(dataset_fp, 'r') as dataset_h5, pd.HDFStore(output_fp, 'w') as output_h5:
+        table_keys = dataset_h5.keys()
+        for table_key in table_keys:
+            metadata = dict(dataset_h5.get_storer(table_key).attrs.metadata)
+            if 'coverage_fp' not in metadata:
+                raise ValueError(f'[{table_key}] Converted without coverage grids.')
+            metadata['center_size'] = metadata['center_size'] if center_size is None else center_size
+            metadata.pop('tile_store_fp', None)
+            metadata.pop('fingerprint', None)
+            metadata.pop('label_schemes', None)
+
+            grids = load_coverage_grids(Path(metadata['coverage_fp']))
+            coord_map_df = coverage_table(grids, Path(metadata['slide_fp']).stem,
+                                          min_tissue, max_tissue, metadata['center_size'])
+            if compact_schema:
+                coord_map_df = compact_table(coord_map_df)
+            write_table(output_h5, table_key.lstrip('/'), coord_map_df, metadata)
+    elapsed = perf_counter() - start
+    log.info(f'{len(table_keys)} slides re-thresholded in {elapsed:.2f}s.')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Derives a dataset for new filtering parameters.')
+    parser.add_argument('--dataset_fp', type=Path, required=True, help='Dataset converted with coverage grids.')
+    parser.add_argument('--output_fp', type=Path, required=True, help='Output dataset.')
+    parser.add_argument('--min_tissue', type=float, required=True)
+    parser.add_argument('--max_tissue', type=float, required=True)
+    parser.add_argument('--center_size', type=int, default=None)
+    parser.add_argument('--compact_schema', action='store_true')
+    args = parser.parse_args()
+    rethreshold_dataset(args.dataset_fp, args.output_fp, args.min_tissue, args.max_tissue,
+                        args.center_size, args.compact_schema)
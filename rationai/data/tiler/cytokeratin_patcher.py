@@ -1,18 +1,19 @@
 # Standard Imports
 from __future__ import annotations
 from dataclasses import dataclass
-from multiprocessing import Pool
 from typing import Optional
 from typing import Tuple
 from typing import List
-from typing import Iterator
 from typing import Any
 from pathlib import Path
 from datetime import datetime
 import argparse
+import tempfile
 import logging
+import shutil
 import json
 import copy
+import os
 
 # Third-party Imports
 import numpy as np
@@ -23,15 +24,34 @@ import pandas as pd
 from pandas.core.frame import DataFrame
 from PIL import Image
 from PIL import ImageDraw
-from skimage import color
-from skimage import filters
-from skimage import morphology
 from openslide import OpenSlide
 
 # Local Imports
 from rationai.utils.utils import read_polygons
 from rationai.utils.utils import open_pil_image
 from rationai.utils.config import ConfigProto
+from rationai.utils.schema import compact_table
+from rationai.utils.slide_catalog import open_slide
+from rationai.data.tiler.background import create_background_mask
+from rationai.data.tiler.background import stripe_bounds
+from rationai.data.tiler.estimator import SAMPLE_TABLE_ROWS
+from rationai.data.tiler.estimator import SlideEstimate
+from rationai.data.tiler.estimator import dry_run
+from rationai.data.tiler.estimator import table_row_bytes
+from rationai.data.tiler.estimator import tiling_peak_memory
+from rationai.data.tiler.profiling import RunSummary
+from rationai.data.tiler.profiling import profiler
+from rationai.data.tiler.scheduler import ConversionJob
+from rationai.data.tiler.scheduler import order_jobs
+from rationai.data.tiler.scheduler import run_jobs
+from rationai.data.tiler.tiling import grid_coordinates
+from rationai.data.tiler.tiling import integral_image
+from rationai.data.tiler.tiling import value_integral_image
+from rationai.data.tiler.tiling import window_sums
+from rationai.data.tiler.arrow_export import export_arrow
+from rationai.data.tiler.writers import merge_shards
+from rationai.data.tiler.writers import write_shard
+from rationai.data.tiler.writers import write_table
 
 # Allows to load large images
 Image.MAX_IMAGE_PIXELS = None
@@ -45,9 +65,11 @@ logging.basicConfig(level=logging.INFO,
                    datefmt='%d.%m.%Y %H:%M:%S')
 
 @dataclass
-class ROITile:
-    coord_x: int
-    coord_y: int
+class ROITiles:
+    """ROI tiles of a slide stored column-wise."""
+    coord_x: NDArray
+    coord_y: NDArray
+    epithelium_coverage: NDArray
 
 class SlideConverter:
     """Worker Object for tile extraction from WSI.
@@ -68,27 +90,101 @@ class SlideConverter:
 
         Returns:
             Tuple[str, pd.DataFrame, dict]: Returns a tuple of table key,
-                coordinate map dataframe and metadat dictionary.
+                coordinate map dataframe and metadat dictionary. If shard mode
+                is set, the coordinate map is written into a shard file by the
+                worker and path to the shard file is returned instead.
         """
         self.slide_name = slide_fp.stem
 
         annot_fp = self._get_annotations()
-        oslide_wsi = self._open_slide(slide_fp)
+        oslide_wsi = self._open_slide(slide_fp, self.config.bg_level)
 
         is_wsi_levels_valid = self._validate_wsi_levels(oslide_wsi)
 
         if not is_wsi_levels_valid:
             return str(), pd.DataFrame(), dict()
 
-        bg_mask_img = self._get_bg_mask(oslide_wsi)
+        with profiler.stage('bg_mask'):
+            bg_mask_img = self._get_bg_mask(oslide_wsi)
 
-        coord_map_df = self._tile_wsi_to_coord_map(oslide_wsi, bg_mask_img)
+        with profiler.stage('tiling'):
+            coord_map_df = self._tile_wsi_to_coord_map(oslide_wsi, bg_mask_img, annot_fp)
+        profiler.add_tiles(len(coord_map_df))
         table_key = self._get_table_key()
         metadata = self._get_table_metadata(slide_fp, annot_fp)
 
         oslide_wsi.close()
+        if self.config.shard_mode and not coord_map_df.empty:
+            shard_fp = self.config.shard_dir / f'{os.getpid()}.h5'
+            with profiler.stage('write'):
+                write_shard(shard_fp, table_key, coord_map_df, metadata)
+            return table_key, shard_fp, metadata
         return table_key, coord_map_df, metadata
 
+    def estimate(self, slide_fp: Path) -> SlideEstimate:
+        """Estimates the conversion of a slide without writing any output.
+
+        Only slide properties and the `bg_level` of the slide are read. The background
+        mask is computed in memory, so that the number of tiles is exact.
+
+        Args:
+            slide_fp (Path): Path to WSI file.
+
+        Returns:
+            SlideEstimate: Tiles of the slide, sample-level pixels, predicted peak memory
+                           and a sample coordinate map of the slide.
+        """
+        self.slide_name = slide_fp.stem
+
+        annot_fp = self._get_annotations()
+        oslide_wsi = self._open_slide(slide_fp, self.config.bg_level)
+
+        if not self._validate_wsi_levels(oslide_wsi):
+            oslide_wsi.close()
+            return SlideEstimate(slide_fp, tables={}, sample_pixels=0, peak_memory=0)
+
+        sample_table = self._roi_tiles_to_coord_map(ROITiles(
+            coord_x=np.arange(SAMPLE_TABLE_ROWS) * self.config.step_size,
+            coord_y=np.arange(SAMPLE_TABLE_ROWS) * self.config.step_size,
+            epithelium_coverage=np.linspace(0, 1, SAMPLE_TABLE_ROWS)
+        ))
+        bg_mask_img = self._create_init_bg_mask(oslide_wsi)
+
+        bg_scale_factor = int(oslide_wsi.level_downsamples[self.config.bg_level])
+        sampling_scale_factor = int(oslide_wsi.level_downsamples[self.config.sample_level])
+        wsi_width, wsi_height = oslide_wsi.level_dimensions[self.config.sample_level]
+        grid_x, grid_y = grid_coordinates(wsi_width, wsi_height, self.config.step_size)
+        oslide_wsi.close()
+
+        is_roi = self._is_bg_contain_tissue(bg_mask_img, grid_x, grid_y,
+                                            bg_scale_factor // sampling_scale_factor)
+        n_tiles = int(np.count_nonzero(is_roi))
+
+        ce_size = (0, 0)
+        if annot_fp is not None:
+            with self._open_slide(annot_fp, self._get_ce_level()) as ce_wsi:
+                ce_size = ce_wsi.level_dimensions[min(self._get_ce_level(), ce_wsi.level_count - 1)]
+
+        # No annotation canvas is drawn; the cytokeratin mask level and its summed-area
+        # table are held at once like an annotation band
+        peak_memory = tiling_peak_memory(
+            bg_size=bg_mask_img.size,
+            stripe_height=self.config.bg_stripe_height,
+            disk_size=self.config.disk_size,
+            grid_size=len(grid_x) * len(grid_y),
+            canvas_size=(0, 0),
+            band_size=ce_size,
+            table_bytes=int(n_tiles * table_row_bytes(sample_table))
+        )
+        return SlideEstimate(
+            slide_fp,
+            tables={self._get_table_key(): n_tiles},
+            sample_pixels=wsi_width * wsi_height,
+            peak_memory=peak_memory,
+            sample_table=sample_table,
+            metadata=self._get_table_metadata(slide_fp, annot_fp)
+        )
+
     def _get_annotations(self) -> Optional[Path]:
         """Builds a path to annotation file using slide name and supplied annotation dir path.
 
@@ -103,17 +199,21 @@ class SlideConverter:
         log.warning(f'[{self.slide_name}] Annotation DAB not found.')
         return None
 
-    def _open_slide(self, slide_fp: Path) -> OpenSlide:
+    def _open_slide(self, slide_fp: Path, thumbnail_level: int) -> OpenSlide:
         """Opens WSI slide and returns handler.
 
+        If `slide_catalog_dir` is set, the slide metadata and the thumbnail level are read
+        from the slide catalog and the slide itself is opened only to read other levels.
+
         Args:
             slide_fp (Path): Path to WSI slide.
+            thumbnail_level (int): Level of the slide read as a whole.
 
         Returns:
             OpenSlide: Handler to opened WSI slide.
         """
         logging.info(f'[{self.slide_name}] Opening slide: {str(slide_fp.resolve())}')
-        return OpenSlide(str(slide_fp.resolve()))
+        return open_slide(slide_fp, self.config.slide_catalog_dir, thumbnail_levels=[thumbnail_level])
 
     def _validate_wsi_levels(self, oslide_wsi: OpenSlide) -> bool:
         """Checks if WSI contains enough levels for slide successful slide conversion.
@@ -143,7 +243,7 @@ class SlideConverter:
         Returns:
             Image.Image: Binary background mask filtering background and highlighting tissue.
         """
-        bg_mask_fp = self.config.output_path / f'masks/bg/bg_final/{self.slide_name}.PNG'
+        bg_mask_fp = self.config.output_path / f'masks/{self.config.group}/bg/bg_final/{self.slide_name}.PNG'
         if bg_mask_fp.exists() and not self.config.force:
             bg_mask_img = open_pil_image(bg_mask_fp)
             if bg_mask_img is not None:
@@ -184,7 +284,7 @@ class SlideConverter:
         Returns:
             Image.Image: Binary background mask.
         """
-        init_bg_mask_fp = self.config.output_path / f'masks/bg/bg_init/{self.slide_name}.PNG'
+        init_bg_mask_fp = self.config.output_path / f'masks/{self.config.group}/bg/bg_init/{self.slide_name}.PNG'
         if init_bg_mask_fp.exists() and not self.config.force:
             init_bg_mask_img = open_pil_image(init_bg_mask_fp)
             if init_bg_mask_img is not None:
@@ -204,18 +304,10 @@ class SlideConverter:
             Image.Image: Binary background mask.
         """
         log.info(f'[{self.slide_name}] Generating new initial background mask.')
-        wsi_img = oslide_wsi.read_region(
-            location=(0, 0),
-            level=self.config.bg_level,
-            size=oslide_wsi.level_dimensions[self.config.bg_level]).convert('RGB')
-        slide_hsv = color.rgb2hsv(np.array(wsi_img))
-        saturation = slide_hsv[:, :, 1]
-        threshold = filters.threshold_otsu(saturation)
-        high_saturation = (saturation > threshold)
-        disk_object = morphology.disk(self.config.disk_size)
-        mask = morphology.closing(high_saturation, disk_object)
-        mask = morphology.opening(mask, disk_object)
-        return Image.fromarray(mask)
+        return create_background_mask(oslide_wsi,
+                                      level=self.config.bg_level,
+                                      disk_size=self.config.disk_size,
+                                      stripe_height=self.config.bg_stripe_height)
 
     def _prepare_empty_canvas(self, size: Tuple[int, int],
                                bg_color: str) -> Tuple[Image.Image, ImageDraw.ImageDraw]:
@@ -276,46 +368,69 @@ class SlideConverter:
             img (Image): Binary mask.
             output_fp (Path): Output filepath.
         """
-        img.save(str(output_fp), format='PNG')
-
-    def _tile_wsi_to_coord_map(self, oslide_wsi: OpenSlide, bg_mask_img: Image) -> DataFrame:
+        output_fp.parent.mkdir(parents=True, exist_ok=True)
+        # Mask of a slide converted by several groups at once is replaced atomically
+        tmp_fp = output_fp.with_name(f'.{output_fp.stem}.{os.getpid()}.tmp')
+        with profiler.stage('save_mask'):
+            img.save(str(tmp_fp), format='PNG')
+        os.replace(tmp_fp, output_fp)
+
+    def _tile_wsi_to_coord_map(self, oslide_wsi: OpenSlide, bg_mask_img: Image,
+                                annot_fp: Optional[Path]) -> DataFrame:
         """Builds a coordinate map dataframe using extracted ROI tiles.
 
         Args:
             oslide_wsi (OpenSlide): Handler to WSI.
             bg_mask_img (Image): Binary background mask.
+            annot_fp (Optional[Path]): Path to registered cytokeratin mask.
 
         Returns:
             DataFrame: Coordinate map of ROI tiles.
         """
-        coord_map = {
-            'coord_x': [],          # (int)  x-coordinate of a top-left pixel of the tile
-            'coord_y': [],          # (int)  y-coordinate of a top-left pixel of the tile
-            'slide_name': []        # (str)  slide identifier (filename)
-        }
         log.info(f'[{self.slide_name}] Initiating slide conversion.')
-        for roi_tile in self._roi_cutter(oslide_wsi, bg_mask_img):
-            coord_map['coord_x'].append(roi_tile.coord_x)
-            coord_map['coord_y'].append(roi_tile.coord_y)
-            coord_map['slide_name'].append(self.slide_name)
+        roi_tiles = self._roi_cutter(oslide_wsi, bg_mask_img, annot_fp)
+        coord_map_df = self._roi_tiles_to_coord_map(roi_tiles)
         log.info(f'[{self.slide_name}] Slide conversion complete.')
+        return coord_map_df
 
-        return pd.DataFrame.from_dict(coord_map)
+    def _roi_tiles_to_coord_map(self, roi_tiles: ROITiles) -> DataFrame:
+        """Builds a coordinate map dataframe from ROI tiles.
 
-    def _roi_cutter(self, oslide_wsi: OpenSlide, bg_mask_img: Image) -> Iterator[ROITile]:
-        """Filters extracted tiles based on tissue coverage.
+        Args:
+            roi_tiles (ROITiles): ROI tiles of the slide.
+
+        Returns:
+            DataFrame: Coordinate map of ROI tiles.
+        """
+        coord_map = {
+            'coord_x': roi_tiles.coord_x,          # (int)  x-coordinate of a top-left pixel of the tile
+            'coord_y': roi_tiles.coord_y,          # (int)  y-coordinate of a top-left pixel of the tile
+            'epithelium_coverage': roi_tiles.epithelium_coverage,  # (float) ratio of positive mask pixels
+            'slide_name': [self.slide_name] * len(roi_tiles.coord_x)  # (str)  slide identifier (filename)
+        }
+
+        coord_map_df = pd.DataFrame.from_dict(coord_map)
+        if self.config.compact_schema:
+            coord_map_df = compact_table(coord_map_df)
+        return coord_map_df
+
+    def _roi_cutter(self, oslide_wsi: OpenSlide, bg_mask_img: Image,
+                     annot_fp: Optional[Path]) -> ROITiles:
+        """Filters tiles of the tiling grid based on tissue coverage.
+
+        Coverages are computed for the whole grid at once using summed-area tables.
+        Tiles are returned in row-major order of the tiling grid.
 
         Args:
             oslide_wsi (OpenSlide): Handler to WSI.
             bg_mask_img (Image): Binary background mask.
-            annot_mask_img (Image): Binary annotation mask.
-
-        Yields:
-            Iterator[ROITile]: Iterator over extracted ROI tiles meeting all filtering requirements.
-                               ROI Tile contains the following information:
-                                    - coordinates of a tile (top-left pixel)
-                                    - ratio of annotated pixels w.r.t. the whole tile
-                                    - ratio of annotated pixels w.r.t. the center square of the tile
+            annot_fp (Optional[Path]): Path to registered cytokeratin mask.
+
+        Returns:
+            ROITiles: ROI tiles meeting all filtering requirements.
+                      ROI Tiles contain the following information:
+                        - coordinates of a tile (top-left pixel)
+                        - ratio of positive pixels of the cytokeratin mask within the tile
         """
         # Scale Factors
         bg_scale_factor = int(oslide_wsi.level_downsamples[self.config.bg_level])
@@ -324,76 +439,112 @@ class SlideConverter:
 
         # Dimensions
         wsi_width, wsi_height = oslide_wsi.level_dimensions[self.config.sample_level]
+        grid_x, grid_y = grid_coordinates(wsi_width, wsi_height, self.config.step_size)
 
-        for (coord_x, coord_y) in self._tile_cutter(wsi_height, wsi_width):
-            bg_tile_img = self._crop_mask_to_tile(bg_mask_img, coord_x, coord_y, effective_scale_factor)
+        is_roi = self._is_bg_contain_tissue(bg_mask_img, grid_x, grid_y, effective_scale_factor)
+        with profiler.stage('epithelium'):
+            epithelium_coverage = self._calculate_epithelium_coverage(annot_fp, grid_x, grid_y,
+                                                                      sampling_scale_factor)
 
-            if not self._is_bg_contain_tissue(bg_tile_img):
-                continue
+        roi_row, roi_col = np.nonzero(is_roi)
+        return ROITiles(grid_x[roi_col] * sampling_scale_factor,
+                        grid_y[roi_row] * sampling_scale_factor,
+                        epithelium_coverage[is_roi])
 
-            yield ROITile(coord_x * sampling_scale_factor,
-                  coord_y * sampling_scale_factor)
+    def _calculate_epithelium_coverage(self, annot_fp: Optional[Path], grid_x: NDArray,
+                                       grid_y: NDArray, scale_factor: int) -> NDArray:
+        """Calculates ratio of positive pixels of the cytokeratin mask in tiles of the grid.
 
-    def _tile_cutter(self, wsi_height: int, wsi_width: int) -> Iterator[Tuple[int, int]]:
-        """Iterates over tile coordinates of a WSI.
+        The mask is read at `ce_level` of its pyramid. Pyramid levels average the binary
+        full resolution mask, so the sum of the mask values within a tile approximates
+        the number of positive full resolution pixels.
 
         Args:
-            wsi_height (int): WSI height.
-            wsi_width (int): WSI width.
+            annot_fp (Optional[Path]): Path to registered cytokeratin mask.
+            grid_x (NDArray): x-coordinates of the tiling grid.
+            grid_y (NDArray): y-coordinates of the tiling grid.
+            scale_factor (int): Downsample of the sample level of the slide.
 
-        Yields:
-            Iterator[Tuple[int, int]]: Iterator over tile coordinates.
+        Returns:
+            NDArray: Epithelium coverage of the tiles; NaN if the mask does not exist.
         """
-        for coord_y in range(0, wsi_height, self.config.step_size):
-            for coord_x in range(0, wsi_width, self.config.step_size):
-                yield coord_x, coord_y
+        if annot_fp is None:
+            return np.full((len(grid_y), len(grid_x)), np.nan)
+
+        ce_wsi = self._open_slide(annot_fp, self._get_ce_level())
+        ce_level = min(self._get_ce_level(), ce_wsi.level_count - 1)
+        ce_scale_factor = ce_wsi.level_downsamples[ce_level]
+        mask_np = self._read_epithelium_mask(ce_wsi, ce_level)
+        ce_wsi.close()
 
-    def _crop_mask_to_tile(self, mask_img: Optional[Image.Image],
-                            coord_x: int, coord_y: int,
-                            scale_factor: int) -> Optional[Image.Image]:
-        """Crops mask to a tile specified by coordinates scaled to appropriate resolution.
+        # Tile bounds at level 0 of the slide, which shares the geometry of the mask
+        scale_factor = scale_factor / ce_scale_factor
+        x0 = (grid_x * scale_factor).astype(np.int64)
+        x1 = ((grid_x + self.config.tile_size) * scale_factor).astype(np.int64)
+        y0 = (grid_y * scale_factor).astype(np.int64)
+        y1 = ((grid_y + self.config.tile_size) * scale_factor).astype(np.int64)
+
+        mask_sum = window_sums(value_integral_image(mask_np), x0, x1, y0, y1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return mask_sum / (255. * np.outer(y1 - y0, x1 - x0))
+
+    def _read_epithelium_mask(self, ce_wsi: OpenSlide, level: int) -> NDArray:
+        """Reads a level of the cytokeratin mask in horizontal stripes.
 
         Args:
-            mask_img (Optional[Image.Image]): Image to be cropped.
-            coord_x (int): Coordinate along x-axis.
-            coord_y (int): Coordinate along y-axis.
-            scale_factor (int): Used for scaling coordinates.
+            ce_wsi (OpenSlide): Handler to registered cytokeratin mask.
+            level (int): Level of the mask to read.
 
         Returns:
-            Optional[Image.Image]: Cropped tiled or None
+            NDArray: uint8 mask values of the first channel.
         """
-        if mask_img is None:
-            return None
-        return mask_img.crop((int(coord_x // scale_factor),
-                              int(coord_y // scale_factor),
-                              int((coord_x + self.config.tile_size) // scale_factor),
-                              int((coord_y + self.config.tile_size) // scale_factor)))
-
-    def _is_bg_contain_tissue(self, tile_img: Image) -> bool:
-        """Checks if tissue ratio in a tile falls within acceptable range.
+        width, height = ce_wsi.level_dimensions[level]
+        downsample = ce_wsi.level_downsamples[level]
+        mask_np = np.empty((height, width), dtype=np.uint8)
+        for y0, y1, _, _ in stripe_bounds(height, self.config.bg_stripe_height):
+            stripe_img = ce_wsi.read_region(location=(0, int(y0 * downsample)),
+                                            level=level,
+                                            size=(width, y1 - y0))
+            mask_np[y0:y1] = np.asarray(stripe_img)[..., 0]
+        return mask_np
+
+    def _get_ce_level(self) -> int:
+        return self.config.bg_level if self.config.ce_level is None else self.config.ce_level
+
+    def _is_bg_contain_tissue(self, bg_mask_img: Image, grid_x: NDArray, grid_y: NDArray,
+                               scale_factor: int) -> NDArray:
+        """Checks if tissue ratio of the tiles falls within acceptable range.
 
         Args:
-            tile_img (Image): Extracted tile, where non-zero element is considered a tissue.
+            bg_mask_img (Image): Binary background mask, where non-zero element is
+                                 considered a tissue.
+            grid_x (NDArray): x-coordinates of the tiling grid.
+            grid_y (NDArray): y-coordinates of the tiling grid.
+            scale_factor (int): Used for scaling coordinates to the mask resolution.
 
         Returns:
-            bool: True if tissue ratio falls within acceptable range; otherwise False.
+            NDArray: Boolean grid; True if tissue ratio of a tile falls within acceptable range.
         """
-        tile_np = np.array(tile_img)
-        tissue_coverage = self._calculate_tissue_coverage(tile_np, tile_np.size)
-        return self.config.min_tissue <= tissue_coverage <= self.config.max_tissue
+        bg_mask_sat = integral_image(np.asarray(bg_mask_img))
+        x0, x1 = grid_x // scale_factor, (grid_x + self.config.tile_size) // scale_factor
+        y0, y1 = grid_y // scale_factor, (grid_y + self.config.tile_size) // scale_factor
 
-    def _calculate_tissue_coverage(self, tile_np: NDArray, size: int) -> float:
-        """Calculates ratio of non-zero elements in a tile.
+        tissue_count = window_sums(bg_mask_sat, x0, x1, y0, y1)
+        tissue_coverage = self._calculate_tissue_coverage(tissue_count, np.outer(y1 - y0, x1 - x0))
+        return (self.config.min_tissue <= tissue_coverage) & (tissue_coverage <= self.config.max_tissue)
+
+    def _calculate_tissue_coverage(self, tissue_count: NDArray, size: NDArray) -> NDArray:
+        """Calculates ratio of non-zero elements in tiles.
 
         Args:
-            tile_np (NDArray): Extracted tile.
-            size (int): length of a single side of a square area
+            tissue_count (NDArray): Number of non-zero elements in tiles.
+            size (NDArray): Number of all elements in tiles.
 
         Returns:
-            float: Ratio of non-zero elements.
+            NDArray: Ratio of non-zero elements.
         """
-        tissue_count = np.count_nonzero(tile_np)
-        return tissue_count / size
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return tissue_count / size
 
     def _get_table_key(self) -> str:
         return f'{self.config.group}/{self.slide_name}'
@@ -405,6 +556,7 @@ class SlideConverter:
                 - slide_fp       WSI filepath
                 - annot_fp       XML Annotation filepath
                 - sample_level   resolution level at which tiles were sampled
+                - ce_level       level of the CE mask used for epithelium coverage
 
         Args:
             slide_fp (Path): HE WSI filepath
@@ -415,6 +567,7 @@ class SlideConverter:
         metadata['annot_fp'] = str(annot_fp)
         metadata['tile_size'] = self.config.tile_size
         metadata['sample_level'] = self.config.sample_level
+        metadata['ce_level'] = self._get_ce_level()
 
         return metadata
 
@@ -443,6 +596,7 @@ class SlideConverter:
             self.he_dir = None
             self.ce_dir = None
             self.pattern = None
+            self.slide_catalog_dir = None
 
             # Output Path Parameters
             self.output_path = None
@@ -455,6 +609,7 @@ class SlideConverter:
             # Resolution Parameters
             self.sample_level = None
             self.bg_level = None
+            self.ce_level = None
 
             # Filtering Parameters
             self.min_tissue = None
@@ -463,9 +618,17 @@ class SlideConverter:
 
             # Tiling Modes
             self.force = False
+            self.compact_schema = False
+
+            # Tiling Engine Parameters
+            self.bg_stripe_height = 2048
 
             # Paralellization Parameters
             self.max_workers = None
+            self.shard_mode = False
+            self.shard_dir = None
+            self.arrow_output = False
+            self.schedule_by = 'file_size'
 
             # Holding changed values
             self._default_config = {}
@@ -561,21 +724,70 @@ class SlideConverter:
             self.he_dir = Path(self.he_dir)
             self.ce_dir = Path(self.ce_dir)
             self.output_path = Path(self.output_path)
+            if self.slide_catalog_dir:
+                self.slide_catalog_dir = Path(self.slide_catalog_dir)
+            if self.shard_dir:
+                self.shard_dir = Path(self.shard_dir)
 
 def main(args):
-    # Get file handler to the output dataset file
-    dataset_h5 = pd.HDFStore((args.output_dir / args.output_dir.name).with_suffix('.h5'), 'w')
-
-    # Spawn worker for each slide; maximum `max_workers` simultaneous workers.
-    for cfg in SlideConverter.Config(args.config_fp):
-        log.info(f'Spawning {cfg.max_workers} workers.')
-        with Pool(cfg.max_workers) as p:
-            for table_key, table, metadata in p.imap(SlideConverter(copy.deepcopy(cfg)), list(cfg.he_dir.glob(cfg.pattern))):
-                if not table.empty:
-                    dataset_h5.append(table_key, table)
-                    dataset_h5.get_storer(table_key).attrs.metadata = metadata
-
-    dataset_h5.close()
+    dataset_fp = (args.output_dir / args.output_dir.name).with_suffix('.h5')
+    dataset_h5 = None
+    shard_dir = None
+    shard_fps = set()
+    jobs = []
+    max_workers = 0
+    schedule_by = None
+    arrow_output = False
+
+    # Expand slides of all groups into a single list of jobs
+    for group_idx, cfg in enumerate(SlideConverter.Config(args.config_fp)):
+        # Jobs of all groups share a single schedule and output
+        if group_idx == 0:
+            schedule_by = cfg.schedule_by
+            arrow_output = cfg.arrow_output
+            # Get file handler to the output dataset file
+            if not args.dry_run:
+                dataset_h5 = pd.HDFStore(dataset_fp, 'w')
+
+        # Each worker writes into its own shard file; shards are merged at the end
+        if cfg.shard_mode and cfg.shard_dir is None and not args.dry_run:
+            if shard_dir is None:
+                shard_dir = Path(tempfile.mkdtemp(prefix='shards-', dir=dataset_fp.parent))
+            cfg.shard_dir = shard_dir
+
+        converter = SlideConverter(copy.deepcopy(cfg))
+        jobs += [ConversionJob(converter, slide_fp) for slide_fp in cfg.he_dir.glob(cfg.pattern)]
+        max_workers = max(max_workers, cfg.max_workers)
+
+    if args.dry_run:
+        dry_run(order_jobs(jobs, schedule_by), max_workers, args.calibration_slides)
+        return
+
+    # Spawn a single pool of `max_workers` workers for all slides, largest first.
+    summary = RunSummary()
+    for table_key, table, metadata in run_jobs(order_jobs(jobs, schedule_by), max_workers, summary):
+        if isinstance(table, Path):
+            shard_fps.add(table)
+        elif not table.empty:
+            with summary.write_stage(table_key):
+                write_table(dataset_h5, table_key, table, metadata)
+
+    if dataset_h5 is not None:
+        dataset_h5.close()
+
+    if shard_fps:
+        log.info(f'Merging {len(shard_fps)} shards.')
+        with summary.run_stage('merge_shards'):
+            merge_shards(dataset_fp, shard_fps)
+        for shard_fp in shard_fps:
+            shard_fp.unlink()
+    if shard_dir is not None:
+        shutil.rmtree(shard_dir, ignore_errors=True)
+
+    if arrow_output:
+        with summary.run_stage('arrow_output'):
+            export_arrow(dataset_fp, dataset_fp.with_suffix('.arrow'))
+    summary.finish()
 
 if __name__ == '__main__':
 
@@ -594,5 +806,11 @@ if __name__ == '__main__':
     # Required arguments
     parser.add_argument('--config_fp', type=Path, required=True, help='Path to config file.')
     parser.add_argument('--output_dir', type=Path, required=True, help='Path to output directory.')
+
+    # Optional arguments
+    parser.add_argument('--dry-run', dest='dry_run', action='store_true',
+                        help='Estimate tiles, dataset size, memory and runtime without converting.')
+    parser.add_argument('--calibration_slides', type=int, default=2,
+                        help='Number of slides converted in dry run to calibrate the runtime.')
     args = parser.parse_args()
     main(args)
@@ -0,0 +1,292 @@
+"""Dry-run estimation of a slide conversion.
+
+In a dry run the converters read only slide properties and the `bg_level` of the
+slides. The background mask of every slide is computed in memory, so the number
+of tiles of every table is exact. The size of the output dataset is predicted by
+writing sample tables with the schema of each group. The peak memory of a worker
+is modelled from the sizes of the masks and arrays held during the conversion.
+
+The runtime is extrapolated from a full conversion of a few calibration slides,
+each converted in a fresh worker process into a temporary directory. The time per
+sample-level pixel of the calibration slides is applied to all slides, and the
+slides are then scheduled largest-first on the workers of the run. The measured
+peak memory of the calibration workers is reported next to the prediction.
+"""
+# Standard Imports
+from dataclasses import dataclass
+from multiprocessing import Pool
+from pathlib import Path
+from time import perf_counter
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+import copy
+import heapq
+import logging
+import resource
+import tempfile
+
+# Third-party Imports
+import numpy as np
+import pandas as pd
+
+# Local Imports
+from rationai.data.tiler.scheduler import ConversionJob
+from rationai.data.tiler.writers import write_table
+
+
+log = logging.getLogger('slide-converter')
+
+# Bytes held per pixel of a background stripe while generating the background mask
+# (RGBA region, RGB copy, channel pair index, threshold and morphology buffers)
+BG_STRIPE_BYTES_PER_PIXEL = 12
+# Bytes held per pixel of the background mask while tiling (mask, its array copy
+# and the int64 summed-area table)
+BG_MASK_BYTES_PER_PIXEL = 10
+# Bytes held per pixel of an annotation band (crop, non-zero mask and cumulative sums)
+BAND_BYTES_PER_PIXEL = 10
+# Bytes held per position of the tiling grid (counts, sizes, coverage and flags)
+GRID_BYTES_PER_TILE = 40
+
+SAMPLE_TABLE_ROWS = 20000
+
+
+@dataclass
+class SlideEstimate:
+    """Estimated conversion of a slide.
+
+    Attributes:
+        slide_fp (Path): Path to WSI file.
+        tables (Dict[str, int]): Number of tiles of each table of the slide.
+        sample_pixels (int): Number of pixels of the slide at the sample level(s).
+        peak_memory (int): Predicted peak memory of the conversion in bytes.
+        sample_table (Optional[pd.DataFrame]): Coordinate map with the schema of the tables.
+        metadata (Optional[dict]): Metadata of the tables.
+    """
+    slide_fp: Path
+    tables: Dict[str, int]
+    sample_pixels: int
+    peak_memory: int
+    sample_table: Optional[pd.DataFrame] = None
+    metadata: Optional[dict] = None
+
+
+def tiling_peak_memory(bg_size: Tuple[int, int], stripe_height: int, disk_size: int,
+                       grid_size: int, canvas_size: Tuple[int, int],
+                       band_size: Tuple[int, int], table_bytes: int) -> int:
+    """Models the peak memory of a slide conversion.
+
+    The background mask is generated before the annotation mask is drawn, so the
+    peak is the larger of the background and the tiling phase.
+
+    Args:
+        bg_size (Tuple[int, int]): Size of the background mask.
+        stripe_height (int): Height of the background stripes.
+        disk_size (int): Size of the morphological structuring element.
+        grid_size (int): Number of positions of the tiling grid.
+        canvas_size (Tuple[int, int]): Size of the annotation canvas; (0, 0) if none.
+        band_size (Tuple[int, int]): Size of the annotation band read at once.
+        table_bytes (int): Memory of the coordinate map.
+
+    Returns:
+        int: Predicted peak memory in bytes.
+    """
+    bg_pixels = bg_size[0] * bg_size[1]
+    stripe_pixels = bg_size[0] * min(bg_size[1], stripe_height + 8 * disk_size)
+    bg_phase = bg_pixels + stripe_pixels * BG_STRIPE_BYTES_PER_PIXEL
+    tiling_phase = (bg_pixels * BG_MASK_BYTES_PER_PIXEL
+                    + canvas_size[0] * canvas_size[1]
+                    + band_size[0] * band_size[1] * BAND_BYTES_PER_PIXEL
+                    + grid_size * GRID_BYTES_PER_TILE
+                    + table_bytes)
+    return max(bg_phase, tiling_phase)
+
+
+def table_row_bytes(sample_table: pd.DataFrame) -> float:
+    """Memory of a row of a coordinate map.
+
+    Args:
+        sample_table (pd.DataFrame): Coordinate map.
+
+    Returns:
+        float: Memory per row in bytes.
+    """
+    if sample_table.empty:
+        return 0.
+    return sample_table.memory_usage(deep=True, index=True).sum() / len(sample_table)
+
+
+def hdf5_table_size(sample_table: pd.DataFrame, metadata: dict) -> Tuple[float, float, int, float]:
+    """Measures the size of tables written by `write_table`.
+
+    Rows of a table are stored in chunks of fixed size, which are allocated as a whole.
+
+    Args:
+        sample_table (pd.DataFrame): Coordinate map with the schema of the tables.
+        metadata (dict): Metadata of the tables.
+
+    Returns:
+        Tuple[float, float, int, float]: Size of an empty dataset file, size of a table
+            with a single chunk, number of rows of a chunk and size of a chunk in bytes.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        def dataset_size(n_tables: int, n_rows: int) -> Tuple[int, int]:
+            dataset_fp = Path(tmp_dir) / f'{n_tables}_{n_rows}.h5'
+            with pd.HDFStore(dataset_fp, 'w') as dataset_h5:
+                for table_idx in range(n_tables):
+                    write_table(dataset_h5, f'group/table_{table_idx}', sample_table.iloc[:n_rows], metadata)
+                chunk_rows = dataset_h5.get_storer('group/table_0').table.chunkshape[0]
+            return dataset_fp.stat().st_size, chunk_rows
+
+        single_size, chunk_rows = dataset_size(1, 1)
+        double_size, _ = dataset_size(2, 1)
+        two_chunks_size, _ = dataset_size(1, min(chunk_rows + 1, len(sample_table)))
+    table_size = double_size - single_size
+    return single_size - table_size, table_size, chunk_rows, two_chunks_size - single_size
+
+
+def predict_dataset_size(estimates: List[SlideEstimate]) -> int:
+    """Predicts the size of the output dataset.
+
+    Tables are measured once for every distinct schema.
+
+    Args:
+        estimates (List[SlideEstimate]): Slide estimates.
+
+    Returns:
+        int: Predicted size in bytes.
+    """
+    table_sizes = {}
+    file_size, dataset_size = 0., 0.
+    for estimate in estimates:
+        if estimate.sample_table is None:
+            continue
+        # String columns are stored with the width of their longest value
+        schema = tuple((column, str(dtype), None if pd.api.types.is_numeric_dtype(dtype)
+                        else estimate.sample_table[column].astype(str).str.len().max())
+                       for column, dtype in estimate.sample_table.dtypes.items())
+        if schema not in table_sizes:
+            table_sizes[schema] = hdf5_table_size(estimate.sample_table, estimate.metadata)
+        file_size, table_size, chunk_rows, chunk_size = table_sizes[schema]
+        # Empty tables are not written
+        dataset_size += sum(table_size + (-(-n_tiles // chunk_rows) - 1) * chunk_size
+                            for n_tiles in estimate.tables.values() if n_tiles)
+    return int(file_size + dataset_size)
+
+
+def calibration_run(job: ConversionJob) -> Tuple[float, int]:
+    """Converts a slide into a temporary directory.
+
+    Runs in a fresh worker process, so that the peak memory is that of the conversion.
+
+    Args:
+        job (ConversionJob): Conversion job.
+
+    Returns:
+        Tuple[float, int]: Wall time and peak memory of the worker in bytes.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config = copy.deepcopy(job.converter.config)
+        # Converters name their output directory differently
+        for option in ['output_dir', 'output_path']:
+            if hasattr(config, option):
+                setattr(config, option, Path(tmp_dir))
+        config.force = True
+        config.shard_mode = False
+        if hasattr(config, 'incremental_mode'):
+            config.incremental_mode = False
+        converter = type(job.converter)(config)
+
+        start = perf_counter()
+        converter(job.slide_fp)
+        elapsed = perf_counter() - start
+    return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def worker_baseline_memory(_=None) -> int:
+    """Peak memory of an idle worker process in bytes."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def schedule_runtime(runtimes: List[float], n_workers: int) -> float:
+    """Simulates the largest-first schedule of slides on a pool of workers.
+
+    Args:
+        runtimes (List[float]): Runtimes of the slides.
+        n_workers (int): Number of workers.
+
+    Returns:
+        float: Wall time of the schedule.
+    """
+    workers = [0.] * max(n_workers, 1)
+    for runtime in sorted(runtimes, reverse=True):
+        heapq.heappush(workers, heapq.heappop(workers) + runtime)
+    return max(workers)
+
+
+def dry_run(jobs: List[ConversionJob], n_workers: int, calibration_slides: int) -> None:
+    """Estimates a conversion without writing any output and prints a report.
+
+    Args:
+        jobs (List[ConversionJob]): Conversion jobs.
+        n_workers (int): Number of slides converted at once.
+        calibration_slides (int): Number of slides converted to calibrate the runtime.
+    """
+    estimates = []
+    for job in jobs:
+        log.info(f'[{job.slide_fp.stem}] Estimating conversion.')
+        estimates.append(job.converter.estimate(job.slide_fp))
+
+    with Pool(1, maxtasksperchild=1) as p:
+        baseline_memory = p.apply(worker_baseline_memory)
+
+    # Calibration slides are spread over the range of slide sizes
+    calibration = {}
+    order = np.argsort([estimate.sample_pixels for estimate in estimates], kind='stable')
+    n_calibration = min(calibration_slides, len(jobs))
+    for idx in order[np.linspace(0, len(order) - 1, n_calibration + 2)[1:-1].round().astype(int)]:
+        log.info(f'[{jobs[idx].slide_fp.stem}] Converting calibration slide.')
+        with Pool(1, maxtasksperchild=1) as p:
+            calibration[idx] = p.apply(calibration_run, (jobs[idx],))
+
+    calibration_pixels = sum(estimates[idx].sample_pixels for idx in calibration)
+    seconds_per_pixel = None
+    if calibration_pixels:
+        seconds_per_pixel = sum(elapsed for elapsed, _ in calibration.values()) / calibration_pixels
+
+    lines = [f'{"Slide":48s} {"Tables":>6s} {"Tiles":>10s} {"Peak memory":>12s} {"Runtime":>10s}']
+    group_tiles = {}
+    for job, estimate in zip(jobs, estimates):
+        runtime = '-' if seconds_per_pixel is None else f'{seconds_per_pixel * estimate.sample_pixels:.1f}s'
+        slide_key = f'{job.converter.config.group}/{estimate.slide_fp.stem}'
+        lines.append(f'{slide_key:48s} {len(estimate.tables):6d} '
+                     f'{sum(estimate.tables.values()):10d} '
+                     f'{(estimate.peak_memory + baseline_memory) / 2 ** 20:9.0f} MB {runtime:>10s}')
+        for table_key, n_tiles in estimate.tables.items():
+            group = table_key.rsplit('/', 1)[0]
+            group_tiles[group] = group_tiles.get(group, [0, 0])
+            group_tiles[group][0] += 1
+            group_tiles[group][1] += n_tiles
+
+    lines.append('')
+    for group, (n_tables, n_tiles) in group_tiles.items():
+        lines.append(f'Group {group}: {n_tables} slides, {n_tiles} tiles')
+    lines.append(f'Total: {len(jobs)} slides, {sum(n for _, n in group_tiles.values())} tiles')
+    lines.append(f'Predicted HDF5 size: {predict_dataset_size(estimates) / 2 ** 20:.1f} MB')
+    peak_memory = max([estimate.peak_memory for estimate in estimates], default=0)
+    lines.append(f'Predicted peak memory per worker: {(peak_memory + baseline_memory) / 2 ** 20:.0f} MB '
+                 f'(including {baseline_memory / 2 ** 20:.0f} MB of an idle worker)')
+
+    for idx, (elapsed, measured_memory) in calibration.items():
+        lines.append(f'Calibration {jobs[idx].slide_fp.stem}: {elapsed:.1f}s, peak memory measured '
+                     f'{measured_memory / 2 ** 20:.0f} MB, predicted '
+                     f'{(estimates[idx].peak_memory + baseline_memory) / 2 ** 20:.0f} MB')
+    if seconds_per_pixel is None:
+        lines.append('Predicted runtime: no calibration slides converted')
+    else:
+        runtimes = [seconds_per_pixel * estimate.sample_pixels for estimate in estimates]
+        lines.append(f'Predicted runtime: {schedule_runtime(runtimes, n_workers):.1f}s on {n_workers} '
+                     f'workers ({sum(runtimes):.1f}s of slide conversions, calibrated '
+                     f'on {len(calibration)} slides)')
+    print('\n'.join(lines))
@@ -0,0 +1,221 @@
+"""Per-stage timing of slide conversions.
+
+Converters time their stages with the `profiler` of the worker process. Stages
+may be nested; a nested stage is recorded under the path of the enclosing stages,
+e.g. `bg_mask/read_region`, and the time of a stage includes its nested stages.
+Stages of the levels of a multi-level conversion are summed.
+
+The scheduler collects the stage times and the number of tiles of every slide
+together with the peak memory of its worker into a `RunSummary`, to which the
+main process adds the time spent writing the tables. The summary is logged and
+written into the provenance log.
+"""
+# Standard Imports
+from contextlib import contextmanager
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Tuple
+import logging
+import resource
+
+# Third-party Imports
+
+# Local Imports
+from rationai.utils.provenance import SummaryWriter
+
+
+log = logging.getLogger('slide-converter')
+
+
+class SlideProfiler:
+    """Accumulates stage times and tiles of the slide converted by a process.
+
+    Stages are expected to be timed on the thread running the converter only.
+    """
+    def __init__(self):
+        self._stack = []
+        self.stages = {}
+        self.n_tiles = 0
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Times a stage of the conversion.
+
+        Args:
+            name (str): Name of the stage.
+        """
+        self._stack.append(name)
+        stage_path = '/'.join(self._stack)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[stage_path] = self.stages.get(stage_path, 0.) + perf_counter() - start
+            self._stack.pop()
+
+    def add_tiles(self, n_tiles: int) -> None:
+        """Counts tiles of a converted coordinate map.
+
+        Args:
+            n_tiles (int): Number of tiles.
+        """
+        self.n_tiles += n_tiles
+
+    def collect(self) -> Tuple[Dict[str, float], int]:
+        """Returns stage times and tiles recorded so far and starts anew.
+
+        Returns:
+            Tuple[Dict[str, float], int]: Stage times in seconds and number of tiles.
+        """
+        stages, n_tiles = self.stages, self.n_tiles
+        self.stages, self.n_tiles = {}, 0
+        return stages, n_tiles
+
+
+profiler = SlideProfiler()
+
+
+def peak_rss() -> int:
+    """Peak resident set size of the current process in bytes."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@dataclass
+class SlideProfile:
+    """Profile of a slide conversion.
+
+    Attributes:
+        slide_key (str): Group and name of the slide.
+        table_keys (List[str]): Keys of the tables of the slide.
+        wall_time (float): Wall time of the conversion in the worker.
+        stages (Dict[str, float]): Stage times in seconds.
+        n_tiles (int): Number of tiles of all tables of the slide.
+        peak_rss (int): Peak memory of the worker after the conversion in bytes.
+        pid (int): Process ID of the worker.
+    """
+    slide_key: str
+    table_keys: List[str]
+    wall_time: float
+    stages: Dict[str, float]
+    n_tiles: int
+    peak_rss: int
+    pid: int
+
+    @property
+    def tiles_per_second(self) -> float:
+        return self.n_tiles / self.wall_time if self.wall_time else 0.
+
+
+class RunSummary:
+    """Profiles of all slides of a conversion run.
+
+    Time spent by the main process writing tables is added to the `write` stage of
+    their slides. Stages of the run itself, such as merging of shards, are recorded
+    separately.
+    """
+    def __init__(self):
+        self.slides = []
+        self.run_stages = {}
+        self._table_slides = {}
+        self._start = perf_counter()
+        self.wall_time = None
+
+    def add_slide(self, profile: SlideProfile) -> None:
+        """Adds profile of a converted slide.
+
+        Args:
+            profile (SlideProfile): Slide profile.
+        """
+        self.slides.append(profile)
+        for table_key in profile.table_keys:
+            self._table_slides[table_key] = profile
+
+    @contextmanager
+    def write_stage(self, table_key: str) -> Iterator[None]:
+        """Times writing of a table by the main process.
+
+        Args:
+            table_key (str): Key of the written table.
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            profile = self._table_slides.get(table_key)
+            if profile is not None:
+                profile.stages['write'] = profile.stages.get('write', 0.) + perf_counter() - start
+
+    @contextmanager
+    def run_stage(self, name: str) -> Iterator[None]:
+        """Times a stage of the run.
+
+        Args:
+            name (str): Name of the stage.
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.run_stages[name] = self.run_stages.get(name, 0.) + perf_counter() - start
+
+    def finish(self) -> None:
+        """Stops the wall time of the run and logs the summary."""
+        self.wall_time = perf_counter() - self._start
+        n_tiles = sum(profile.n_tiles for profile in self.slides)
+        log.info(f'{len(self.slides)} slides, {n_tiles} tiles in {self.wall_time:.2f}s '
+                 f'({n_tiles / self.wall_time:.0f} tiles/s).')
+        for stage, elapsed in self.stage_totals().items():
+            log.info(f'Stage {stage}: {elapsed:.2f}s')
+        for pid, rss in self.worker_peak_rss().items():
+            log.info(f'Worker {pid}: peak memory {rss / 2 ** 20:.0f} MB')
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Sums stage times over all slides.
+
+        Returns:
+            Dict[str, float]: Total time of every stage in seconds, stages of the run included.
+        """
+        totals = {}
+        for profile in self.slides:
+            for stage, elapsed in profile.stages.items():
+                totals[stage] = totals.get(stage, 0.) + elapsed
+        return {**dict(sorted(totals.items())), **self.run_stages}
+
+    def worker_peak_rss(self) -> Dict[int, int]:
+        """Peak memory of every worker.
+
+        Returns:
+            Dict[int, int]: Peak memory in bytes by process ID of the worker.
+        """
+        workers = {}
+        for profile in self.slides:
+            workers[profile.pid] = max(workers.get(profile.pid, 0), profile.peak_rss)
+        return workers
+
+    def write(self, sw_log: SummaryWriter) -> None:
+        """Writes the summary into a summary writer under the `profiling` key.
+
+        Args:
+            sw_log (SummaryWriter): Summary writer.
+        """
+        n_tiles = sum(profile.n_tiles for profile in self.slides)
+        sw_log.set('profiling', 'wall_time', value=round(self.wall_time, 3))
+        sw_log.set('profiling', 'slides', value=len(self.slides))
+        sw_log.set('profiling', 'tiles', value=n_tiles)
+        sw_log.set('profiling', 'tiles_per_second', value=round(n_tiles / self.wall_time, 1))
+        sw_log.set('profiling', 'stages', value={stage: round(elapsed, 3)
+                                                 for stage, elapsed in self.stage_totals().items()})
+        sw_log.set('profiling', 'worker_peak_rss_mb', value={str(pid): round(rss / 2 ** 20, 1)
+                                                             for pid, rss in self.worker_peak_rss().items()})
+        for profile in self.slides:
+            sw_log.set('profiling', 'slide_profiles', profile.slide_key, value={
+                'wall_time': round(profile.wall_time, 3),
+                'tiles': profile.n_tiles,
+                'tiles_per_second': round(profile.tiles_per_second, 1),
+                'peak_rss_mb': round(profile.peak_rss / 2 ** 20, 1),
+                'worker': profile.pid,
+                'stages': {stage: round(elapsed, 3) for stage, elapsed in sorted(profile.stages.items())}
+            })
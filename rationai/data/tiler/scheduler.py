@@ -0,0 +1,137 @@
+"""Global work scheduler shared by the slide converters.
+
+Slides of all config groups are expanded into a single list of jobs, each carrying
+a converter with the effective configuration of its group. The jobs are ordered
+largest-first and processed by a single pool of workers, so that the workers are
+kept busy until the last slides of the whole run. Stage times of every slide
+are collected from the workers into an optional run summary.
+"""
+# Standard Imports
+from dataclasses import dataclass
+from multiprocessing import Pool
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+from typing import Callable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+import logging
+import os
+
+# Third-party Imports
+
+# Local Imports
+from rationai.data.tiler.profiling import RunSummary
+from rationai.data.tiler.profiling import SlideProfile
+from rationai.data.tiler.profiling import peak_rss
+from rationai.data.tiler.profiling import profiler
+from rationai.data.tiler.writers import file_fingerprint
+from rationai.utils.slide_catalog import open_slide
+
+
+log = logging.getLogger('slide-converter')
+
+
+@dataclass
+class ConversionJob:
+    """Slide to be converted together with the converter of its group."""
+    converter: Callable[[Path], Union[Tuple[str, Any, dict], List[Tuple[str, Any, dict]]]]
+    slide_fp: Path
+
+
+def job_weight(job: ConversionJob, schedule_by: str) -> int:
+    """Estimates the amount of work of a job.
+
+    Args:
+        job (ConversionJob): Conversion job.
+        schedule_by (str): Either 'file_size' (size of the slide files)
+                           or 'level_area' (number of pixels at level 0).
+
+    Returns:
+        int: Weight of the job.
+    """
+    if schedule_by == 'file_size':
+        return file_fingerprint(job.slide_fp)['size']
+    if schedule_by == 'level_area':
+        cache_dir = getattr(job.converter.config, 'slide_catalog_dir', None)
+        with open_slide(job.slide_fp, cache_dir) as oslide_wsi:
+            width, height = oslide_wsi.dimensions
+        return width * height
+    raise ValueError(f'Unknown scheduling criterion: {schedule_by}')
+
+
+def order_jobs(jobs: List[ConversionJob], schedule_by: Optional[str]) -> List[ConversionJob]:
+    """Orders jobs largest-first.
+
+    Args:
+        jobs (List[ConversionJob]): Conversion jobs.
+        schedule_by (Optional[str]): Criterion of `job_weight`. If None, the order
+                                     of the config is kept.
+
+    Returns:
+        List[ConversionJob]: Ordered jobs.
+    """
+    if schedule_by is None:
+        return jobs
+    weights = [job_weight(job, schedule_by) for job in jobs]
+    order = sorted(range(len(jobs)), key=lambda idx: weights[idx], reverse=True)
+    return [jobs[idx] for idx in order]
+
+
+def run_job(job: ConversionJob) -> Tuple[SlideProfile, List[Tuple[str, Any, dict]]]:
+    """Converts a slide of a job.
+
+    Converters return either a single result or a list of results, one per table.
+
+    Args:
+        job (ConversionJob): Conversion job.
+
+    Returns:
+        Tuple[SlideProfile, List[Tuple[str, Any, dict]]]: Profile of the conversion
+                                                          and the results of the converter.
+    """
+    profiler.collect()
+    start = perf_counter()
+    results = job.converter(job.slide_fp)
+    if isinstance(results, tuple):
+        results = [results]
+    elapsed = perf_counter() - start
+    stages, n_tiles = profiler.collect()
+    profile = SlideProfile(slide_key=f'{job.converter.config.group}/{job.slide_fp.stem}',
+                           table_keys=[table_key for table_key, _, _ in results],
+                           wall_time=elapsed,
+                           stages=stages,
+                           n_tiles=n_tiles,
+                           peak_rss=peak_rss(),
+                           pid=os.getpid())
+    return profile, results
+
+
+def run_jobs(jobs: List[ConversionJob], max_workers: int,
+             summary: Optional[RunSummary] = None) -> Iterator[Tuple[str, Any, dict]]:
+    """Runs jobs on a single pool of workers.
+
+    Jobs are dispatched one at a time in the given order and results are yielded
+    as soon as they are available.
+
+    Args:
+        jobs (List[ConversionJob]): Conversion jobs.
+        max_workers (int): Number of workers.
+        summary (Optional[RunSummary]): Run summary collecting the slide profiles.
+
+    Yields:
+        Tuple[str, Any, dict]: Results of the converters.
+    """
+    log.info(f'Spawning {max_workers} workers for {len(jobs)} slides.')
+    start = perf_counter()
+    with Pool(max_workers) as p:
+        for profile, results in p.imap_unordered(run_job, jobs):
+            log.info(f'[{profile.slide_key}] Slide processed in {profile.wall_time:.2f}s, '
+                     f'{profile.tiles_per_second:.0f} tiles/s ({", ".join(profile.table_keys)}).')
+            if summary is not None:
+                summary.add_slide(profile)
+            yield from results
+    log.info(f'{len(jobs)} slides processed in {perf_counter() - start:.2f}s.')
@@ -0,0 +1,86 @@
+"""Pixel tile store written by the slide converters.
+
+RGB pixels of the accepted tiles of a slide are stored in a raw uint8 `.npy` file
+of shape (n_tiles, tile_size, tile_size, 3). Row `i` of the store holds the tile
+of the coordinate map row with `tile_idx == i`. The file is not compressed, so that
+it can be memory-mapped and a tile is read as a view without any decoding.
+"""
+# Standard Imports
+from pathlib import Path
+from typing import Tuple
+import logging
+import os
+
+# Third-party Imports
+import numpy as np
+import pandas as pd
+from nptyping import NDArray
+from PIL import Image
+from openslide import OpenSlide
+
+# Local Imports
+
+
+log = logging.getLogger('slide-converter')
+
+
+def read_tile(wsi: OpenSlide, coords: Tuple[int, int], tile_size: int, level: int) -> NDArray:
+    """Extracts a tile from a slide with transparent pixels replaced by white colour.
+
+    Args:
+        wsi (OpenSlide): File handler to WSI.
+        coords (Tuple[int, int]): (x,y) coordinates of a tile to be extracted
+            at OpenSlide level 0 resolution.
+        tile_size (int): Size of the tile to be extracted.
+        level (int): Resolution level from which tile should be extracted.
+
+    Returns:
+        NDArray: RGB Tile represented as numpy array.
+    """
+    bg_tile = Image.new('RGB', (tile_size, tile_size), '#FFFFFF')
+    im_tile = wsi.read_region(
+        location=coords, level=level, size=(tile_size, tile_size)
+    )
+    bg_tile.paste(im_tile, None, im_tile)
+    return np.array(bg_tile)
+
+
+def write_tile_store(wsi: OpenSlide, coord_map_df: pd.DataFrame, tile_size: int,
+                     level: int, tile_store_fp: Path) -> None:
+    """Writes pixels of all tiles of a coordinate map into a tile store.
+
+    The store is written into a temporary file first, so that an existing store
+    is replaced only once complete.
+
+    Args:
+        wsi (OpenSlide): File handler to WSI.
+        coord_map_df (pd.DataFrame): Coordinate map with `coord_x`, `coord_y`
+                                     and `tile_idx` columns.
+        tile_size (int): Size of the tiles.
+        level (int): Resolution level from which tiles are extracted.
+        tile_store_fp (Path): Path to the tile store.
+    """
+    tile_store_fp.parent.mkdir(parents=True, exist_ok=True)
+    tmp_fp = tile_store_fp.with_name(f'.{tile_store_fp.stem}.{os.getpid()}.npy')
+    tiles = np.lib.format.open_memmap(tmp_fp, mode='w+', dtype=np.uint8,
+                                      shape=(len(coord_map_df), tile_size, tile_size, 3))
+    for tile_idx, coord_x, coord_y in zip(coord_map_df['tile_idx'],
+                                          coord_map_df['coord_x'],
+                                          coord_map_df['coord_y']):
+        tiles[tile_idx] = read_tile(wsi, (int(coord_x), int(coord_y)), tile_size, level)
+    tiles.flush()
+    del tiles
+    os.replace(tmp_fp, tile_store_fp)
+    log.info(f'[{tile_store_fp.stem}] Tile store written.')
+
+
+def open_tile_store(tile_store_fp: Path) -> NDArray:
+    """Memory-maps a tile store for reading.
+
+    Args:
+        tile_store_fp (Path): Path to the tile store.
+
+    Returns:
+        NDArray: Read-only array of shape (n_tiles, tile_size, tile_size, 3).
+    """
+    return np.load(tile_store_fp, mmap_mode='r')
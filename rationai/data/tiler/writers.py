@@ -0,0 +1,222 @@
+"""Output writers shared by the slide converters.
+
+Coordinate maps are stored as pandas HDFStore tables under `group/slide_name` keys
+with a metadata dictionary attached to every table. Fingerprints of slides converted
+without a table are stored under the same keys in an attribute of the root group.
+"""
+# Standard Imports
+from pathlib import Path
+from typing import Iterable
+from typing import List
+from typing import Optional
+import hashlib
+import logging
+import json
+
+# Third-party Imports
+import pandas as pd
+import tables
+
+# Local Imports
+from rationai.utils.provenance import get_sha256
+
+
+log = logging.getLogger('slide-converter')
+
+EMPTY_TABLES_ATTR = 'empty_table_fingerprints'
+
+
+def write_table(dataset_h5: pd.HDFStore, table_key: str,
+                table: pd.DataFrame, metadata: dict) -> None:
+    """Appends a coordinate map table together with its metadata to a HDFStore.
+
+    Args:
+        dataset_h5 (pd.HDFStore): Opened HDFStore.
+        table_key (str): Key of the table.
+        table (pd.DataFrame): Coordinate map.
+        metadata (dict): Table metadata.
+    """
+    dataset_h5.append(table_key, table)
+    dataset_h5.get_storer(table_key).attrs.metadata = metadata
+
+
+def write_shard(shard_fp: Path, table_key: str, table: pd.DataFrame, metadata: dict) -> None:
+    """Appends a coordinate map table into a shard file.
+
+    Shard file is opened only for the duration of the write, so that it is always
+    in a consistent state once a slide is processed.
+
+    Args:
+        shard_fp (Path): Path to shard file.
+        table_key (str): Key of the table.
+        table (pd.DataFrame): Coordinate map.
+        metadata (dict): Table metadata.
+    """
+    shard_fp.parent.mkdir(parents=True, exist_ok=True)
+    with pd.HDFStore(shard_fp, 'a') as shard_h5:
+        write_table(shard_h5, table_key, table, metadata)
+
+
+def merge_shards(dataset_fp: Path, shard_fps: Iterable[Path]) -> None:
+    """Merges tables from shard files into the dataset file.
+
+    Tables are copied as HDF5 nodes including their attributes, so the data is
+    neither decoded nor re-encoded. Tables stored under the same key in several
+    shards are concatenated.
+
+    Args:
+        dataset_fp (Path): Path to dataset file.
+        shard_fps (Iterable[Path]): Paths to shard files.
+    """
+    with tables.open_file(str(dataset_fp), 'a') as dataset_h5:
+        for shard_fp in sorted(shard_fps):
+            log.info(f'Merging shard {shard_fp.name}.')
+            with tables.open_file(str(shard_fp), 'r') as shard_h5:
+                for table_group in shard_h5.walk_groups('/'):
+                    if 'pandas_type' not in table_group._v_attrs \
+                            or _is_nested_pandas_object(table_group):
+                        continue
+                    if table_group._v_pathname in dataset_h5:
+                        dataset_h5.get_node(table_group._v_pathname).table.append(
+                            table_group.table.read())
+                        continue
+                    parent_group = _get_or_create_group(dataset_h5, table_group._v_parent._v_pathname)
+                    table_group._f_copy(newparent=parent_group, recursive=True)
+
+
+def _is_nested_pandas_object(group: tables.Group) -> bool:
+    """Checks whether a pandas object is a part of another pandas object.
+
+    Tables with categorical columns store their categories as nested objects,
+    which are copied together with the table.
+
+    Args:
+        group (tables.Group): Group of a pandas object.
+
+    Returns:
+        bool: True if any of the ancestors is a pandas object.
+    """
+    parent = group._v_parent
+    while parent._v_pathname != '/':
+        if 'pandas_type' in parent._v_attrs:
+            return True
+        parent = parent._v_parent
+    return False
+
+
+def _get_or_create_group(h5_file: tables.File, group_path: str) -> tables.Group:
+    """Retrieves a group, creating it together with its parents if it does not exist.
+
+    Args:
+        h5_file (tables.File): Opened HDF5 file.
+        group_path (str): Absolute path of the group.
+
+    Returns:
+        tables.Group: Group at a given path.
+    """
+    if group_path in h5_file:
+        return h5_file.get_node(group_path)
+    where, name = group_path.rsplit('/', 1)
+    return h5_file.create_group(where or '/', name, createparents=True)
+
+
+def file_fingerprint(fp: Optional[Path], content_hash: bool = False) -> Optional[dict]:
+    """Describes the state of an input file for incremental conversion.
+
+    MRXS slides keep their pixel data in a directory named after the slide,
+    the content of such directory is included as well.
+
+    Args:
+        fp (Optional[Path]): Path to input file.
+        content_hash (bool): If set, SHA256 hash of the content is included.
+
+    Returns:
+        Optional[dict]: Path, size and modification time of the file; None if no file is given.
+    """
+    if fp is None:
+        return None
+
+    fps = [fp]
+    data_dir = fp.with_suffix('')
+    if data_dir != fp and data_dir.is_dir():
+        fps += sorted(data_dir.iterdir())
+    stats = [file_fp.stat() for file_fp in fps]
+
+    fingerprint = {
+        'path': str(fp),
+        'size': sum(stat.st_size for stat in stats),
+        'mtime': max(stat.st_mtime_ns for stat in stats)
+    }
+    if content_hash:
+        fingerprint['sha256'] = [get_sha256(file_fp) for file_fp in fps]
+    return fingerprint
+
+
+def config_fingerprint(config: object, options: List[str]) -> str:
+    """Computes SHA256 hash of the conversion options effective for a slide.
+
+    Args:
+        config (object): Slide converter configuration.
+        options (List[str]): Names of the options affecting the conversion output.
+
+    Returns:
+        str: SHA256 hash of the options.
+    """
+    effective_config = {option: getattr(config, option) for option in options}
+    return hashlib.sha256(
+        json.dumps(effective_config, sort_keys=True, default=str).encode('UTF-8')
+    ).hexdigest()
+
+
+def get_table_fingerprint(dataset_h5: pd.HDFStore, table_key: str) -> Optional[dict]:
+    """Retrieves the fingerprint stored in metadata of a table.
+
+    Args:
+        dataset_h5 (pd.HDFStore): Opened HDFStore.
+        table_key (str): Key of the table.
+
+    Returns:
+        Optional[dict]: Stored fingerprint; None if the table or its fingerprint does not exist.
+    """
+    if table_key not in dataset_h5:
+        return _get_empty_tables(dataset_h5).get(_normalize_key(table_key))
+    metadata = getattr(dataset_h5.get_storer(table_key).attrs, 'metadata', None) or {}
+    return metadata.get('fingerprint')
+
+
+def write_empty_table(dataset_h5: pd.HDFStore, table_key: str, fingerprint: dict) -> None:
+    """Records the fingerprint of a slide converted without a table.
+
+    Slides failing validation or without any ROI tile have no table to hold their
+    fingerprint, so that the fingerprint is kept under the key of the table instead.
+
+    Args:
+        dataset_h5 (pd.HDFStore): Opened HDFStore.
+        table_key (str): Key of the table.
+        fingerprint (dict): Fingerprint of the slide conversion.
+    """
+    empty_tables = _get_empty_tables(dataset_h5)
+    empty_tables[_normalize_key(table_key)] = fingerprint
+    setattr(dataset_h5.root._v_attrs, EMPTY_TABLES_ATTR, empty_tables)
+
+
+def remove_empty_table(dataset_h5: pd.HDFStore, table_key: str) -> None:
+    """Removes the fingerprint of a slide converted without a table, if any.
+
+    Args:
+        dataset_h5 (pd.HDFStore): Opened HDFStore.
+        table_key (str): Key of the table.
+    """
+    empty_tables = _get_empty_tables(dataset_h5)
+    if empty_tables.pop(_normalize_key(table_key), None) is not None:
+        setattr(dataset_h5.root._v_attrs, EMPTY_TABLES_ATTR, empty_tables)
+
+
+def _get_empty_tables(dataset_h5: pd.HDFStore) -> dict:
+    """Retrieves fingerprints of slides converted without a table by their table keys."""
+    return dict(getattr(dataset_h5.root._v_attrs, EMPTY_TABLES_ATTR, None) or {})
+
+
+def _normalize_key(table_key: str) -> str:
+    """Formats a table key as an absolute path as listed by `pd.HDFStore.keys()`."""
+    return '/' + table_key.lstrip('/')
@@ -1,19 +1,22 @@
 # Standard Imports
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from multiprocessing import Pool
+from dataclasses import field
+from typing import Dict
 from typing import Optional
 from typing import Tuple
 from typing import List
-from typing import Iterator
 from typing import Any
 from pathlib import Path
 from datetime import datetime
 import argparse
 import logging
+import tempfile
 import shutil
 import json
 import copy
+import os
 
 # Third-party Imports
 import numpy as np
@@ -21,20 +24,47 @@ import warnings
 import tables
 from nptyping import NDArray
 import pandas as pd
-import openslide as oslide
 from pandas.core.frame import DataFrame
 from PIL import Image
 from PIL import ImageDraw
-from skimage import color
-from skimage import filters
-from skimage import morphology
 from openslide import OpenSlide
 
 # Local Imports
-from rationai.utils.utils import read_polygons
+from rationai.utils.annotations import load_annotations
+from rationai.utils.slide_catalog import open_slide
 from rationai.utils.utils import open_pil_image
 from rationai.utils.config import ConfigProto
+from rationai.utils.schema import compact_table
 from rationai.utils.provenance import SummaryWriter
+from rationai.data.tiler.background import create_background_mask
+from rationai.data.tiler.coverage import CoverageGrids
+from rationai.data.tiler.coverage import save_coverage_grids
+from rationai.data.tiler.estimator import SAMPLE_TABLE_ROWS
+from rationai.data.tiler.estimator import SlideEstimate
+from rationai.data.tiler.estimator import dry_run
+from rationai.data.tiler.estimator import table_row_bytes
+from rationai.data.tiler.estimator import tiling_peak_memory
+from rationai.data.tiler.profiling import RunSummary
+from rationai.data.tiler.profiling import profiler
+from rationai.data.tiler.scheduler import ConversionJob
+from rationai.data.tiler.scheduler import order_jobs
+from rationai.data.tiler.scheduler import run_jobs
+from rationai.data.tiler.tiling import band_window_sums
+from rationai.data.tiler.tiling import center_window
+from rationai.data.tiler.tiling import grid_coordinates
+from rationai.data.tiler.tiling import integral_image
+from rationai.data.tiler.tiling import window_sums
+from rationai.data.tiler.tiling import PolygonMask
+from rationai.data.tiler.tile_store import write_tile_store
+from rationai.data.tiler.arrow_export import export_arrow
+from rationai.data.tiler.writers import config_fingerprint
+from rationai.data.tiler.writers import file_fingerprint
+from rationai.data.tiler.writers import get_table_fingerprint
+from rationai.data.tiler.writers import merge_shards
+from rationai.data.tiler.writers import remove_empty_table
+from rationai.data.tiler.writers import write_empty_table
+from rationai.data.tiler.writers import write_shard
+from rationai.data.tiler.writers import write_table
 
 # Allows to load large images
 Image.MAX_IMAGE_PIXELS = None
@@ -50,10 +80,12 @@ logging.basicConfig(level=logging.INFO,
 sw_log = SummaryWriter.getLogger('provenance')
 
 @dataclass
-class ROITile:
-    coord_x: int
-    coord_y: int
-    annot_coverage: float
+class ROITiles:
+    """ROI tiles of a slide stored column-wise."""
+    coord_x: NDArray
+    coord_y: NDArray
+    annot_coverage: NDArray
+    label_coverages: Dict[str, NDArray] = field(default_factory=dict)
 
 class SlideConverter:
     """Worker Object for tile extraction from WSI.
@@ -63,54 +95,333 @@ class SlideConverter:
        handler needs to be passed. This filehandler cannot be pickled and therefore cannot
        be stored as an instance variable or passed as an argument to the `__call__` function.
     """
+    # Options affecting the content of a coordinate map
+    FINGERPRINT_OPTIONS = ['tile_size', 'step_size', 'center_size', 'sample_level', 'bg_level',
+                           'include_keywords', 'exclude_keywords', 'min_tissue', 'max_tissue',
+                           'disk_size', 'negative_mode', 'strict_mode', 'windowed_mode',
+                           'compact_schema', 'tile_store', 'coverage_grids', 'coverage_center_sizes',
+                           'label_schemes']
+    LEVEL_OPTIONS = ['sample_level', 'tile_size', 'step_size']
+    LABEL_SCHEME_OPTIONS = ['name', 'include_keywords', 'center_size']
+
     def __init__(self, config: ConfigProto):
         self.config = config
-        self.center_filter_np = self._get_center_filter()
+        self.center_window = self._get_center_window()
+        self.slide_name = None
+
+    def __call__(self, slide_fp: Path) -> List[Tuple[str, Any, dict]]:
+        """Converts slide into coordinate maps of ROI Tiles.
 
-    def __call__(self, slide_fp: Path) -> Tuple[str, pd.DataFrame, dict]:
-        """Converts slide into a coordinate map of ROI Tiles.
+        A coordinate map is created for every level specification in `levels`, or a single
+        one if `levels` is not set. The slide, its background mask and its parsed annotations
+        are shared by all levels.
 
         Args:
             slide_fp (Path): Path to WSI file.
 
         Returns:
-            Tuple[str, pd.DataFrame, dict]: Returns a tuple of table key,
-                coordinate map dataframe and metadat dictionary.
+            List[Tuple[str, Any, dict]]: Returns a tuple of table key, coordinate map
+                dataframe and metadata dictionary for every level. If shard mode is set,
+                the coordinate map is written into a shard file by the worker and path
+                to the shard file is returned instead. In incremental mode, a slide
+                failing validation yields empty coordinate maps with the fingerprint
+                as the only metadata.
         """
         self.slide_name = slide_fp.stem
+        # Fingerprints describe the configuration before a negative fallback, as in `is_converted`
+        fingerprints = [converter.get_fingerprint(slide_fp) if self.config.incremental_mode else None
+                        for converter in self._get_level_converters()]
 
         annot_fp = self._get_annotations()
+        level_converters = self._get_level_converters()
         oslide_wsi = self._open_slide(slide_fp)
 
         is_mode_valid = self._validate_mode(annot_fp)
-        is_wsi_levels_valid = self._validate_wsi_levels(oslide_wsi)
+        is_wsi_levels_valid = all([converter._validate_wsi_levels(oslide_wsi)
+                                   for converter in level_converters])
 
         if not (is_mode_valid and is_wsi_levels_valid):
-            return str(), pd.DataFrame(), dict()
+            # Fingerprints of skipped slides are recorded, so that incremental runs skip them too
+            return [(converter._get_table_key(), pd.DataFrame(), {'fingerprint': fingerprint})
+                    for converter, fingerprint in zip(level_converters, fingerprints)
+                    if fingerprint is not None]
+
+        with profiler.stage('bg_mask'):
+            bg_mask_img = self._get_bg_mask(oslide_wsi, annot_fp)
+        results = [converter._convert_level(slide_fp, oslide_wsi, annot_fp, bg_mask_img, fingerprint)
+                   for converter, fingerprint in zip(level_converters, fingerprints)]
+        oslide_wsi.close()
+        return results
 
-        bg_mask_img = self._get_bg_mask(oslide_wsi, annot_fp)
-        annot_mask_img = self._get_annot_mask(oslide_wsi, annot_fp)
+    def estimate(self, slide_fp: Path) -> SlideEstimate:
+        """Estimates the conversion of a slide without writing any output.
 
-        coord_map_df = self._tile_wsi_to_coord_map(oslide_wsi, bg_mask_img, annot_mask_img)
-        table_key = self._get_table_key()
-        metadata = self._get_table_metadata(slide_fp, annot_fp)
+        Only slide properties and the `bg_level` of the slide are read. The background
+        mask is computed in memory, so that the number of tiles is exact.
+
+        Args:
+            slide_fp (Path): Path to WSI file.
+
+        Returns:
+            SlideEstimate: Tiles of every level, sample-level pixels, predicted peak memory
+                           and a sample coordinate map of the slide.
+        """
+        self.slide_name = slide_fp.stem
+        annot_fp = self._get_annotations()
+        level_converters = self._get_level_converters()
+        oslide_wsi = self._open_slide(slide_fp)
+
+        is_mode_valid = self._validate_mode(annot_fp)
+        is_wsi_levels_valid = all([converter._validate_wsi_levels(oslide_wsi)
+                                   for converter in level_converters])
 
+        if not (is_mode_valid and is_wsi_levels_valid):
+            oslide_wsi.close()
+            return SlideEstimate(slide_fp, tables={}, sample_pixels=0, peak_memory=0)
+
+        sample_table = self._roi_tiles_to_coord_map(ROITiles(
+            coord_x=np.arange(SAMPLE_TABLE_ROWS) * self.config.step_size,
+            coord_y=np.arange(SAMPLE_TABLE_ROWS) * self.config.step_size,
+            annot_coverage=np.linspace(0, 1, SAMPLE_TABLE_ROWS),
+            label_coverages={scheme['name']: np.linspace(0, 1, SAMPLE_TABLE_ROWS)
+                             for scheme in self._get_label_schemes()}
+        ))
+        row_bytes = table_row_bytes(sample_table)
+
+        bg_mask_img = self._combine_bg_masks(self._create_init_bg_mask(oslide_wsi),
+                                             self._create_annot_bg_mask(oslide_wsi, annot_fp))
+        level_estimates = [converter._estimate_level(oslide_wsi, bg_mask_img, row_bytes)
+                           for converter in level_converters]
         oslide_wsi.close()
+
+        return SlideEstimate(
+            slide_fp,
+            tables={converter._get_table_key(): n_tiles
+                    for converter, (n_tiles, _, _) in zip(level_converters, level_estimates)},
+            sample_pixels=sum(sample_pixels for _, sample_pixels, _ in level_estimates),
+            peak_memory=max(peak_memory for _, _, peak_memory in level_estimates),
+            sample_table=sample_table,
+            metadata=self._get_table_metadata(slide_fp, annot_fp)
+        )
+
+    def get_table_keys(self, slide_fp: Path) -> List[str]:
+        """Lists keys of all coordinate map tables of a slide.
+
+        Args:
+            slide_fp (Path): Path to WSI file.
+
+        Returns:
+            List[str]: Table keys; one for every level in `levels`.
+        """
+        return [f'{converter.config.group}/{slide_fp.stem}' for converter in self._get_level_converters()]
+
+    def get_fingerprint(self, slide_fp: Path) -> dict:
+        """Describes inputs of a slide conversion: the slide, its annotation file
+        and the effective conversion options.
+
+        Args:
+            slide_fp (Path): Path to WSI file.
+
+        Returns:
+            dict: Fingerprint of the slide conversion.
+        """
+        annot_fp = None
+        if not self.config.negative_mode and self.config.label_dir:
+            annot_fp = (self.config.label_dir / slide_fp.stem).with_suffix('.xml').resolve()
+            if not annot_fp.exists():
+                annot_fp = None
+
+        return {
+            'slide': file_fingerprint(slide_fp.resolve(), self.config.content_hash),
+            'annot': file_fingerprint(annot_fp, self.config.content_hash),
+            'config': config_fingerprint(self.config, self.FINGERPRINT_OPTIONS)
+        }
+
+    def is_converted(self, dataset_h5: pd.HDFStore, slide_fp: Path) -> bool:
+        """Checks if the dataset already contains a coordinate map of a slide
+        converted from unchanged inputs.
+
+        Args:
+            dataset_h5 (pd.HDFStore): Opened output dataset.
+            slide_fp (Path): Path to WSI file.
+
+        Returns:
+            bool: True if the stored fingerprint matches the current one; otherwise False.
+        """
+        return all(get_table_fingerprint(dataset_h5, table_key) == converter.get_fingerprint(slide_fp)
+                   for converter, table_key in zip(self._get_level_converters(),
+                                                   self.get_table_keys(slide_fp)))
+
+    def remove_cached_masks(self, slide_fp: Path) -> None:
+        """Removes masks of a slide cached by previous conversions.
+
+        Args:
+            slide_fp (Path): Path to WSI file.
+        """
+        groups = {self.config.group} | {converter.config.group for converter in self._get_level_converters()}
+        for group in groups:
+            for mask_dir in ['bg/bg_final', 'bg/bg_init', 'bg/bg_annot', 'annotations']:
+                mask_fp = self.config.output_dir / f'masks/{group}/{mask_dir}/{slide_fp.stem}.PNG'
+                if mask_fp.exists():
+                    mask_fp.unlink()
+
+    def _get_level_converters(self) -> List[SlideConverter]:
+        """Creates converters of the level specifications in `levels`.
+
+        Options of a level specification override the options of the group. Tables, annotation
+        masks, tile stores and coverage grids of a level are stored under `<group>/level_<k>`.
+
+        Returns:
+            List[SlideConverter]: Converters of the levels; the converter itself if
+                                  `levels` is not set.
+
+        Raises:
+            ValueError: If a level specification contains other options than
+                        `LEVEL_OPTIONS` or the sample levels are not unique.
+        """
+        if not self.config.levels:
+            return [self]
+
+        sample_levels = [level.get('sample_level', self.config.sample_level) for level in self.config.levels]
+        if len(set(sample_levels)) != len(sample_levels):
+            raise ValueError(f'Sample levels of level specifications must be unique: {sample_levels}')
+
+        level_converters = []
+        for level in self.config.levels:
+            unknown_options = set(level) - set(self.LEVEL_OPTIONS)
+            if unknown_options:
+                raise ValueError(f'Unknown options of level specification: {sorted(unknown_options)}')
+            level_config = copy.copy(self.config)
+            level_config.levels = None
+            for option, value in level.items():
+                setattr(level_config, option, value)
+            level_config.group = f'{self.config.group}/level_{level_config.sample_level}'
+            level_converter = SlideConverter(level_config)
+            level_converter.slide_name = self.slide_name
+            level_converters.append(level_converter)
+        return level_converters
+
+    def _get_label_schemes(self) -> List[dict]:
+        """Completes label definitions of `label_schemes` with the options of the config.
+
+        Returns:
+            List[dict]: Label definitions with `name`, `include_keywords` and `center_size`.
+
+        Raises:
+            ValueError: If a label definition contains other options than `LABEL_SCHEME_OPTIONS`
+                        or the names are not unique.
+        """
+        label_schemes = []
+        for scheme in self.config.label_schemes or []:
+            unknown_options = set(scheme) - set(self.LABEL_SCHEME_OPTIONS)
+            if unknown_options:
+                raise ValueError(f'Unknown options of label definition: {sorted(unknown_options)}')
+            label_schemes.append({
+                'name': scheme['name'],
+                'include_keywords': scheme.get('include_keywords', self.config.include_keywords),
+                'center_size': scheme.get('center_size', self.config.center_size)
+            })
+
+        names = [scheme['name'] for scheme in label_schemes]
+        if len(set(names)) != len(names):
+            raise ValueError(f'Names of label definitions must be unique: {names}')
+        return label_schemes
+
+    def _get_scheme_keyword_groups(self) -> set:
+        """Returns keyword groups of the label definitions as tuples."""
+        return {tuple(scheme['include_keywords']) for scheme in self._get_label_schemes()}
+
+    def _estimate_level(self, oslide_wsi: OpenSlide, bg_mask_img: Image.Image,
+                        row_bytes: float) -> Tuple[int, int, int]:
+        """Estimates the conversion of a slide at the sample level.
+
+        Args:
+            oslide_wsi (OpenSlide): Handler to WSI.
+            bg_mask_img (Image.Image): Binary background mask.
+            row_bytes (float): Memory of a row of the coordinate map.
+
+        Returns:
+            Tuple[int, int, int]: Number of ROI tiles, number of pixels at the sample level
+                                  and predicted peak memory in bytes.
+        """
+        bg_scale_factor = int(oslide_wsi.level_downsamples[self.config.bg_level])
+        sampling_scale_factor = int(oslide_wsi.level_downsamples[self.config.sample_level])
+        wsi_width, wsi_height = oslide_wsi.level_dimensions[self.config.sample_level]
+        grid_x, grid_y = grid_coordinates(wsi_width, wsi_height, self.config.step_size)
+
+        tissue_count, tissue_size = self._count_tissue(bg_mask_img, grid_x, grid_y,
+                                                       bg_scale_factor // sampling_scale_factor)
+        n_tiles = int(np.count_nonzero(self._is_bg_contain_tissue(tissue_count, tissue_size)))
+
+        # Canvas of a label scheme keyword group is drawn while the annotation mask is held
+        has_canvas = not (self.config.negative_mode or self.config.windowed_mode)
+        n_canvases = 2 if self._get_scheme_keyword_groups() - {tuple(self.config.include_keywords)} else 1
+        center_size = max([self.config.center_size] + [scheme['center_size']
+                                                       for scheme in self._get_label_schemes()])
+        _, upper, _, lower = self._get_center_window(center_size)
+        peak_memory = tiling_peak_memory(
+            bg_size=bg_mask_img.size,
+            stripe_height=self.config.bg_stripe_height,
+            disk_size=self.config.disk_size,
+            grid_size=len(grid_x) * len(grid_y),
+            canvas_size=(wsi_width, wsi_height * n_canvases) if has_canvas else (0, 0),
+            band_size=(lower - upper, min(wsi_width, self.config.max_band_width)),
+            table_bytes=int(n_tiles * row_bytes)
+        )
+        return n_tiles, wsi_width * wsi_height, peak_memory
+
+    def _convert_level(self, slide_fp: Path, oslide_wsi: OpenSlide, annot_fp: Path,
+                       bg_mask_img: Image.Image, fingerprint: Optional[dict]) -> Tuple[str, Any, dict]:
+        """Converts slide into a coordinate map of ROI Tiles at the sample level.
+
+        Args:
+            slide_fp (Path): Path to WSI file.
+            oslide_wsi (OpenSlide): Handler to WSI.
+            annot_fp (Path): Path to annotation file.
+            bg_mask_img (Image.Image): Binary background mask.
+            fingerprint (Optional[dict]): Fingerprint stored in the table metadata
+                                          in incremental mode; otherwise None.
+
+        Returns:
+            Tuple[str, Any, dict]: Returns a tuple of table key, coordinate map
+                dataframe (or path to the shard file) and metadata dictionary.
+        """
+        with profiler.stage('annotation_mask'):
+            annot_mask_img = self._get_annot_mask(oslide_wsi, annot_fp)
+
+        with profiler.stage('tiling'):
+            coord_map_df = self._tile_wsi_to_coord_map(oslide_wsi, bg_mask_img, annot_mask_img, annot_fp)
+        profiler.add_tiles(len(coord_map_df))
+        table_key = self._get_table_key()
+        metadata = self._get_table_metadata(slide_fp, annot_fp)
+        if fingerprint is not None:
+            metadata['fingerprint'] = fingerprint
+        if self.config.tile_store and not coord_map_df.empty:
+            with profiler.stage('tile_store'):
+                metadata['tile_store_fp'] = str(self._write_tile_store(oslide_wsi, coord_map_df))
+        if self.config.coverage_grids:
+            metadata['coverage_fp'] = str(self._get_coverage_fp())
+
+        if self.config.shard_mode and not coord_map_df.empty:
+            shard_fp = self.config.shard_dir / f'{os.getpid()}.h5'
+            with profiler.stage('write'):
+                write_shard(shard_fp, table_key, coord_map_df, metadata)
+            return table_key, shard_fp, metadata
         return table_key, coord_map_df, metadata
 
-    def _get_center_filter(self) -> Image.Image:
-        """Creates a binary mask for a tile, with a non-zero center square in the middle.
+    def _get_center_window(self, center_size: Optional[int] = None) -> Tuple[int, int, int, int]:
+        """Computes bounds of the labelled center square of a tile.
+
+        Args:
+            center_size (Optional[int]): Size of the center square. Defaults to `center_size`
+                                         of the config.
 
         Returns:
-            Image.Image: Binary tile mask.
+            Tuple[int, int, int, int]: (left, upper, right, lower) bounds relative to the
+                                       top-left pixel of a tile; right and lower are exclusive.
         """
-        offset_size = int((self.config.tile_size - self.config.center_size) // 2)
-        center_filter = Image.new('L', (self.config.tile_size, self.config.tile_size), 'BLACK')
-        filter_draw = ImageDraw.Draw(center_filter)
-        filter_draw.rectangle(
-            [(offset_size, offset_size),
-             (self.config.tile_size - offset_size, self.config.tile_size - offset_size)], 'WHITE')
-        return center_filter
+        center_size = self.config.center_size if center_size is None else center_size
+        return center_window(self.config.tile_size, center_size)
 
     def _get_annotations(self) -> Optional[Path]:
         """Builds a path to annotation file using slide name and supplied annotation dir path.
@@ -135,6 +446,9 @@ class SlideConverter:
     def _open_slide(self, slide_fp: Path) -> OpenSlide:
         """Opens WSI slide and returns handler.
 
+        If `slide_catalog_dir` is set, the slide metadata and its `bg_level` are read
+        from the slide catalog and the slide itself is opened only to read other levels.
+
         Args:
             slide_fp (Path): Path to WSI slide.
 
@@ -142,7 +456,7 @@ class SlideConverter:
             OpenSlide: Handler to opened WSI slide.
         """
         logging.info(f'[{self.slide_name}] Opening slide: {str(slide_fp.resolve())}')
-        return oslide.open_slide(str(slide_fp.resolve()))
+        return open_slide(slide_fp, self.config.slide_catalog_dir, thumbnail_levels=[self.config.bg_level])
 
     def _validate_mode(self, annot_fp: Path) -> bool:
         """Checks requirements for a chosen slide conversion mode.
@@ -185,7 +499,7 @@ class SlideConverter:
         Returns:
             Image.Image: Binary background mask filtering background and highlighting tissue.
         """
-        bg_mask_fp = self.config.output_dir / f'masks/bg/bg_final/{self.slide_name}.PNG'
+        bg_mask_fp = self.config.output_dir / f'masks/{self.config.group}/bg/bg_final/{self.slide_name}.PNG'
         if bg_mask_fp.exists() and not self.config.force:
             bg_mask_img = open_pil_image(bg_mask_fp)
             if bg_mask_img is not None:
@@ -202,6 +516,9 @@ class SlideConverter:
         Otherwise, the mask is drawn using supplied annotation file.
         No mask is returned if slide conversion mode is set to 'Negative'.
 
+        In 'Windowed' mode the full resolution mask is neither drawn nor cached. Instead,
+        polygons are rasterized only within the regions read by the tiling engine.
+
         Args:
             oslide_wsi (OpenSlide): Handler to WSI.
             annot_fp (Path): Path to annotation file.
@@ -213,7 +530,10 @@ class SlideConverter:
         if self.config.negative_mode:
             return None
 
-        annot_mask_fp = self.config.output_dir / f'masks/annotations/{self.slide_name}.PNG'
+        if self.config.windowed_mode:
+            return self._create_annot_mask(oslide_wsi, annot_fp)
+
+        annot_mask_fp = self.config.output_dir / f'masks/{self.config.group}/annotations/{self.slide_name}.PNG'
         if annot_mask_fp.exists() and not self.config.force:
             annot_mask_img = open_pil_image(annot_mask_fp)
             if annot_mask_img is not None:
@@ -256,7 +576,7 @@ class SlideConverter:
         Returns:
             Image.Image: Binary background mask.
         """
-        init_bg_mask_fp = self.config.output_dir / f'masks/bg/bg_init/{self.slide_name}.PNG'
+        init_bg_mask_fp = self.config.output_dir / f'masks/{self.config.group}/bg/bg_init/{self.slide_name}.PNG'
         if init_bg_mask_fp.exists() and not self.config.force:
             init_bg_mask_img = open_pil_image(init_bg_mask_fp)
             if init_bg_mask_img is not None:
@@ -276,18 +596,10 @@ class SlideConverter:
             Image.Image: Binary background mask.
         """
         log.info(f'[{self.slide_name}] Generating new initial background mask.')
-        wsi_img = oslide_wsi.read_region(
-            location=(0, 0),
-            level=self.config.bg_level,
-            size=oslide_wsi.level_dimensions[self.config.bg_level]).convert('RGB')
-        slide_hsv = color.rgb2hsv(np.array(wsi_img))
-        saturation = slide_hsv[:, :, 1]
-        threshold = filters.threshold_otsu(saturation)
-        high_saturation = (saturation > threshold)
-        disk_object = morphology.disk(self.config.disk_size)
-        mask = morphology.closing(high_saturation, disk_object)
-        mask = morphology.opening(mask, disk_object)
-        return Image.fromarray(mask)
+        return create_background_mask(oslide_wsi,
+                                      level=self.config.bg_level,
+                                      disk_size=self.config.disk_size,
+                                      stripe_height=self.config.bg_stripe_height)
 
     def _get_annot_bg_mask(self, oslide_wsi: OpenSlide, annot_fp: Path) -> Image.Image:
         """Retrieves binary background mask created using annotation file.
@@ -305,7 +617,7 @@ class SlideConverter:
         """
         if self.config.negative_mode:
             return None
-        annot_bg_mask_fp = self.config.output_dir / f'masks/bg/bg_annot/{self.slide_name}.PNG'
+        annot_bg_mask_fp = self.config.output_dir / f'masks/{self.config.group}/bg/bg_annot/{self.slide_name}.PNG'
         if annot_bg_mask_fp.exists() and not self.config.force:
             annot_bg_mask_img = open_pil_image(annot_bg_mask_fp)
             if annot_bg_mask_img is not None:
@@ -336,7 +648,7 @@ class SlideConverter:
 
     def _draw_annotation_mask(self, annot_fp: Path, size: Tuple[int, int], scale_factor: int,
                                include_keywords: List[str], exclude_keywords: List[str],
-                               canvas_color: str) -> Image.Image:
+                               canvas_color: str, windowed: bool = False) -> Image.Image:
         """Draws binary mask using supplied annotation file.
 
         Args:
@@ -352,53 +664,84 @@ class SlideConverter:
                                               explicitly overruled by annotation file
                                     'BLACK' - area should be considered as negative unless
                                               explicitly overruled by annotation file
+            windowed (bool): If set, the mask is rasterized lazily by regions.
 
         Returns:
             Image.Image: Binary mask.
         """
-        annot_mask_img, annot_mask_draw = self._prepare_empty_canvas(size, canvas_color)
-        incl_polygons = read_polygons(annot_fp, scale_factor=scale_factor,
-                                      keywords=include_keywords)
+        annot_mask_img, annot_mask_draw = self._prepare_empty_canvas(size, canvas_color, windowed)
+        incl_polygons = self._read_polygons(annot_fp, scale_factor=scale_factor,
+                                            keywords=include_keywords)
         log.debug(f'[{self.slide_name}] Include polygons ({include_keywords}): {incl_polygons}')
-        self._draw_polygons_on_mask(incl_polygons, annot_mask_draw, polygon_color='WHITE')
+        with profiler.stage('rasterize'):
+            self._draw_polygons_on_mask(incl_polygons, annot_mask_draw, polygon_color='WHITE')
 
-        excl_polygons = read_polygons(annot_fp, scale_factor=scale_factor,
-                                      keywords=exclude_keywords)
+        excl_polygons = self._read_polygons(annot_fp, scale_factor=scale_factor,
+                                            keywords=exclude_keywords)
         log.debug(f'[{self.slide_name}] Exclude polygons ({exclude_keywords}): {excl_polygons}')
-        self._draw_polygons_on_mask(excl_polygons, annot_mask_draw, polygon_color='BLACK')
+        with profiler.stage('rasterize'):
+            self._draw_polygons_on_mask(excl_polygons, annot_mask_draw, polygon_color='BLACK')
 
         return annot_mask_img
 
-    def _prepare_empty_canvas(self, size: Tuple[int, int],
-                               bg_color: str) -> Tuple[Image.Image, ImageDraw.ImageDraw]:
+    def _read_polygons(self, annot_fp: Path, scale_factor: int, keywords: List[str]) -> List[NDArray]:
+        """Reads polygons of the given keywords from annotation file.
+
+        The annotation file is parsed only once for all masks of a slide. If `annotation_cache`
+        is set, parsed annotations are cached on disk under the hash of the file.
+
+        Args:
+            annot_fp (Path): Path to annotation file.
+            scale_factor (int): Scaling factor for coordinates in annotation file.
+            keywords (List[str]): Keywords of the polygons to be read.
+
+        Returns:
+            List[NDArray]: (n, 2) vertex arrays of the polygons.
+        """
+        if annot_fp is None or not annot_fp.exists():
+            return []
+
+        cache_dir = self.config.output_dir / 'annotation_cache' if self.config.annotation_cache else None
+        with profiler.stage('parse_annotations'):
+            polygons = load_annotations(annot_fp, cache_dir).polygons(keywords, scale_factor)
+        return [polygon for polygon in polygons if len(polygon)]
+
+    def _prepare_empty_canvas(self, size: Tuple[int, int], bg_color: str,
+                               windowed: bool = False) -> Tuple[Image.Image, ImageDraw.ImageDraw]:
         """Prepares an empty canvas with default colour.
 
         Args:
             size (Tuple[int, int]): Size of a canvas.
             bg_color (str): Default colour of a canvas.
+            windowed (bool): If set, a lazily rasterized PolygonMask serves as both
+                             the canvas and the drawing handler.
 
         Returns:
             Tuple[Image.Image, ImageDraw.ImageDraw]: Empty canvas and handler enabling drawing
                                                      on the canvas.
         """
+        if windowed:
+            canvas = PolygonMask(size, canvas_color=bg_color)
+            return canvas, canvas
+
         canvas = Image.new('L', size=size, color=bg_color)
         draw = ImageDraw.Draw(canvas)
         return canvas, draw
 
-    def _draw_polygons_on_mask(self, polygons: List[List[float]],
+    def _draw_polygons_on_mask(self, polygons: List[NDArray],
                                 canvas_draw: ImageDraw.ImageDraw,
                                 polygon_color: str) -> None:
         """Draws polygons on a canvas based on provided annotation file.
 
         Args:
-            polygons (List[List[float]]): List of polygons extracted from annotation file.
+            polygons (List[NDArray]): List of polygons extracted from annotation file.
             canvas_draw (ImageDraw.ImageDraw): ImageDraw reference to canvas.
         """
         for polygon in polygons:
             if len(polygon) < 3:
                 log.warning(f'[{self.slide_name}] Polygon {polygon} skipped because it contains less than 3 vertices.')
                 continue
-            canvas_draw.polygon(xy=polygon, outline=(polygon_color), fill=(polygon_color))
+            canvas_draw.polygon(xy=list(map(tuple, polygon.tolist())), outline=(polygon_color), fill=(polygon_color))
 
     def _combine_bg_masks(self, init_bg_mask_img: Image, annot_bg_mask_img: Image) -> Image.Image:
         """Combines two binary masks using binary AND operation.
@@ -421,12 +764,15 @@ class SlideConverter:
 
         return Image.fromarray(combined_bg_mask.astype(np.uint8) * 255, mode='L')
 
-    def _create_annot_mask(self, oslide_wsi: OpenSlide, annot_fp: Path) -> Image.Image:
+    def _create_annot_mask(self, oslide_wsi: OpenSlide, annot_fp: Path,
+                           include_keywords: Optional[List[str]] = None) -> Image.Image:
         """Draws binary annotation mask using supplied annotation file.
 
         Args:
             oslide_wsi (OpenSlide): Handler to WSI.
             annot_fp (Path): Path to annotation file.
+            include_keywords (Optional[List[str]]): Keywords of the drawn polygons. Defaults
+                                                    to `include_keywords` of the config.
 
         Returns:
             Image.Image: Binary annotation mask.
@@ -435,10 +781,13 @@ class SlideConverter:
         annot_bg_mask_size = oslide_wsi.level_dimensions[self.config.sample_level]
         annot_bg_scale_factor = int(oslide_wsi.level_downsamples[self.config.sample_level])
         canvas_color = 'BLACK'
+        if include_keywords is None:
+            include_keywords = self.config.include_keywords
         return self._draw_annotation_mask(annot_fp, annot_bg_mask_size, annot_bg_scale_factor,
-            include_keywords=self.config.include_keywords,
+            include_keywords=include_keywords,
             exclude_keywords=[],
-            canvas_color=canvas_color)
+            canvas_color=canvas_color,
+            windowed=self.config.windowed_mode)
 
     def _save_mask(self, img: Image, output_fp: Path) -> None:
         """Saves binary mask image on disk.
@@ -448,55 +797,77 @@ class SlideConverter:
             output_fp (Path): Output filepath.
         """
         # TODO: Resolve inconsistency between output dir vs output path
-        if not output_fp.parent.exists():
-            output_fp.parent.mkdir(parents=True)
-        img.save(str(output_fp), format='PNG')
+        output_fp.parent.mkdir(parents=True, exist_ok=True)
+        # Mask of a slide converted by several groups at once is replaced atomically
+        tmp_fp = output_fp.with_name(f'.{output_fp.stem}.{os.getpid()}.tmp')
+        with profiler.stage('save_mask'):
+            img.save(str(tmp_fp), format='PNG')
+        os.replace(tmp_fp, output_fp)
 
     def _tile_wsi_to_coord_map(self, oslide_wsi: OpenSlide, bg_mask_img: Image,
-                                annot_mask_img: Image) -> DataFrame:
+                                annot_mask_img: Image, annot_fp: Optional[Path] = None) -> DataFrame:
         """Builds a coordinate map dataframe using extracted ROI tiles.
 
         Args:
             oslide_wsi (OpenSlide): Handler to WSI.
             bg_mask_img (Image): Binary background mask.
             annot_mask_img (Image): Binary annotation mask.
+            annot_fp (Optional[Path]): Path to annotation file, from which the masks of
+                                       `label_schemes` are drawn.
+
+        Returns:
+            DataFrame: Coordinate map of ROI tiles.
+        """
+        log.info(f'[{self.slide_name}] Initiating slide conversion.')
+        roi_tiles = self._roi_cutter(oslide_wsi, bg_mask_img, annot_mask_img, annot_fp)
+        log.info(f'[{self.slide_name}] Slide conversion complete. Extracted {len(roi_tiles.coord_x)} tiles.')
+        return self._roi_tiles_to_coord_map(roi_tiles)
+
+    def _roi_tiles_to_coord_map(self, roi_tiles: ROITiles) -> DataFrame:
+        """Builds a coordinate map dataframe from ROI tiles.
+
+        Args:
+            roi_tiles (ROITiles): ROI tiles of a slide.
 
         Returns:
             DataFrame: Coordinate map of ROI tiles.
         """
         coord_map = {
-            'coord_x': [],          # (int)  x-coordinate of a top-left pixel of the tile
-            'coord_y': [],          # (int)  y-coordinate of a top-left pixel of the tile
-            'annot_coverage': [],   # (float) annotation overlap ratio
-            'is_cancer': [],         # (bool) cancer present in the center area of the tile
-            'slide_name': []        # (str)  slide identifier (filename)
+            'coord_x': roi_tiles.coord_x,                   # (int)  x-coordinate of a top-left pixel of the tile
+            'coord_y': roi_tiles.coord_y,                   # (int)  y-coordinate of a top-left pixel of the tile
+            'annot_coverage': roi_tiles.annot_coverage,     # (float) annotation overlap ratio
+            'is_cancer': roi_tiles.annot_coverage > 0,      # (bool) cancer present in the center area of the tile
+            'slide_name': [self.slide_name] * len(roi_tiles.coord_x)  # (str)  slide identifier (filename)
         }
-        log.info(f'[{self.slide_name}] Initiating slide conversion.')
-        for roi_tile in self._roi_cutter(oslide_wsi, bg_mask_img, annot_mask_img):
-            coord_map['coord_x'].append(roi_tile.coord_x)
-            coord_map['coord_y'].append(roi_tile.coord_y)
-            coord_map['annot_coverage'].append(roi_tile.annot_coverage)
-            coord_map['is_cancer'].append(roi_tile.annot_coverage > 0)
-            coord_map['slide_name'].append(self.slide_name)
-        log.info(f'[{self.slide_name}] Slide conversion complete. Extracted {len(coord_map["is_cancer"])} tiles.')
+        for name, label_coverage in roi_tiles.label_coverages.items():
+            coord_map[f'{name}_coverage'] = label_coverage  # (float) annotation overlap ratio of a label definition
+        if self.config.tile_store:
+            coord_map['tile_idx'] = np.arange(len(roi_tiles.coord_x))  # (int) row of the tile store
 
-        return pd.DataFrame.from_dict(coord_map)
+        coord_map_df = pd.DataFrame.from_dict(coord_map)
+        if self.config.compact_schema:
+            coord_map_df = compact_table(coord_map_df)
+        return coord_map_df
 
     def _roi_cutter(self, oslide_wsi: OpenSlide, bg_mask_img: Image,
-                     annot_mask_img: Image) -> Iterator[ROITile]:
-        """Filters extracted tiles based on tissue coverage.
+                     annot_mask_img: Image, annot_fp: Optional[Path] = None) -> ROITiles:
+        """Filters tiles of the tiling grid based on tissue coverage.
+
+        Coverages are computed for the whole grid at once using summed-area tables.
+        Tiles are returned in row-major order of the tiling grid.
 
         Args:
             oslide_wsi (OpenSlide): Handler to WSI.
             bg_mask_img (Image): Binary background mask.
             annot_mask_img (Image): Binary annotation mask.
+            annot_fp (Optional[Path]): Path to annotation file.
 
-        Yields:
-            Iterator[ROITile]: Iterator over extracted ROI tiles meeting all filtering requirements.
-                               ROI Tile contains the following information:
-                                    - coordinates of a tile (top-left pixel)
-                                    - ratio of annotated pixels w.r.t. the whole tile
-                                    - ratio of annotated pixels w.r.t. the center square of the tile
+        Returns:
+            ROITiles: ROI tiles meeting all filtering requirements.
+                      ROI Tiles contain the following information:
+                        - coordinates of a tile (top-left pixel)
+                        - ratio of annotated pixels w.r.t. the center square of the tile
+                        - the same ratio for every definition in `label_schemes`
         """
         # Scale Factors
         bg_scale_factor = int(oslide_wsi.level_downsamples[self.config.bg_level])
@@ -505,101 +876,281 @@ class SlideConverter:
 
         # Dimensions
         wsi_width, wsi_height = oslide_wsi.level_dimensions[self.config.sample_level]
+        grid_x, grid_y = grid_coordinates(wsi_width, wsi_height, self.config.step_size)
+
+        with profiler.stage('tissue'):
+            tissue_count, tissue_size = self._count_tissue(bg_mask_img, grid_x, grid_y, effective_scale_factor)
+            is_roi = self._is_bg_contain_tissue(tissue_count, tissue_size)
+        with profiler.stage('labels'):
+            if self.config.coverage_grids:
+                labels = self._determine_label_with_coverage_grids(annot_mask_img, grid_x, grid_y, is_roi,
+                                                                   tissue_count, tissue_size,
+                                                                   sampling_scale_factor)
+            else:
+                labels = self._determine_label(annot_mask_img, grid_x, grid_y, is_roi)
+        with profiler.stage('label_schemes'):
+            label_coverages = self._determine_scheme_labels(oslide_wsi, annot_fp, annot_mask_img,
+                                                            grid_x, grid_y, is_roi)
 
-        for (coord_x, coord_y) in self._tile_cutter(wsi_height, wsi_width):
-            bg_tile_img = self._crop_mask_to_tile(bg_mask_img, coord_x, coord_y, effective_scale_factor)
+        roi_row, roi_col = np.nonzero(is_roi)
+        return ROITiles(grid_x[roi_col] * sampling_scale_factor,
+                        grid_y[roi_row] * sampling_scale_factor,
+                        labels,
+                        label_coverages)
 
-            if not self._is_bg_contain_tissue(bg_tile_img):
-                continue
+    def _count_tissue(self, bg_mask_img: Image, grid_x: NDArray, grid_y: NDArray,
+                      scale_factor: int) -> Tuple[NDArray, Tuple[NDArray, NDArray]]:
+        """Counts tissue elements of the tiles of the tiling grid.
 
-            annot_tile_img = self._crop_mask_to_tile(annot_mask_img, coord_x, coord_y, 1)
-            label = self._determine_label(annot_tile_img)
+        Args:
+            bg_mask_img (Image): Binary background mask, where non-zero element is
+                                 considered a tissue.
+            grid_x (NDArray): x-coordinates of the tiling grid.
+            grid_y (NDArray): y-coordinates of the tiling grid.
+            scale_factor (int): Used for scaling coordinates to the mask resolution.
 
-            yield ROITile(coord_x * sampling_scale_factor,
-                  coord_y * sampling_scale_factor,
-                  label)
+        Returns:
+            Tuple[NDArray, Tuple[NDArray, NDArray]]: Grid of tissue counts and heights of
+                the tiles of each row and widths of the tiles of each column in the mask.
+        """
+        bg_mask_sat = integral_image(np.asarray(bg_mask_img))
+        x0, x1 = grid_x // scale_factor, (grid_x + self.config.tile_size) // scale_factor
+        y0, y1 = grid_y // scale_factor, (grid_y + self.config.tile_size) // scale_factor
+        return window_sums(bg_mask_sat, x0, x1, y0, y1), (y1 - y0, x1 - x0)
 
-    def _tile_cutter(self, wsi_height: int, wsi_width: int) -> Iterator[Tuple[int, int]]:
-        """Iterates over tile coordinates of a WSI.
+    def _is_bg_contain_tissue(self, tissue_count: NDArray,
+                               tissue_size: Tuple[NDArray, NDArray]) -> NDArray:
+        """Checks if tissue ratio of the tiles falls within acceptable range.
 
         Args:
-            wsi_height (int): WSI height.
-            wsi_width (int): WSI width.
+            tissue_count (NDArray): Grid of tissue counts.
+            tissue_size (Tuple[NDArray, NDArray]): Heights of the tiles of each row and
+                                                   widths of the tiles of each column.
 
-        Yields:
-            Iterator[Tuple[int, int]]: Iterator over tile coordinates.
+        Returns:
+            NDArray: Boolean grid; True if tissue ratio of a tile falls within acceptable range.
         """
-        for coord_y in range(0, wsi_height, self.config.step_size):
-            for coord_x in range(0, wsi_width, self.config.step_size):
-                yield coord_x, coord_y
+        tissue_coverage = self._calculate_tissue_coverage(tissue_count, np.outer(*tissue_size))
+        return (self.config.min_tissue <= tissue_coverage) & (tissue_coverage <= self.config.max_tissue)
 
-    def _crop_mask_to_tile(self, mask_img: Optional[Image.Image],
-                            coord_x: int, coord_y: int,
-                            scale_factor: int) -> Optional[Image.Image]:
-        """Crops mask to a tile specified by coordinates scaled to appropriate resolution.
+    def _calculate_tissue_coverage(self, tissue_count: NDArray, size: NDArray) -> NDArray:
+        """Calculates ratio of non-zero elements in tiles.
 
         Args:
-            mask_img (Optional[Image.Image]): Image to be cropped.
-            coord_x (int): Coordinate along x-axis.
-            coord_y (int): Coordinate along y-axis.
-            scale_factor (int): Used for scaling coordinates.
+            tissue_count (NDArray): Number of non-zero elements in tiles.
+            size (NDArray): Number of all elements in tiles.
 
         Returns:
-            Optional[Image.Image]: Cropped tiled or None
+            NDArray: Ratio of non-zero elements.
         """
-        if mask_img is None:
-            return None
-        return mask_img.crop((int(coord_x // scale_factor),
-                              int(coord_y // scale_factor),
-                              int((coord_x + self.config.tile_size) // scale_factor),
-                              int((coord_y + self.config.tile_size) // scale_factor)))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return tissue_count / size
 
-    def _is_bg_contain_tissue(self, tile_img: Image) -> bool:
-        """Checks if tissue ratio in a tile falls within acceptable range.
+    def _determine_label(self, annot_mask_img: Image, grid_x: NDArray, grid_y: NDArray,
+                          is_roi: NDArray) -> NDArray:
+        """Calculates ratio of annotated (non-zero) elements in the center area of ROI tiles.
 
         Args:
-            tile_img (Image): Extracted tile, where non-zero element is considered a tissue.
+            annot_mask_img (Image): Binary annotation mask.
+            grid_x (NDArray): x-coordinates of the tiling grid.
+            grid_y (NDArray): y-coordinates of the tiling grid.
+            is_roi (NDArray): Boolean grid of ROI tiles.
 
         Returns:
-            bool: True if tissue ratio falls within acceptable range; otherwise False.
+            NDArray: Ratio of annotated (non-zero) elements w.r.t. the center
+                     area of the tile for each ROI tile in row-major order.
         """
-        tile_np = np.array(tile_img)
-        tissue_coverage = self._calculate_tissue_coverage(tile_np, tile_np.size)
-        return self.config.min_tissue <= tissue_coverage <= self.config.max_tissue
+        center_annot_count = self._count_center_annotations(annot_mask_img, grid_x, grid_y,
+                                                            is_roi, self.center_window)
+        return self._calculate_tissue_coverage(
+            center_annot_count,
+            self.config.center_size * self.config.center_size
+        )
 
-    def _calculate_tissue_coverage(self, tile_np: NDArray, size: int) -> float:
-        """Calculates ratio of non-zero elements in a tile.
+    def _determine_label_with_coverage_grids(self, annot_mask_img: Image, grid_x: NDArray,
+                                             grid_y: NDArray, is_roi: NDArray,
+                                             tissue_count: NDArray, tissue_size: Tuple[NDArray, NDArray],
+                                             scale_factor: int) -> NDArray:
+        """Calculates labels of ROI tiles and stores the coverage grids of the slide.
+
+        Annotation counts are computed for every tile containing tissue and for every
+        center size in `coverage_center_sizes`, so that the tiles can be filtered
+        and labelled for other parameters later.
 
         Args:
-            tile_np (NDArray): Extracted tile.
-            size (int): length of a single side of a square area
+            annot_mask_img (Image): Binary annotation mask.
+            grid_x (NDArray): x-coordinates of the tiling grid.
+            grid_y (NDArray): y-coordinates of the tiling grid.
+            is_roi (NDArray): Boolean grid of ROI tiles.
+            tissue_count (NDArray): Grid of tissue counts.
+            tissue_size (Tuple[NDArray, NDArray]): Heights of the tiles of each row and
+                                                   widths of the tiles of each column.
+            scale_factor (int): Scaling factor of the sampling level.
 
         Returns:
-            float: Ratio of non-zero elements.
+            NDArray: Ratio of annotated (non-zero) elements w.r.t. the center
+                     area of the tile for each ROI tile in row-major order.
         """
-        tissue_count = np.count_nonzero(tile_np)
-        return tissue_count / size
+        center_sizes = sorted(set(self.config.coverage_center_sizes or []) | {self.config.center_size})
+        is_labelled = is_roi | (tissue_count > 0)
+
+        annot_count = []
+        for center_size in center_sizes:
+            left, upper, right, lower = self._get_center_window(center_size)
+            count = np.zeros(is_labelled.shape, dtype=np.min_scalar_type((right - left) * (lower - upper)))
+            count[is_labelled] = self._count_center_annotations(annot_mask_img, grid_x, grid_y, is_labelled,
+                                                                (left, upper, right, lower))
+            annot_count.append(count)
+
+        grids = CoverageGrids(
+            coord_x=grid_x * scale_factor,
+            coord_y=grid_y * scale_factor,
+            tissue_count=tissue_count.astype(np.min_scalar_type(tissue_count.max(initial=0))),
+            tissue_width=tissue_size[1],
+            tissue_height=tissue_size[0],
+            center_sizes=np.array(center_sizes),
+            annot_count=np.stack(annot_count),
+            is_labelled=is_labelled
+        )
+        save_coverage_grids(grids, self._get_coverage_fp())
+
+        center_annot_count = annot_count[center_sizes.index(self.config.center_size)][is_roi]
+        return self._calculate_tissue_coverage(
+            center_annot_count,
+            self.config.center_size * self.config.center_size
+        )
+
+    def _determine_scheme_labels(self, oslide_wsi: OpenSlide, annot_fp: Optional[Path],
+                                 annot_mask_img: Image, grid_x: NDArray, grid_y: NDArray,
+                                 is_roi: NDArray) -> Dict[str, NDArray]:
+        """Calculates ratio of annotated elements in the center area of ROI tiles
+        for every label definition in `label_schemes`.
+
+        Every keyword group is rasterized once and shared by all definitions of the group;
+        the annotation mask of `include_keywords` is reused. Masks of the other groups are
+        drawn one at a time and are not cached on disk.
+
+        Args:
+            oslide_wsi (OpenSlide): Handler to WSI.
+            annot_fp (Optional[Path]): Path to annotation file.
+            annot_mask_img (Image): Binary annotation mask.
+            grid_x (NDArray): x-coordinates of the tiling grid.
+            grid_y (NDArray): y-coordinates of the tiling grid.
+            is_roi (NDArray): Boolean grid of ROI tiles.
 
-    def _determine_label(self, annot_tile_img: Image) -> float:
-        """Calculates ratio of annotated (non-zero) elements in
+        Returns:
+            Dict[str, NDArray]: Ratio of annotated elements for each ROI tile in row-major
+                                order by name of the label definition.
+        """
+        label_schemes = self._get_label_schemes()
+        label_coverages = {}
+        for keywords in sorted(self._get_scheme_keyword_groups()):
+            if self.config.negative_mode:
+                mask_img = None
+            elif list(keywords) == list(self.config.include_keywords):
+                mask_img = annot_mask_img
+            else:
+                mask_img = self._create_annot_mask(oslide_wsi, annot_fp, list(keywords))
+
+            for scheme in label_schemes:
+                if tuple(scheme['include_keywords']) != keywords:
+                    continue
+                center_annot_count = self._count_center_annotations(
+                    mask_img, grid_x, grid_y, is_roi, self._get_center_window(scheme['center_size']))
+                label_coverages[scheme['name']] = self._calculate_tissue_coverage(
+                    center_annot_count,
+                    scheme['center_size'] * scheme['center_size']
+                )
+            del mask_img
+        return {scheme['name']: label_coverages[scheme['name']] for scheme in label_schemes}
+
+    def _count_center_annotations(self, annot_mask_img: Image, grid_x: NDArray, grid_y: NDArray,
+                                  is_labelled: NDArray, center_window: Tuple[int, int, int, int]) -> NDArray:
+        """Counts annotated (non-zero) elements in the center area of tiles.
+
+        Grid rows containing at least one labelled tile are split into horizontal stripes,
+        which are processed by `stripe_workers` threads sharing the annotation mask.
+        Counts of the stripes are concatenated in the order of the grid rows.
 
         Args:
-            annot_tile_img (Image): Binary annotation tile.
+            annot_mask_img (Image): Binary annotation mask.
+            grid_x (NDArray): x-coordinates of the tiling grid.
+            grid_y (NDArray): y-coordinates of the tiling grid.
+            is_labelled (NDArray): Boolean grid of tiles to be labelled.
+            center_window (Tuple[int, int, int, int]): Bounds of the center area.
 
         Returns:
-            float: Ratio of annotated (non-zero) elements w.r.t. the center
-                   area of the tile.
+            NDArray: Number of annotated elements in the center area for each
+                     labelled tile in row-major order.
         """
         if self.config.negative_mode:
-            return 0.0
+            return np.zeros(np.count_nonzero(is_labelled), dtype=np.int64)
+
+        rows = np.flatnonzero(is_labelled.any(axis=1))
+        if self.config.stripe_workers <= 1:
+            return self._count_stripe_annotations(annot_mask_img, grid_x, grid_y[rows],
+                                                  is_labelled[rows], center_window)
+
+        # Lazily loaded mask must not be loaded by several threads at once
+        annot_mask_img.load()
+        stripes = np.array_split(rows, self.config.stripe_workers * 4)
+        with ThreadPoolExecutor(self.config.stripe_workers) as executor:
+            counts = executor.map(
+                lambda rows: self._count_stripe_annotations(annot_mask_img, grid_x, grid_y[rows],
+                                                            is_labelled[rows], center_window),
+                stripes
+            )
+            return np.concatenate(list(counts))
+
+    def _count_stripe_annotations(self, annot_mask_img: Image, grid_x: NDArray, grid_y: NDArray,
+                                  is_labelled: NDArray, center_window: Tuple[int, int, int, int]) -> NDArray:
+        """Counts annotated elements in the center area of tiles of a stripe of grid rows.
+
+        The annotation mask is processed one grid row at a time and only rows containing
+        at least one labelled tile are read.
 
-        annot_tile_np = np.array(annot_tile_img)
-        center_annot_coverage = self._calculate_tissue_coverage(
-            annot_tile_np & self.center_filter_np,
-            self.config.center_size * self.config.center_size
-        )
+        Args:
+            annot_mask_img (Image): Binary annotation mask.
+            grid_x (NDArray): x-coordinates of the tiling grid.
+            grid_y (NDArray): y-coordinates of the grid rows of the stripe.
+            is_labelled (NDArray): Boolean grid of tiles of the stripe to be labelled.
+            center_window (Tuple[int, int, int, int]): Bounds of the center area.
 
-        return center_annot_coverage
+        Returns:
+            NDArray: Number of annotated elements for each labelled tile
+                     of the stripe in row-major order.
+        """
+        left, upper, right, lower = center_window
+        counts = [np.zeros(0, dtype=np.int64)]
+        for coord_y, is_labelled_row in zip(grid_y, is_labelled):
+            if not is_labelled_row.any():
+                continue
+            coord_x = grid_x[is_labelled_row]
+            counts.append(band_window_sums(annot_mask_img,
+                                           coord_y + upper, coord_y + lower,
+                                           coord_x + left, coord_x + right,
+                                           max_width=self.config.max_band_width))
+        return np.concatenate(counts)
+
+    def _write_tile_store(self, oslide_wsi: OpenSlide, coord_map_df: DataFrame) -> Path:
+        """Writes pixels of the ROI tiles into a tile store.
+
+        Args:
+            oslide_wsi (OpenSlide): Handler to WSI.
+            coord_map_df (DataFrame): Coordinate map of ROI tiles.
+
+        Returns:
+            Path: Path to the tile store.
+        """
+        tile_store_fp = self.config.output_dir / f'tiles/{self.config.group}/{self.slide_name}.npy'
+        write_tile_store(oslide_wsi, coord_map_df,
+                         tile_size=self.config.tile_size,
+                         level=self.config.sample_level,
+                         tile_store_fp=tile_store_fp)
+        return tile_store_fp
+
+    def _get_coverage_fp(self) -> Path:
+        return self.config.output_dir / f'coverage/{self.config.group}/{self.slide_name}.npz'
 
     def _get_table_key(self) -> str:
         return f'{self.config.group}/{self.slide_name}'
@@ -634,6 +1185,8 @@ class SlideConverter:
         metadata['tile_size'] = self.config.tile_size
         metadata['center_size'] = self.config.center_size
         metadata['sample_level'] = self.config.sample_level
+        if self.config.label_schemes:
+            metadata['label_schemes'] = self._get_label_schemes()
 
         tissue_type, year_patient_id, case_id, is_cancer = self.slide_name.split('-')
         year, patient_id = year_patient_id.split('_')
@@ -671,6 +1224,7 @@ class SlideConverter:
             self.slide_dir = None
             self.label_dir = None
             self.pattern = None
+            self.slide_catalog_dir = None
 
             # Output Path Parameters
             self.output_dir = None
@@ -680,6 +1234,7 @@ class SlideConverter:
             self.tile_size = None
             self.step_size = None
             self.center_size = None
+            self.levels = None
 
             # Resolution Parameters
             self.sample_level = None
@@ -695,10 +1250,28 @@ class SlideConverter:
             # Tiling Modes
             self.negative_mode = False
             self.strict_mode = False
+            self.windowed_mode = False
+            self.incremental_mode = False
+            self.content_hash = False
+            self.compact_schema = False
+            self.tile_store = False
+            self.annotation_cache = True
+            self.coverage_grids = False
+            self.coverage_center_sizes = None
+            self.label_schemes = None
             self.force = False
 
+            # Tiling Engine Parameters
+            self.max_band_width = 16384
+            self.bg_stripe_height = 2048
+
             # Paralellization Parameters
             self.max_workers = None
+            self.shard_mode = False
+            self.shard_dir = None
+            self.arrow_output = False
+            self.schedule_by = 'file_size'
+            self.stripe_workers = 1
 
             # Holding changed values
             self._default_config = {}
@@ -795,32 +1368,139 @@ class SlideConverter:
             if self.label_dir:
                 self.label_dir = Path(self.label_dir)
             self.output_dir = Path(self.output_dir)
+            if self.slide_catalog_dir:
+                self.slide_catalog_dir = Path(self.slide_catalog_dir)
+            if self.shard_dir:
+                self.shard_dir = Path(self.shard_dir)
+
+def filter_converted_slides(dataset_h5: pd.HDFStore, converter: SlideConverter,
+                            slide_fps: List[Path]) -> List[Path]:
+    """Selects slides that need to be converted in incremental mode.
+
+    Slides whose stored fingerprint matches are skipped, including slides converted without
+    a table. Outdated tables and fingerprints of changed slides are removed. Cached masks
+    of all scheduled slides are removed as well, because they are not tied to a fingerprint,
+    so that the slides are converted from scratch.
+
+    Args:
+        dataset_h5 (pd.HDFStore): Opened output dataset.
+        converter (SlideConverter): Slide converter of the current group.
+        slide_fps (List[Path]): Paths to WSI files.
+
+    Returns:
+        List[Path]: Paths to WSI files to be converted.
+    """
+    pending_fps = []
+    for slide_fp in slide_fps:
+        if converter.is_converted(dataset_h5, slide_fp):
+            log.info(f'[{slide_fp.stem}] Slide already converted. Skipping.')
+            continue
+
+        for table_key in converter.get_table_keys(slide_fp):
+            if table_key in dataset_h5:
+                log.info(f'[{slide_fp.stem}] Slide or configuration changed. Converting again.')
+                dataset_h5.remove(table_key)
+            remove_empty_table(dataset_h5, table_key)
+        converter.remove_cached_masks(slide_fp)
+        pending_fps.append(slide_fp)
+
+    log.info(f'{len(pending_fps)} of {len(slide_fps)} slides scheduled for conversion.')
+    return pending_fps
 
 def main(args):
     dataset_h5 = None
-
-    # Spawn worker for each slide; maximum `max_workers` simultaneous workers.
+    dataset_fp = None
+    shard_dir = None
+    shard_fps = set()
+    jobs = []
+    max_workers = 0
+    stripe_workers = 1
+    schedule_by = None
+    arrow_output = False
+
+    # All groups share a single output, which is either updated or overwritten
+    incremental_modes = {cfg.incremental_mode for cfg in SlideConverter.Config(args.config_fp)}
+    if len(incremental_modes) > 1:
+        raise ValueError('incremental_mode must be the same for all groups, '
+                         'as the groups share a single output file.')
+
+    # Expand slides of all groups into a single list of jobs
     for cfg in SlideConverter.Config(args.config_fp):
-        if not cfg.output_dir.exists():
-            cfg.output_dir.mkdir(parents=True)
-
-        if dataset_h5 is None:
-            dataset_h5 = pd.HDFStore((cfg.output_dir / cfg.output_dir.name).with_suffix('.h5'), 'w')
+        if dataset_fp is None:
+            dataset_fp = (cfg.output_dir / cfg.output_dir.name).with_suffix('.h5')
+            # Jobs of all groups share a single schedule and output
+            schedule_by = cfg.schedule_by
+            arrow_output = cfg.arrow_output
+
+        # Dry run neither creates nor modifies any output
+        if args.dry_run:
+            cfg.annotation_cache = False
+            if dataset_h5 is None and cfg.incremental_mode and dataset_fp.exists():
+                dataset_h5 = pd.HDFStore(dataset_fp, 'r')
+        elif dataset_h5 is None:
+            if not cfg.output_dir.exists():
+                cfg.output_dir.mkdir(parents=True)
+            dataset_h5 = pd.HDFStore(dataset_fp, 'a' if cfg.incremental_mode else 'w')
             # Copy configuration file
             shutil.copy2(args.config_fp, cfg.output_dir / args.config_fp.name)
             sw_log.set('config_file',  value=str((cfg.output_dir / args.config_fp.name).resolve()))
             sw_log.set('dataset_file', value=str(((cfg.output_dir / cfg.output_dir.name).with_suffix(".h5")).resolve()))
 
-        log.info(f'Spawning {cfg.max_workers} workers.')
-        with Pool(cfg.max_workers) as p:
-            for table_key, table, metadata in p.imap(SlideConverter(copy.deepcopy(cfg)), list(cfg.slide_dir.glob(cfg.pattern))):
-                if not table.empty:
-                    dataset_h5.append(table_key, table)
-                    dataset_h5.get_storer(table_key).attrs.metadata = metadata
+        # Each worker writes into its own shard file; shards are merged at the end
+        if cfg.shard_mode and cfg.shard_dir is None and not args.dry_run:
+            if shard_dir is None:
+                shard_dir = Path(tempfile.mkdtemp(prefix='shards-', dir=dataset_fp.parent))
+            cfg.shard_dir = shard_dir
+
+        converter = SlideConverter(copy.deepcopy(cfg))
+        slide_fps = list(cfg.slide_dir.glob(cfg.pattern))
+        if cfg.incremental_mode and args.dry_run:
+            slide_fps = [slide_fp for slide_fp in slide_fps
+                         if dataset_h5 is None or not converter.is_converted(dataset_h5, slide_fp)]
+        elif cfg.incremental_mode:
+            slide_fps = filter_converted_slides(dataset_h5, converter, slide_fps)
+        jobs += [ConversionJob(converter, slide_fp) for slide_fp in slide_fps]
+        max_workers = max(max_workers, cfg.max_workers)
+        stripe_workers = max(stripe_workers, cfg.stripe_workers)
+
+    # Spawn a single pool for all slides, largest first. Every slide worker runs
+    # `stripe_workers` threads, so that at most `max_workers` stripes run at once.
+    slide_workers = max(max_workers // stripe_workers, 1)
+    if args.dry_run:
+        dry_run(order_jobs(jobs, schedule_by), slide_workers, args.calibration_slides)
+        if dataset_h5 is not None:
+            dataset_h5.close()
+        return
+
+    summary = RunSummary()
+    for table_key, table, metadata in run_jobs(order_jobs(jobs, schedule_by), slide_workers, summary):
+        if isinstance(table, Path):
+            shard_fps.add(table)
+        elif not table.empty:
+            with summary.write_stage(table_key):
+                write_table(dataset_h5, table_key, table, metadata)
+        elif 'fingerprint' in metadata:
+            write_empty_table(dataset_h5, table_key, metadata['fingerprint'])
 
-    sw_log.to_json((cfg.output_dir / 'prov_preprocess.log').resolve())
     dataset_h5.close()
 
+    if shard_fps:
+        log.info(f'Merging {len(shard_fps)} shards.')
+        with summary.run_stage('merge_shards'):
+            merge_shards(dataset_fp, shard_fps)
+        for shard_fp in shard_fps:
+            shard_fp.unlink()
+    if shard_dir is not None:
+        shutil.rmtree(shard_dir, ignore_errors=True)
+
+    if arrow_output:
+        with summary.run_stage('arrow_output'):
+            export_arrow(dataset_fp, dataset_fp.with_suffix('.arrow'))
+
+    summary.finish()
+    summary.write(sw_log)
+    sw_log.to_json((cfg.output_dir / 'prov_preprocess.log').resolve())
+
 
 if __name__ == '__main__':
 
@@ -838,5 +1518,11 @@ if __name__ == '__main__':
 
     # Required arguments
     parser.add_argument('--config_fp', type=Path, required=True, help='Path to config file.')
+
+    # Optional arguments
+    parser.add_argument('--dry-run', dest='dry_run', action='store_true',
+                        help='Estimate tiles, dataset size, memory and runtime without converting.')
+    parser.add_argument('--calibration_slides', type=int, default=2,
+                        help='Number of slides converted in dry run to calibrate the runtime.')
     args = parser.parse_args()
     main(args)
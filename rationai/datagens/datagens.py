@@ -82,7 +82,6 @@ from rationai.datagens.datasources import DataSource
 from rationai.datagens.generators import BaseGenerator
 from rationai.utils.class_handler import get_class
 from rationai.utils.provenance import SummaryWriter
-from rationai.utils.provenance import hash_tables_by_keys
 
 import logging
 log = logging.getLogger('datagens')
@@ -149,7 +148,7 @@ class GeneratorDatagen:
 
         generator = generator_class(config=generator_config, name=generator_name, sampler=sampler, extractor=extractor)
 
-        checksums = hash_tables_by_keys(data_source.source, data_source.tables)
+        checksums = data_source.get_checksums()
         sw_log.set('splits', generator_name, value=checksums)
 
         if hasattr(sampler.config, 'seed'):
@@ -165,8 +164,12 @@ class GeneratorDatagen:
         # Get DataSource class
         data_source_class = get_class(data_source_configs['_class'])
 
-        # Load dataset path
-        dataset_path = Path(data_source_configs['_data'])
+        # Load dataset path; sharded data sources accept a list of paths
+        dataset_path = data_source_configs['_data']
+        if isinstance(dataset_path, list):
+            dataset_path = [Path(shard_path) for shard_path in dataset_path]
+        else:
+            dataset_path = Path(dataset_path)
 
         # Construct DataSource from templates
         data_sources = {}
@@ -4,19 +4,41 @@ TODO: Missing docstring.
 # Standard Imports
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List
+from typing import Tuple
 from typing import Optional
+from typing import Union
+import glob
+import hashlib
+import json
 
 # Third-party Imports
 from sklearn.model_selection import train_test_split
+from nptyping import NDArray
+from PIL import Image
 import numpy as np
 import pandas as pd
+import pyarrow as pa
 
 # Local Imports
+from rationai.data.tiler.arrow_export import TABLES_METADATA_KEY
+from rationai.data.tiler.tiling import band_window_sums
+from rationai.data.tiler.tiling import center_window
+from rationai.data.tiler.tiling import grid_coordinates
+from rationai.data.tiler.tiling import integral_image
+from rationai.data.tiler.tiling import window_sums
+from rationai.data.tiler.tiling import PolygonMask
+from rationai.utils.annotations import load_annotations
 from rationai.utils.config import ConfigProto
+from rationai.utils.schema import compact_table
+from rationai.utils.schema import compact_tables
+from rationai.utils.slide_catalog import open_slide
 from rationai.training.base.experiments import Experiment
 from rationai.utils.provenance import SummaryWriter
+from rationai.utils.provenance import hash_tables_by_keys
 
 import logging
 log = logging.getLogger('datasources')
@@ -78,28 +100,117 @@ class DataSource(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    def get_checksums(self) -> Dict[str, str]:
+        """Computes checksums of the tables of the datasource for provenance.
+
+        Returns:
+            Dict[str, str]: SHA256 hash of each table.
+        """
+        raise NotImplementedError
+
 
 class HDF5DataSource(DataSource):
-    """DataSource for loading HDF5 Storage Files"""
+    """DataSource for loading HDF5 Storage Files
+
+    Metadata of a table is read from the HDF5 file on first use and kept as an
+    immutable mapping shared by all entries of the table and by the partitions
+    of the DataSource.
+
+    Only the configured `columns` of the tables are read. In the `lazy` mode, samplers
+    build their SamplingTree from the index columns only (see `get_index`), and the
+    remaining columns of the rows of a leaf are read once the leaf is sampled
+    (see `get_rows`).
+    """
+    ROW_COLUMN = '_row'
+
     def __init__(self):
         self.dataset_fp = None
         self.tables = None
         self.source = None
+        self.compact_schema = False
+        self.columns = None
+        self.lazy = False
+        self.chunksize = None
+        self._metadata = {}
 
     def get_table(self) -> pd.DataFrame:
         """Retrieves table stored at a given table key path.
 
+        When `compact_schema` is set, coordinate map columns are loaded with compact dtypes
+        (see `rationai.utils.schema`).
+
         Args:
             table_key (str): Path within a HDF5 file to a table.
 
         Returns:
             (pd.DataFrame): DataFrame stored at given path.
         """
-        return pd.concat([
-            self.source.select(table_key)
+        tables = [
+            self._read_table(table_key, self.columns)
                 .assign(_table_key=table_key)
             for table_key in self.tables
-        ])
+        ]
+        if self.compact_schema:
+            tables = compact_tables(tables)
+        return pd.concat(tables)
+
+    def get_index(self, columns: List[str]) -> pd.DataFrame:
+        """Retrieves the index columns of all tables for the `lazy` mode.
+
+        Besides the `_table_key`, each row holds its position within the table in the
+        `_row` column, by which `get_rows` reads the remaining columns.
+
+        Args:
+            columns (List[str]): Index columns.
+
+        Returns:
+            pd.DataFrame: Index columns of all tables.
+        """
+        tables = []
+        for table_key in self.tables:
+            table = self._read_table(table_key, columns)
+            tables.append(table.assign(_table_key=table_key, **{self.ROW_COLUMN: np.arange(len(table))}))
+        if self.compact_schema:
+            tables = compact_tables(tables)
+        return pd.concat(tables)
+
+    def get_rows(self, index: pd.DataFrame) -> pd.DataFrame:
+        """Reads the configured columns of rows retrieved by `get_index`.
+
+        Args:
+            index (pd.DataFrame): Rows of the index with `_table_key` and `_row` columns.
+
+        Returns:
+            pd.DataFrame: Rows in the order of the index.
+        """
+        table_keys = np.asarray(index['_table_key'], dtype=object)
+        rows = np.asarray(index[self.ROW_COLUMN])
+        tables, positions = [], []
+        for table_key in pd.unique(table_keys):
+            table_mask = table_keys == table_key
+            coordinates, inverse = np.unique(rows[table_mask], return_inverse=True)
+            start, stop = coordinates[0], coordinates[-1] + 1
+            if stop - start <= 2 * len(coordinates):
+                # Reading a range is faster than reading dense coordinates one by one
+                table = self.source.select(table_key, start=start, stop=stop, columns=self.columns)
+                table = table.iloc[coordinates - start]
+            else:
+                table = self.source.select(table_key, where=coordinates, columns=self.columns)
+            tables.append(table.iloc[inverse].assign(_table_key=table_key))
+            positions.append(np.flatnonzero(table_mask))
+        if self.compact_schema:
+            tables = compact_tables(tables)
+        return pd.concat(tables).iloc[np.argsort(np.concatenate(positions), kind='stable')]
+
+    def _read_table(self, table_key: str, columns: Optional[List[str]]) -> pd.DataFrame:
+        """Reads columns of a table, in chunks of `chunksize` rows if set."""
+        if self.chunksize is None:
+            return self.source.select(table_key, columns=columns)
+        chunks = self.source.select(table_key, columns=columns, chunksize=self.chunksize)
+        if self.compact_schema:
+            chunks = map(compact_table, chunks)
+        return pd.concat(chunks)
 
     def get_metadata(self, entry: dict) -> dict:
         """Retrieves table metadata belonging to an entry from that table.
@@ -109,12 +220,27 @@ class HDF5DataSource(DataSource):
             entry (dict): Entry from a table.
 
         Returns:
-            dict: Metadata from a table.
+            dict: Metadata of a table, shared by all its entries; it must not be modified.
         """
-        try:
-            return self.source.get_storer(entry['_table_key']).attrs.metadata
-        except AttributeError:
-            return {}
+        return self.get_table_metadata(entry['_table_key'])
+
+    def get_table_metadata(self, table_key: str) -> dict:
+        """Retrieves metadata of a table, reading it from the HDF5 file only once.
+
+        Args:
+            table_key (str): Path within a HDF5 file to a table.
+
+        Returns:
+            dict: Metadata of a table, shared by all its entries; it must not be modified.
+        """
+        metadata = self._metadata.get(table_key)
+        if metadata is None:
+            try:
+                metadata = self.source.get_storer(table_key).attrs.metadata
+            except AttributeError:
+                metadata = {}
+            self._metadata[table_key] = metadata
+        return metadata
 
     @classmethod
     def load_dataset(cls, dataset_fp: Path, config: ConfigProto) -> Dict[HDF5DataSource]:
@@ -133,6 +259,10 @@ class HDF5DataSource(DataSource):
             and Experiment.Config.experiment_dir is not None:
             dataset_fp = Experiment.Config.experiment_dir / dataset_fp
         data_source.dataset_fp = dataset_fp
+        data_source.compact_schema = config.compact_schema
+        data_source.columns = config.columns
+        data_source.lazy = config.lazy
+        data_source.chunksize = config.chunksize
 
         source = pd.HDFStore(dataset_fp, 'r')
         data_source.source = source
@@ -171,9 +301,7 @@ class HDF5DataSource(DataSource):
             if key is None:
                 stratify = [table_key.rsplit('/', 1)[0] for table_key in tables]
             else:
-                stratify = [
-                    self.source.get_storer(table_key).attrs.metadata[key] for table_key in tables
-                ]
+                stratify = [self.get_table_metadata(table_key)[key] for table_key in tables]
             new_tables, tables = train_test_split(
                 tables,
                 train_size=int(n_tables*size),
@@ -181,19 +309,32 @@ class HDF5DataSource(DataSource):
                 random_state=seed
             )
 
-            new_ds = HDF5DataSource()
+            new_ds = type(self)()
             new_ds.dataset_fp = self.dataset_fp
             new_ds.tables = new_tables
             new_ds.source = self.source
+            new_ds.compact_schema = self.compact_schema
+            new_ds.columns = self.columns
+            new_ds.lazy = self.lazy
+            new_ds.chunksize = self.chunksize
+            new_ds._metadata = self._metadata
             data_sources.append(new_ds)
 
-        new_ds = HDF5DataSource()
+        new_ds = type(self)()
         new_ds.dataset_fp = self.dataset_fp
         new_ds.tables = tables
         new_ds.source = self.source
+        new_ds.compact_schema = self.compact_schema
+        new_ds.columns = self.columns
+        new_ds.lazy = self.lazy
+        new_ds.chunksize = self.chunksize
+        new_ds._metadata = self._metadata
         data_sources.append(new_ds)
         return data_sources
 
+    def get_checksums(self) -> Dict[str, str]:
+        return hash_tables_by_keys(self.source, self.tables)
+
     class Config(ConfigProto):
         def __init__(self, json_dict: dict):
             super().__init__(json_dict)
@@ -203,6 +344,10 @@ class HDF5DataSource(DataSource):
             self.split_probas = None
             self.split_on = None
             self.seed = None
+            self.compact_schema = None
+            self.columns = None
+            self.lazy = None
+            self.chunksize = None
 
         def parse(self):
             self.dataset_fp = self.config.get('_data', None)
@@ -211,4 +356,760 @@ class HDF5DataSource(DataSource):
             self.split_probas = self.config.get('split_probas', [1.0])
             self.split_on = self.config.get('split_on', list())
             self.seed = self.config.get('seed', np.random.randint(low=0, high=999999))
-            sw_log.set('seed', 'datasource', value=self.seed)
\ No newline at end of file
+            self.compact_schema = self.config.get('compact_schema', False)
+            self.columns = self.config.get('columns', None)
+            self.lazy = self.config.get('lazy', False)
+            self.chunksize = self.config.get('chunksize', None)
+            sw_log.set('seed', 'datasource', value=self.seed)
+
+
+class ShardedHDFStore:
+    """Read-only union of the tables of several HDF5 index files (shards).
+
+    Table keys are qualified by the name of their shard, i.e. `/<shard>/<group>/<slide>`.
+    Files are opened on first use, and at most `max_open_files` of them are kept open;
+    the least recently used file is closed first.
+    """
+    def __init__(self, shard_fps: List[Path], max_open_files: int):
+        self.shard_fps = {}
+        for shard_fp in shard_fps:
+            if shard_fp.stem in self.shard_fps:
+                raise ValueError(f'Shards {self.shard_fps[shard_fp.stem]} and {shard_fp} have the same name.')
+            self.shard_fps[shard_fp.stem] = shard_fp
+        self.max_open_files = max_open_files
+        self._stores = OrderedDict()
+
+    def list_tables(self, key: str) -> List[str]:
+        """Lists tables of a group across all shards.
+
+        Args:
+            key (str): Group of tables.
+
+        Returns:
+            List[str]: Qualified keys of the tables.
+        """
+        tables = []
+        for shard_name in self.shard_fps:
+            group = self._get_store(shard_name).get_node(str(key))
+            if group is not None:
+                tables += [f'/{shard_name}{node._v_pathname}' for node in group]
+        return tables
+
+    def select(self, table_key: str, **kwargs) -> pd.DataFrame:
+        shard_name, shard_key = self._split_key(table_key)
+        return self._get_store(shard_name).select(shard_key, **kwargs)
+
+    def get(self, table_key: str) -> pd.DataFrame:
+        shard_name, shard_key = self._split_key(table_key)
+        return self._get_store(shard_name).get(shard_key)
+
+    def get_storer(self, table_key: str):
+        shard_name, shard_key = self._split_key(table_key)
+        return self._get_store(shard_name).get_storer(shard_key)
+
+    def close(self) -> None:
+        while self._stores:
+            _, store = self._stores.popitem()
+            store.close()
+
+    def _get_store(self, shard_name: str) -> pd.HDFStore:
+        """Retrieves an opened shard, closing the least recently used one if too many are open."""
+        if shard_name in self._stores:
+            self._stores.move_to_end(shard_name)
+            return self._stores[shard_name]
+        if len(self._stores) >= self.max_open_files:
+            _, store = self._stores.popitem(last=False)
+            store.close()
+        store = pd.HDFStore(self.shard_fps[shard_name], 'r')
+        self._stores[shard_name] = store
+        return store
+
+    @staticmethod
+    def _split_key(table_key: str) -> Tuple[str, str]:
+        _, shard_name, shard_key = table_key.split('/', 2)
+        return shard_name, f'/{shard_key}'
+
+
+class ShardedHDF5DataSource(HDF5DataSource):
+    """DataSource for loading the union of tables of several HDF5 index files
+
+    `_data` is a list of index files or glob patterns, e.g. one index file per conversion
+    run. Table keys are qualified by the name (stem) of their index file, which must be
+    unique. Tables are listed when the dataset is loaded, while table data and metadata
+    are read only when needed, from at most `max_open_files` open files
+    (see `ShardedHDFStore`). All options of HDF5DataSource apply.
+    """
+    @classmethod
+    def load_dataset(cls, dataset_fp: Union[Path, List[Path]], config: ConfigProto) -> Dict[ShardedHDF5DataSource]:
+        """Loads the dataset as a union of all tables across specified keys and index files.
+
+        Args:
+            dataset_fp (Union[Path, List[Path]]): Index files or glob patterns.
+            config (ConfigProto): ShardedHDF5DataSource ConfigProto
+
+        Returns:
+            Dict[ShardedHDF5DataSource]: Dictionary of datasets.
+        """
+        data_source = cls()
+        data_source.dataset_fp = cls._resolve_shards(dataset_fp)
+        data_source.compact_schema = config.compact_schema
+        data_source.columns = config.columns
+        data_source.lazy = config.lazy
+        data_source.chunksize = config.chunksize
+
+        source = ShardedHDFStore(data_source.dataset_fp, config.max_open_files)
+        data_source.source = source
+
+        tables = []
+        for key in config.keys:
+            tables += source.list_tables(key)
+        data_source.tables = tables
+
+        if len(config.names) == 1:
+            return {config.names[0]: data_source}
+
+        data_sources = data_source.split(
+            sizes=config.split_probas,
+            key=config.split_on,
+            seed=config.seed
+        )
+        return dict(zip(config.names, data_sources))
+
+    @staticmethod
+    def _resolve_shards(dataset_fp: Union[Path, List[Path]]) -> List[Path]:
+        """Expands index files and glob patterns, relative to the experiment directory if not found."""
+        patterns = dataset_fp if isinstance(dataset_fp, list) else [dataset_fp]
+        shard_fps = []
+        for pattern in map(Path, patterns):
+            matches = sorted(Path(fp) for fp in glob.glob(str(pattern)))
+            if not matches and not pattern.is_absolute() and Experiment.Config.experiment_dir is not None:
+                matches = sorted(Path(fp) for fp in glob.glob(str(Experiment.Config.experiment_dir / pattern)))
+            if not matches:
+                raise FileNotFoundError(f'No index file matches {pattern}.')
+            shard_fps += [shard_fp for shard_fp in matches if shard_fp not in shard_fps]
+        return shard_fps
+
+    class Config(HDF5DataSource.Config):
+        def __init__(self, json_dict: dict):
+            super().__init__(json_dict)
+            self.max_open_files = None
+
+        def parse(self):
+            super().parse()
+            self.max_open_files = self.config.get('max_open_files', 16)
+
+
+class ArrowDataSource(DataSource):
+    """DataSource for loading Arrow IPC index files (see `rationai.data.tiler.arrow_export`)
+
+    The file is memory-mapped, so columns are read without copying and the mapping
+    is shared by forked workers. Tables and their metadata are listed in the schema
+    of the file, and the tables have the same keys and the same form of entries and
+    metadata as in HDF5DataSource.
+    """
+    def __init__(self):
+        self.dataset_fp = None
+        self.tables = None
+        self.source = None
+        self.compact_schema = False
+        self.columns = None
+        self._table_info = {}
+
+    def get_table(self) -> pd.DataFrame:
+        """Retrieves the union of the tables of the data source.
+
+        When `compact_schema` is set, coordinate map columns are loaded with compact dtypes
+        (see `rationai.utils.schema`).
+
+        Returns:
+            (pd.DataFrame): Rows of all tables.
+        """
+        table = pa.concat_tables([self._get_arrow_table(table_key) for table_key in self.tables]) \
+            if self.tables else self.source.slice(0, 0)
+        if self.columns is not None:
+            index_columns = [column for column in table.column_names if column.startswith('__index_level_')]
+            table = table.select(list(self.columns) + index_columns)
+        df = table.to_pandas()
+        df['_table_key'] = np.repeat(self.tables, [self._table_info[table_key]['length']
+                                                   for table_key in self.tables])
+        if self.compact_schema:
+            df = compact_tables([df])[0]
+        return df
+
+    def get_metadata(self, entry: dict) -> dict:
+        """Retrieves table metadata belonging to an entry from that table.
+
+        Args:
+            entry (dict): Entry from a table.
+
+        Returns:
+            dict: Metadata of a table, shared by all its entries; it must not be modified.
+        """
+        return self.get_table_metadata(entry['_table_key'])
+
+    def get_table_metadata(self, table_key: str) -> dict:
+        """Retrieves metadata of a table.
+
+        Args:
+            table_key (str): Key of a table.
+
+        Returns:
+            dict: Metadata of a table, shared by all its entries; it must not be modified.
+        """
+        return self._table_info[table_key]['metadata']
+
+    @classmethod
+    def load_dataset(cls, dataset_fp: Path, config: ConfigProto) -> Dict[str, ArrowDataSource]:
+        """Loads the dataset as a union of all tables across specified keys.
+
+        Args:
+            dataset_fp (Path): Path to dataset.
+            config (ConfigProto): ArrowDataSource ConfigProto
+
+        Returns:
+            Dict[str, ArrowDataSource]: Dictionary of datasets.
+        """
+        data_source = cls()
+        if not dataset_fp.exists() \
+            and not dataset_fp.is_absolute() \
+            and Experiment.Config.experiment_dir is not None:
+            dataset_fp = Experiment.Config.experiment_dir / dataset_fp
+        data_source.dataset_fp = dataset_fp
+        data_source.compact_schema = config.compact_schema
+        data_source.columns = config.columns
+
+        source = pa.ipc.open_file(pa.memory_map(str(dataset_fp), 'r')).read_all()
+        data_source.source = source
+        data_source._table_info = {
+            table_info['key']: table_info
+            for table_info in json.loads(source.schema.metadata[TABLES_METADATA_KEY])
+        }
+
+        tables = []
+        for key in config.keys:
+            group = '/' + str(key).strip('/')
+            tables += [table_key for table_key in data_source._table_info
+                       if table_key.rsplit('/', 1)[0] == group]
+        data_source.tables = tables
+
+        if len(config.names) == 1:
+            return {config.names[0]: data_source}
+
+        data_sources = data_source.split(
+            sizes=config.split_probas,
+            key=config.split_on,
+            seed=config.seed
+        )
+        return dict(zip(config.names, data_sources))
+
+    def split(self, sizes: List[float], key: Optional[str], seed: int) -> List[ArrowDataSource]:
+        """Partition the DataSource into N partitions. The size of each partition is defined by
+        `sizes` parameter. Key defines how the DataSource is split.
+
+        Args:
+            sizes (List[float]): Defines size of new DataSource as a fraction of the old one.
+            key (Optional[str]): When `None` the DataSource is split on the group of each table.
+                If specified, the value of metadata attribute key is used.
+
+        Returns:
+            List[ArrowDataSource]: List of DataSource partitions.
+        """
+        partitions = []
+        tables = self.tables
+        n_tables = len(self.tables)
+        for size in sizes[:-1]:
+            if key is None:
+                stratify = [table_key.rsplit('/', 1)[0] for table_key in tables]
+            else:
+                stratify = [self.get_table_metadata(table_key)[key] for table_key in tables]
+            new_tables, tables = train_test_split(
+                tables,
+                train_size=int(n_tables*size),
+                stratify=stratify,
+                random_state=seed
+            )
+            partitions.append(new_tables)
+        partitions.append(tables)
+
+        data_sources = []
+        for tables in partitions:
+            new_ds = ArrowDataSource()
+            new_ds.dataset_fp = self.dataset_fp
+            new_ds.tables = tables
+            new_ds.source = self.source
+            new_ds.compact_schema = self.compact_schema
+            new_ds.columns = self.columns
+            new_ds._table_info = self._table_info
+            data_sources.append(new_ds)
+        return data_sources
+
+    def get_checksums(self) -> Dict[str, str]:
+        """Computes SHA256 hashes of the content and metadata of the tables.
+
+        Returns:
+            Dict[str, str]: SHA256 hash of each table.
+        """
+        result = {}
+        for idx, table_key in enumerate(self.tables):
+            sha256 = hashlib.sha256()
+            sha256.update(pd.util.hash_pandas_object(self._get_arrow_table(table_key).to_pandas()).values)
+            for item in self.get_table_metadata(table_key).items():
+                sha256.update(str.encode(repr(item), 'UTF-8'))
+            result[f'table_{idx}_sha256'] = sha256.hexdigest()
+        return result
+
+    def _get_arrow_table(self, table_key: str) -> pa.Table:
+        """Zero-copy slice of the rows of a table."""
+        table_info = self._table_info[table_key]
+        return self.source.slice(table_info['offset'], table_info['length'])
+
+    class Config(ConfigProto):
+        def __init__(self, json_dict: dict):
+            super().__init__(json_dict)
+            self.dataset_fp = None
+            self.keys = None
+            self.names = None
+            self.split_probas = None
+            self.split_on = None
+            self.seed = None
+            self.compact_schema = None
+            self.columns = None
+
+        def parse(self):
+            self.dataset_fp = self.config.get('_data', None)
+            self.keys = self.config.get('keys', list())
+            self.names = self.config.get('names', self.keys)
+            self.split_probas = self.config.get('split_probas', [1.0])
+            self.split_on = self.config.get('split_on', list())
+            self.seed = self.config.get('seed', np.random.randint(low=0, high=999999))
+            self.compact_schema = self.config.get('compact_schema', False)
+            self.columns = self.config.get('columns', None)
+            sw_log.set('seed', 'datasource', value=self.seed)
+
+
+@dataclass
+class SlideMasks:
+    """Input files of a slide of MaskDataSource.
+
+    Attributes:
+        slide_name (str): Slide identifier (filename).
+        slide_fp (Path): Path to WSI file.
+        mask_fp (Path): Path to the final background mask cached by the slide converter.
+        annot_fp (Optional[Path]): Path to annotation file; None for negative slides.
+    """
+    slide_name: str
+    slide_fp: Path
+    mask_fp: Path
+    annot_fp: Optional[Path]
+
+
+@dataclass
+class SlideTiles:
+    """Valid tiles of a slide of MaskDataSource.
+
+    Attributes:
+        coord_x (NDArray): x-coordinates of the tiles at level 0 in row-major grid order.
+        coord_y (NDArray): y-coordinates of the tiles at level 0 in row-major grid order.
+        scale_factor (int): Scaling factor of the sample level.
+        size (Tuple[int, int]): Size of the sample level.
+    """
+    coord_x: NDArray
+    coord_y: NDArray
+    scale_factor: int
+    size: Tuple[int, int]
+
+
+class MaskDataSource(DataSource):
+    """DataSource sampling tiles directly from background masks cached by the slide converter.
+
+    No coordinate maps are needed; the data source takes the slides and the `bg_final`
+    masks from the `masks/<key>/bg/bg_final/` directories of a converter output
+    directory. Each slide is a table with the same table key as in the converter
+    output (`<key>/<slide_name>`), and `get_table` returns one row per slide.
+
+    Tiles of a slide are drawn by `sample_entries`. On first use of a slide the
+    tiling grid of the converter is filtered by tissue coverage read from the integral
+    image of the mask, and the tiles are drawn uniformly from the valid grid positions.
+    Only the drawn tiles are labelled, by rasterizing the band of the center areas
+    of the drawn tiles of each grid row from the annotation polygons. Entries and
+    metadata have the same form as the ones of HDF5DataSource, so extractors work
+    unchanged. The coverage matches the coordinate map of the converter up to pixels
+    on polygon boundaries (see `PolygonMask`).
+
+    Valid tiles of a slide are kept once found, so `count_tiles` reads the mask of
+    every slide only once and never the annotations. Annotation masks are built
+    by `sample_entries`, and those of at most `max_open_slides` slides are kept at once.
+    """
+    def __init__(self):
+        self.dataset_fp = None
+        self.tables = None
+        self.source = None
+        self.config = None
+        self._slide_tiles = {}
+        self._annot_masks = OrderedDict()
+
+    def get_table(self) -> pd.DataFrame:
+        """Retrieves table of the slides of the data source.
+
+        Returns:
+            pd.DataFrame: Table with `slide_name` and `_table_key` of each slide.
+        """
+        return pd.DataFrame({
+            'slide_name': [self.source[table_key].slide_name for table_key in self.tables],
+            '_table_key': self.tables
+        })
+
+    def get_metadata(self, entry: dict) -> dict:
+        """Retrieves metadata of the slide of an entry.
+
+        Args:
+            entry (dict): Entry from a table.
+
+        Returns:
+            dict: Metadata of the slide as stored by the slide converter.
+        """
+        return self.get_table_metadata(entry['_table_key'])
+
+    def get_table_metadata(self, table_key: str) -> dict:
+        """Builds metadata of a slide as stored by the slide converter.
+
+        Args:
+            table_key (str): Table key of the slide.
+
+        Returns:
+            dict: Metadata of the slide.
+        """
+        slide_masks = self.source[table_key]
+        metadata = dict()
+        metadata['slide_fp'] = str(slide_masks.slide_fp)
+        metadata['annot_fp'] = str(slide_masks.annot_fp)
+        metadata['tile_size'] = self.config.tile_size
+        metadata['center_size'] = self.config.center_size
+        metadata['sample_level'] = self.config.sample_level
+
+        tissue_type, year_patient_id, case_id, is_cancer = slide_masks.slide_name.split('-')
+        year, patient_id = year_patient_id.split('_')
+
+        metadata['tissue_type'] = tissue_type
+        metadata['patient_id'] = patient_id
+        metadata['is_cancer'] = is_cancer
+        metadata['case_id'] = case_id
+        metadata['year'] = year
+        return metadata
+
+    def count_tiles(self, table_key: str) -> int:
+        """Retrieves number of valid tiles of a slide.
+
+        Args:
+            table_key (str): Table key of the slide.
+
+        Returns:
+            int: Number of tiles the slide converter would extract from the slide.
+        """
+        return len(self._get_slide_tiles(table_key).coord_x)
+
+    def sample_entries(self, table_key: str, n: int, rng: np.random.Generator) -> List[dict]:
+        """Draws random tiles of a slide uniformly and labels them.
+
+        Args:
+            table_key (str): Table key of the slide.
+            n (int): Number of tiles to be drawn.
+            rng (np.random.Generator): Random number generator.
+
+        Returns:
+            List[dict]: Entries of the coordinate map of the drawn tiles.
+        """
+        slide_tiles = self._get_slide_tiles(table_key)
+        idx = rng.integers(low=0, high=len(slide_tiles.coord_x), size=n)
+        coord_x, coord_y = slide_tiles.coord_x[idx], slide_tiles.coord_y[idx]
+        annot_mask = self._get_annot_mask(table_key, slide_tiles)
+        annot_coverage = self._calculate_annot_coverage(annot_mask, slide_tiles.scale_factor, coord_x, coord_y)
+        slide_name = self.source[table_key].slide_name
+        return [{
+            'coord_x': int(x),
+            'coord_y': int(y),
+            'annot_coverage': float(coverage),
+            'is_cancer': bool(coverage > 0),
+            'slide_name': slide_name,
+            '_table_key': table_key
+        } for x, y, coverage in zip(coord_x, coord_y, annot_coverage)]
+
+    def _get_slide_tiles(self, table_key: str) -> SlideTiles:
+        """Retrieves valid tiles of a slide, computing them on first use.
+
+        Args:
+            table_key (str): Table key of the slide.
+
+        Returns:
+            SlideTiles: Valid tiles of the slide.
+        """
+        if table_key not in self._slide_tiles:
+            self._slide_tiles[table_key] = self._find_slide_tiles(self.source[table_key])
+        return self._slide_tiles[table_key]
+
+    def _get_annot_mask(self, table_key: str, slide_tiles: SlideTiles) -> Optional[PolygonMask]:
+        """Retrieves annotation mask of a slide, closing the least recently used one if necessary.
+
+        Args:
+            table_key (str): Table key of the slide.
+            slide_tiles (SlideTiles): Valid tiles of the slide.
+
+        Returns:
+            Optional[PolygonMask]: Annotation mask; None for negative slides.
+        """
+        if table_key in self._annot_masks:
+            self._annot_masks.move_to_end(table_key)
+            return self._annot_masks[table_key]
+
+        annot_mask = self._create_annot_mask(self.source[table_key], slide_tiles.size, slide_tiles.scale_factor)
+        self._annot_masks[table_key] = annot_mask
+        if len(self._annot_masks) > self.config.max_open_slides:
+            self._annot_masks.popitem(last=False)
+        return annot_mask
+
+    def _find_slide_tiles(self, slide_masks: SlideMasks) -> SlideTiles:
+        """Filters tiles of the tiling grid of the slide converter by tissue coverage.
+
+        The background level of the mask is the slide level of the same size.
+
+        Args:
+            slide_masks (SlideMasks): Input files of the slide.
+
+        Returns:
+            SlideTiles: Valid tiles of the slide.
+        """
+        with Image.open(slide_masks.mask_fp) as bg_mask_img:
+            bg_mask_np = np.asarray(bg_mask_img)
+        mask_size = (bg_mask_np.shape[1], bg_mask_np.shape[0])
+        with open_slide(slide_masks.slide_fp, self.config.slide_catalog_dir) as oslide_wsi:
+            level_dimensions = oslide_wsi.level_dimensions
+            level_downsamples = oslide_wsi.level_downsamples
+        if mask_size not in level_dimensions:
+            raise ValueError(f'Mask {slide_masks.mask_fp} of size {mask_size} matches no level '
+                             f'of slide {slide_masks.slide_fp}.')
+        bg_level = level_dimensions.index(mask_size)
+
+        # Scale Factors
+        bg_scale_factor = int(level_downsamples[bg_level])
+        sampling_scale_factor = int(level_downsamples[self.config.sample_level])
+        effective_scale_factor = bg_scale_factor // sampling_scale_factor
+
+        # Tissue coverage of the tiling grid
+        wsi_width, wsi_height = level_dimensions[self.config.sample_level]
+        grid_x, grid_y = grid_coordinates(wsi_width, wsi_height, self.config.step_size)
+        x0, x1 = grid_x // effective_scale_factor, (grid_x + self.config.tile_size) // effective_scale_factor
+        y0, y1 = grid_y // effective_scale_factor, (grid_y + self.config.tile_size) // effective_scale_factor
+        tissue_count = window_sums(integral_image(bg_mask_np), x0, x1, y0, y1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tissue_coverage = tissue_count / np.outer(y1 - y0, x1 - x0)
+        is_roi = (self.config.min_tissue <= tissue_coverage) & (tissue_coverage <= self.config.max_tissue)
+
+        roi_row, roi_col = np.nonzero(is_roi)
+        return SlideTiles(coord_x=(grid_x[roi_col] * sampling_scale_factor).astype(np.int32),
+                          coord_y=(grid_y[roi_row] * sampling_scale_factor).astype(np.int32),
+                          scale_factor=sampling_scale_factor,
+                          size=(wsi_width, wsi_height))
+
+    def _create_annot_mask(self, slide_masks: SlideMasks, size: Tuple[int, int],
+                           scale_factor: int) -> Optional[PolygonMask]:
+        """Builds lazily rasterized annotation mask of a slide at the sample level.
+
+        Args:
+            slide_masks (SlideMasks): Input files of the slide.
+            size (Tuple[int, int]): Size of the sample level.
+            scale_factor (int): Scaling factor of the sample level.
+
+        Returns:
+            Optional[PolygonMask]: Annotation mask; None for negative slides.
+        """
+        if slide_masks.annot_fp is None:
+            return None
+
+        cache_dir = self.dataset_fp / 'annotation_cache' if self.config.annotation_cache else None
+        polygons = load_annotations(slide_masks.annot_fp, cache_dir).polygons(self.config.include_keywords,
+                                                                              scale_factor)
+        annot_mask = PolygonMask(size, canvas_color='BLACK')
+        for polygon in polygons:
+            if len(polygon) >= 3:
+                annot_mask.polygon(xy=list(map(tuple, polygon.tolist())), outline='WHITE', fill='WHITE')
+        return annot_mask
+
+    def _calculate_annot_coverage(self, annot_mask: Optional[PolygonMask], scale_factor: int,
+                                  coord_x: NDArray, coord_y: NDArray) -> NDArray:
+        """Calculates ratio of annotated elements in the center area of tiles.
+
+        Args:
+            annot_mask (Optional[PolygonMask]): Annotation mask; None for negative slides.
+            scale_factor (int): Scaling factor of the sample level.
+            coord_x (NDArray): x-coordinates of the tiles at level 0.
+            coord_y (NDArray): y-coordinates of the tiles at level 0.
+
+        Returns:
+            NDArray: Ratio of annotated elements w.r.t. the center area of each tile.
+        """
+        if annot_mask is None:
+            return np.zeros(len(coord_x))
+
+        # Tiles of the same grid row share one band of the mask; parts of the center
+        # area outside of the slide are not annotated
+        left, upper, right, lower = center_window(self.config.tile_size, self.config.center_size)
+        tile_x, tile_y = coord_x // scale_factor, coord_y // scale_factor
+        order = np.lexsort((tile_x, tile_y))
+        row_y, row_starts = np.unique(tile_y[order], return_index=True)
+        center_annot_count = np.zeros(len(coord_x), dtype=np.int64)
+        for y, row_order in zip(row_y, np.split(order, row_starts[1:])):
+            center_annot_count[row_order] = band_window_sums(annot_mask, y + upper, y + lower,
+                                                             tile_x[row_order] + left, tile_x[row_order] + right,
+                                                             max_width=self.config.max_band_width)
+        return center_annot_count / (self.config.center_size * self.config.center_size)
+
+    @classmethod
+    def load_dataset(cls, dataset_fp: Path, config: ConfigProto) -> Dict[MaskDataSource]:
+        """Loads the slides with a background mask cached under the specified keys.
+
+        Args:
+            dataset_fp (Path): Path to the output directory of the slide converter.
+            config (ConfigProto): Mask DataSource ConfigProto
+
+        Returns:
+            Dict[MaskDataSource]: Dictionary of datasets.
+        """
+        data_source = cls()
+        if not dataset_fp.exists() \
+            and not dataset_fp.is_absolute() \
+            and Experiment.Config.experiment_dir is not None:
+            dataset_fp = Experiment.Config.experiment_dir / dataset_fp
+        data_source.dataset_fp = dataset_fp
+        data_source.config = config
+
+        slide_fps = {slide_fp.stem: slide_fp
+                     for slide_dir in config.slide_dirs
+                     for slide_fp in sorted(slide_dir.glob(config.pattern))}
+        source = {}
+        for key in config.keys:
+            for mask_fp in sorted((dataset_fp / 'masks' / str(key) / 'bg' / 'bg_final').glob('*.PNG')):
+                if mask_fp.stem not in slide_fps:
+                    log.warning(f'Slide of mask {mask_fp} not found.')
+                    continue
+                annot_fps = [annot_fp for annot_fp in (label_dir / f'{mask_fp.stem}.xml'
+                                                       for label_dir in config.label_dirs)
+                             if annot_fp.exists()]
+                source[f'/{key}/{mask_fp.stem}'] = SlideMasks(
+                    slide_name=mask_fp.stem,
+                    slide_fp=slide_fps[mask_fp.stem],
+                    mask_fp=mask_fp,
+                    annot_fp=annot_fps[0].resolve() if annot_fps else None
+                )
+        data_source.source = source
+        data_source.tables = list(source)
+
+        if len(config.names) == 1:
+            return {config.names[0]: data_source}
+
+        data_sources = data_source.split(
+            sizes=config.split_probas,
+            key=config.split_on,
+            seed=config.seed
+        )
+        return dict(zip(config.names, data_sources))
+
+    def split(self, sizes: List[float], key: Optional[str], seed: int) -> List[MaskDataSource]:
+        """Partition the DataSource into N partitions. The size of each partition is defined by
+        `sizes` parameter. Key defines how the DataSource is split.
+
+        Args:
+            sizes (List[float]): Defines size of new DataSource as a fraction of the old one.
+            key (Optional[str]): When `None` the DataSource is split on the key of each slide.
+                If specified, the value of metadata attribute key is used.
+
+        Returns:
+            List[MaskDataSource]: List of DataSource partitions.
+        """
+        partitions = []
+        tables = self.tables
+        n_tables = len(self.tables)
+        for size in sizes[:-1]:
+            if key is None:
+                stratify = [table_key.rsplit('/', 1)[0] for table_key in tables]
+            else:
+                stratify = [self.get_table_metadata(table_key)[key] for table_key in tables]
+            new_tables, tables = train_test_split(
+                tables,
+                train_size=int(n_tables*size),
+                stratify=stratify,
+                random_state=seed
+            )
+            partitions.append(new_tables)
+        partitions.append(tables)
+
+        data_sources = []
+        for tables in partitions:
+            new_ds = MaskDataSource()
+            new_ds.dataset_fp = self.dataset_fp
+            new_ds.tables = tables
+            new_ds.source = self.source
+            new_ds.config = self.config
+            data_sources.append(new_ds)
+        return data_sources
+
+    def get_checksums(self) -> Dict[str, str]:
+        """Computes SHA256 hashes of the background masks of the slides.
+
+        Returns:
+            Dict[str, str]: SHA256 hash of the mask of each slide.
+        """
+        return {f'table_{idx}_sha256': hashlib.sha256(self.source[table_key].mask_fp.read_bytes()).hexdigest()
+                for idx, table_key in enumerate(self.tables)}
+
+    class Config(ConfigProto):
+        def __init__(self, json_dict: dict):
+            super().__init__(json_dict)
+            self.keys = None
+            self.names = None
+            self.split_probas = None
+            self.split_on = None
+            self.seed = None
+
+            # Input Parameters
+            self.slide_dirs = None
+            self.label_dirs = None
+            self.pattern = None
+            self.slide_catalog_dir = None
+            self.annotation_cache = None
+
+            # Tiling Parameters (as used by the slide converter)
+            self.tile_size = None
+            self.step_size = None
+            self.center_size = None
+            self.sample_level = None
+            self.include_keywords = None
+            self.min_tissue = None
+            self.max_tissue = None
+
+            self.max_band_width = None
+            self.max_open_slides = None
+
+        def parse(self):
+            self.keys = self.config.get('keys', list())
+            self.names = self.config.get('names', self.keys)
+            self.split_probas = self.config.get('split_probas', [1.0])
+            self.split_on = self.config.get('split_on', list())
+            self.seed = self.config.get('seed', np.random.randint(low=0, high=999999))
+            sw_log.set('seed', 'datasource', value=self.seed)
+
+            self.slide_dirs = [Path(slide_dir) for slide_dir in self.config['slide_dirs']]
+            self.label_dirs = [Path(label_dir) for label_dir in self.config.get('label_dirs', list())]
+            self.pattern = self.config.get('pattern', '*.mrxs')
+            self.slide_catalog_dir = self.config.get('slide_catalog_dir', None)
+            self.annotation_cache = self.config.get('annotation_cache', True)
+
+            self.tile_size = self.config['tile_size']
+            self.step_size = self.config['step_size']
+            self.center_size = self.config['center_size']
+            self.sample_level = self.config['sample_level']
+            self.include_keywords = self.config.get('include_keywords', list())
+            self.min_tissue = self.config['min_tissue']
+            self.max_tissue = self.config['max_tissue']
+
+            self.max_band_width = self.config.get('max_band_width', 16384)
+            self.max_open_slides = self.config.get('max_open_slides', 64)
@@ -2,30 +2,34 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from dataclasses import asdict
 from pathlib import Path
 from typing import List
 from typing import Optional
 from typing import Tuple
+from typing import Union
 from pydoc import locate
 
 # Third-party Imports
 import numpy as np
 import openslide
-from PIL import Image
 from nptyping import NDArray
 from openslide import OpenSlide
 
 # Local Imports
 from rationai.datagens.augmenters import ImgAugAugmenter
 from rationai.datagens.samplers import SampledEntry
+from rationai.datagens.samplers import SampledEpoch
+from rationai.data.tiler.tile_store import open_tile_store
+from rationai.data.tiler.tile_store import read_tile
 from rationai.utils.config import ConfigProto
 
 
 class Extractor(ABC):
 
     @abstractmethod
-    def __call__(self, sampled_entries: List[SampledEntry]):
+    def __call__(self, sampled_entries: Union[List[SampledEntry], SampledEpoch]):
         """Process sampled entries into valid network input (and output)"""
 
 
@@ -33,15 +37,21 @@ class OpenslideExtractor(Extractor):
     def __init__(self, augmenter: Optional[ImgAugAugmenter], *args, **kwargs):
         self.augmenter = augmenter
 
-    def __call__(self, sampled_entries: List[SampledEntry]) -> Tuple[np.ndarray, np.ndarray]:
+    def __call__(self, sampled_entries: Union[List[SampledEntry], SampledEpoch]) -> Tuple[np.ndarray, np.ndarray]:
         """Converts entries into network input/label tuple.
 
         Args:
-            sampled_entries (List[dict]): Entries from a DataFrame
+            sampled_entries (Union[List[SampledEntry], SampledEpoch]): Sampled entries
 
         Returns:
             Tuple[NDArray, NDArray]: Network inputs and labels.
         """
+        if isinstance(sampled_entries, SampledEpoch):
+            inputs, labels = self._process_epoch(sampled_entries)
+            if self.augmenter is not None:
+                inputs = np.array([self._augment_input(x) for x in inputs])
+            return self._normalize_input(inputs, labels)
+
         inputs, labels = [], []
         for sampled_entry in sampled_entries:
             x, y = self._process_entry(sampled_entry)
@@ -52,6 +62,51 @@ class OpenslideExtractor(Extractor):
             labels.append(y)
         return np.array(inputs), np.array(labels)
 
+    def _process_epoch(self, sampled_epoch: SampledEpoch) -> Tuple[NDArray, NDArray]:
+        """Extracts inputs and labels of entries column-wise, one table at a time.
+
+        Every slide of the entries is opened once and its entries are passed
+        to `_process_table` together.
+
+        Args:
+            sampled_epoch (SampledEpoch): Sampled entries
+
+        Returns:
+            Tuple[NDArray, NDArray]: Network inputs and labels in the order of the entries.
+        """
+        table_ids, inverse = np.unique(sampled_epoch.table_ids, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        table_rows = np.split(order, np.cumsum(np.bincount(inverse))[:-1])
+
+        inputs, labels = None, None
+        for table_id, rows in zip(table_ids, table_rows):
+            x, y = self._process_table(sampled_epoch, rows, sampled_epoch.table_metadata[table_id])
+            if inputs is None:
+                inputs = np.empty((len(sampled_epoch),) + x.shape[1:], dtype=x.dtype)
+                labels = np.empty((len(sampled_epoch),) + y.shape[1:], dtype=y.dtype)
+            inputs[rows], labels[rows] = x, y
+        return inputs, labels
+
+    def _process_table(self, sampled_epoch: SampledEpoch, rows: NDArray, metadata: dict) -> Tuple[NDArray, NDArray]:
+        """Extracts tiles of entries of a single slide.
+
+        Args:
+            sampled_epoch (SampledEpoch): Sampled entries
+            rows (NDArray): Entries of the slide
+            metadata (dict): Metadata of the slide
+
+        Returns:
+            Tuple[NDArray, NDArray]: Inputs and labels of the entries.
+        """
+        wsi = self._open_slide(str(Path(metadata['slide_fp']).resolve()))
+        x = np.array([
+            self._extract_tile(wsi, (int(coord_x), int(coord_y)), metadata['tile_size'], metadata['sample_level'])
+            for coord_x, coord_y in zip(sampled_epoch.get_column('coord_x')[rows],
+                                        sampled_epoch.get_column('coord_y')[rows])
+        ])
+        wsi.close()
+        return x, sampled_epoch.get_column('is_cancer')[rows]
+
     def _process_entry(self, sampled_entry: SampledEntry) -> Tuple[NDArray, NDArray]:
         """Extracts a tile from a slide at coordinates specified by the parsed entry.
 
@@ -102,12 +157,7 @@ class OpenslideExtractor(Extractor):
         Returns:
             NDArray: RGB Tile represented as numpy array.
         """
-        bg_tile = Image.new('RGB', (tile_size, tile_size), '#FFFFFF')
-        im_tile = wsi.read_region(
-            location=coords, level=level, size=(tile_size, tile_size)
-        )
-        bg_tile.paste(im_tile, None, im_tile)
-        return np.array(bg_tile)
+        return read_tile(wsi, coords, tile_size, level)
 
     @staticmethod
     def _normalize_input(x: NDArray, y: NDArray) -> Tuple[NDArray, NDArray]:
@@ -150,7 +200,13 @@ class CytokeratinExtractor(OpenslideExtractor):
     def __init__(self, augmenter: Optional[ImgAugAugmenter], *args, **kwargs):
         self.augmenter = augmenter
 
-    def __call__(self, sampled_entries: List[SampledEntry]) -> Tuple[np.ndarray, np.ndarray]:
+    def __call__(self, sampled_entries: Union[List[SampledEntry], SampledEpoch]) -> Tuple[np.ndarray, np.ndarray]:
+        if isinstance(sampled_entries, SampledEpoch):
+            inputs, labels = self._process_epoch(sampled_entries)
+            if self.augmenter is not None:
+                inputs, labels = map(np.array, zip(*[self._augment_input(x, y) for x, y in zip(inputs, labels)]))
+            return self._normalize_input(inputs, labels)
+
         inputs, labels = [], []
         for sampled_entry in sampled_entries:
             x, y = self._process_entry(sampled_entry)
@@ -181,6 +237,30 @@ class CytokeratinExtractor(OpenslideExtractor):
         # TODO: Slicing required by binary mask on the output. Make it configurable and move to extract_tile?
         return he, ce[:,:,:1]
 
+    def _process_table(self, sampled_epoch: SampledEpoch, rows: NDArray, metadata: dict) -> Tuple[NDArray, NDArray]:
+        """Extracts H&E and cytokeratin tiles of entries of a single slide.
+
+        Args:
+            sampled_epoch (SampledEpoch): Sampled entries
+            rows (NDArray): Entries of the slide
+            metadata (dict): Metadata of the slide
+
+        Returns:
+            Tuple[NDArray, NDArray]: Inputs and labels of the entries.
+        """
+        coords = [(int(coord_x), int(coord_y)) for coord_x, coord_y in zip(sampled_epoch.get_column('coord_x')[rows],
+                                                                           sampled_epoch.get_column('coord_y')[rows])]
+        he_wsi = self._open_slide(metadata['slide_fp'])
+        he = np.array([self._extract_tile(he_wsi, xy, metadata['tile_size'], metadata['sample_level'])
+                       for xy in coords])
+        he_wsi.close()
+
+        ce_wsi = self._open_slide(metadata['annot_fp'])
+        ce = np.array([self._extract_tile(ce_wsi, xy, metadata['tile_size'], metadata['sample_level'])
+                       for xy in coords])
+        ce_wsi.close()
+        return he, ce[:,:,:,:1]
+
     def _augment_input(self, x: NDArray, y: NDArray) -> Tuple[NDArray, NDArray]:
         y = self.augmenter.to_segmap(y)
         x,y = self.augmenter(image=x, segmentation_maps=y)
@@ -212,11 +292,76 @@ class CytokeratinExtractor(OpenslideExtractor):
         def parse(self):
             pass
 
+class TileStoreExtractor(OpenslideExtractor):
+    """Extracts tiles from tile stores written by the slide converter.
+
+    Tile stores are memory-mapped and a tile is a view into the store, so neither
+    the slide nor the tile is decoded. At most `max_open_stores` stores are kept
+    open at once.
+    """
+    def __init__(self, config: ConfigProto, augmenter: Optional[ImgAugAugmenter], *args, **kwargs):
+        self.config = config
+        self.augmenter = augmenter
+        self._tile_stores = OrderedDict()
+
+    def _process_entry(self, sampled_entry: SampledEntry) -> Tuple[NDArray, NDArray]:
+        """Slices a tile from the tile store of the slide of an entry.
+
+        Args:
+            sampled_entry (SampledEntry): Sampled entry
+
+        Returns:
+            Tuple[NDArray, NDArray]: Input/label tuple
+        """
+        tiles = self._open_tile_store(sampled_entry.metadata['tile_store_fp'])
+        x = tiles[sampled_entry.entry['tile_idx']]
+        y = sampled_entry.entry['is_cancer']
+        return x, y
+
+    def _process_table(self, sampled_epoch: SampledEpoch, rows: NDArray, metadata: dict) -> Tuple[NDArray, NDArray]:
+        """Slices tiles of entries of a single slide from its tile store at once.
+
+        Args:
+            sampled_epoch (SampledEpoch): Sampled entries
+            rows (NDArray): Entries of the slide
+            metadata (dict): Metadata of the slide
+
+        Returns:
+            Tuple[NDArray, NDArray]: Inputs and labels of the entries.
+        """
+        tiles = self._open_tile_store(metadata['tile_store_fp'])
+        return tiles[sampled_epoch.get_column('tile_idx')[rows]], sampled_epoch.get_column('is_cancer')[rows]
+
+    def _open_tile_store(self, tile_store_fp: str) -> NDArray:
+        """Retrieves an open tile store, closing the least recently used one if necessary.
+
+        Args:
+            tile_store_fp (str): Path to the tile store.
+
+        Returns:
+            NDArray: Memory-mapped tile store.
+        """
+        if tile_store_fp in self._tile_stores:
+            self._tile_stores.move_to_end(tile_store_fp)
+        else:
+            self._tile_stores[tile_store_fp] = open_tile_store(Path(tile_store_fp))
+            if len(self._tile_stores) > self.config.max_open_stores:
+                self._tile_stores.popitem(last=False)
+        return self._tile_stores[tile_store_fp]
+
+    class Config(ConfigProto):
+        def __init__(self, json_dict: dict):
+            super().__init__(json_dict)
+            self.max_open_stores = None
+
+        def parse(self):
+            self.max_open_stores = self.config.get('max_open_stores', 128)
+
 class GenericExtractor(Extractor):
     def __init__(self, config: ConfigProto, *args, **kwargs):
         self.config = config
 
-    def __call__(self, sampled_entries: List[SampledEntry]) -> dict[str, np.ndarray]:
+    def __call__(self, sampled_entries: Union[List[SampledEntry], SampledEpoch]) -> dict[str, np.ndarray]:
         return_dict = {}
         for return_key, return_list_def in self.config.return_definition.items():
             return_dict[return_key] = np.transpose([
@@ -249,6 +394,16 @@ class GenericExtractor(Extractor):
         # Retrieve cell name
         column_name = return_def[cell_type]
 
+        # Columns of a SampledEpoch are retrieved at once
+        if isinstance(sampled_entries, SampledEpoch) and cell_type != 'value':
+            if cell_type == 'entry':
+                values = sampled_entries.get_column(column_name)
+            else:
+                values = sampled_entries.get_metadata_column(column_name)
+            if values.dtype == object:
+                values = np.array(values.tolist())
+            return values if 'dtype' not in return_def else values.astype(dtype)
+
         # Return result
         return np.array([
             dtype(asdict(sampled_entry)[cell_type][column_name])
@@ -5,6 +5,7 @@ import logging
 import hashlib
 from time import time
 from typing import List, Tuple
+from typing import Union
 from typing import NoReturn
 
 import numpy as np
@@ -15,6 +16,7 @@ from torch.utils.data import Dataset
 
 from rationai.datagens.extractors import Extractor
 from rationai.datagens.samplers import SampledEntry
+from rationai.datagens.samplers import SampledEpoch
 from rationai.datagens.samplers import TreeSampler
 from rationai.utils.utils import divide_round_up
 from rationai.utils.config import ConfigProto
@@ -43,9 +45,9 @@ class BaseGenerator:
         self.config = config
         self.sampler = sampler
         self.extractor = extractor
-        self.epoch_samples: list[SampledEntry] = []
+        self.epoch_samples: Union[List[SampledEntry], SampledEpoch] = []
 
-    def _generate_samples(self) -> List[SampledEntry]:
+    def _generate_samples(self) -> Union[List[SampledEntry], SampledEpoch]:
         """Get a sampled epoch as a pandas dataframe.
 
         Return
@@ -106,6 +108,8 @@ class BaseGeneratorKeras(BaseGenerator, Sequence):
 
     def get_epoch_samples_digest(self):
         """For now extremely naive solution for digest for provenance sample usecase."""
+        if isinstance(self.epoch_samples, SampledEpoch):
+            return self.epoch_samples.get_digest()
         s = str(self.epoch_samples)
         return hashlib.sha256(s.encode('UTF-8')).hexdigest()
 
@@ -5,11 +5,22 @@ TODO: Missing docstring.
 from abc import abstractmethod
 import logging
 from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+from typing import Dict
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Union
+import hashlib
+import json
+import os
+import shutil
 
 # Third-party Imports
 import numpy as np
+import pandas as pd
+from nptyping import NDArray
 
 # Local Imports
 from rationai.datagens.datasources import DataSource
@@ -29,26 +40,151 @@ class SampledEntry:
     metadata: dict
 
 
+class SampledEpoch:
+    """SampledEpoch holds sampled entries column-wise.
+
+    Every column of the entries is a NumPy array, and the table of each entry is
+    an index into the keys and metadata of the sampled tables, so an epoch of
+    millions of entries consists of a few arrays that are sliced into batches
+    without copying and pickled quickly.
+
+    The epoch behaves as a list of SampledEntry: indexing by an integer and
+    iteration return SampledEntry objects, indexing by a slice returns a SampledEpoch.
+    """
+    def __init__(self, columns: Dict[str, NDArray], table_ids: NDArray,
+                 table_keys: List[str], table_metadata: List[dict]):
+        self.columns = columns
+        self.table_ids = table_ids
+        self.table_keys = table_keys
+        self.table_metadata = table_metadata
+
+    @classmethod
+    def from_table(cls, df: pd.DataFrame, data_source: DataSource) -> 'SampledEpoch':
+        """Creates an epoch from sampled rows with the `_table_key` column.
+
+        Args:
+            df (pd.DataFrame): Sampled rows.
+            data_source (DataSource): DataSource of the rows.
+
+        Returns:
+            SampledEpoch: Sampled entries.
+        """
+        table_ids, table_keys = pd.factorize(np.asarray(df['_table_key'], dtype=object))
+        columns = {col: df[col].to_numpy() for col in df.columns if col != '_table_key'}
+        table_metadata = [data_source.get_metadata({'_table_key': table_key}) for table_key in table_keys]
+        return cls(columns, table_ids, list(table_keys), table_metadata)
+
+    def get_column(self, col: str) -> NDArray:
+        """Retrieves a column of the entries.
+
+        Args:
+            col (str): Column name.
+
+        Returns:
+            NDArray: Values of the entries.
+        """
+        if col == '_table_key':
+            return np.asarray(self.table_keys, dtype=object)[self.table_ids]
+        return self.columns[col]
+
+    def get_metadata_column(self, key: str) -> NDArray:
+        """Retrieves a metadata attribute of the tables of the entries.
+
+        Args:
+            key (str): Metadata attribute.
+
+        Returns:
+            NDArray: Values of the entries.
+        """
+        values = np.asarray([metadata[key] for metadata in self.table_metadata])
+        return values[self.table_ids]
+
+    def get_digest(self) -> str:
+        """Computes SHA256 hash of the entries and their tables."""
+        sha256 = hashlib.sha256()
+        for col, values in self.columns.items():
+            sha256.update(col.encode('UTF-8'))
+            sha256.update(pd.util.hash_array(np.asarray(values)).tobytes())
+        sha256.update(np.asarray(self.table_ids, dtype=np.int64).tobytes())
+        sha256.update(json.dumps(self.table_keys).encode('UTF-8'))
+        return sha256.hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.table_ids)
+
+    def __getitem__(self, idx: Union[int, slice, NDArray]) -> Union[SampledEntry, 'SampledEpoch']:
+        if isinstance(idx, (int, np.integer)):
+            # Entries hold Python scalars as the ones of `DataFrame.to_dict`
+            entry = {col: values[idx].item() if isinstance(values[idx], np.generic) else values[idx]
+                     for col, values in self.columns.items()}
+            table_id = self.table_ids[idx]
+            entry['_table_key'] = self.table_keys[table_id]
+            return SampledEntry(entry=entry, metadata=self.table_metadata[table_id])
+        return SampledEpoch({col: values[idx] for col, values in self.columns.items()},
+                            self.table_ids[idx], self.table_keys, self.table_metadata)
+
+    def __iter__(self) -> Iterator[SampledEntry]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+
 class SamplingTree:
     """
         DataStructure for sampling.
 
-        - The root node holds reference to the left-most leaf.
-        - The leaves of a SamplingTree are singly linked, allowing
-        quick one-way traversal of all leaves.
-        - Only leaf nodes of a SamplingTree holds data.
+        - The table is stored column-wise and sorted by the split columns, so that
+          every node of the tree is a contiguous range of rows. Within a node, rows
+          keep their original order.
+        - Each tree level is described by CSR-style offset arrays: row offsets of
+          its nodes and, except for the leaf level, offsets of their children on
+          the next level. All leaves lie on the last level.
         - On column split, each leaf node introduces G new children nodes, where G
           is the number of unique values in the column. These new nodes form a new
-          tree level.
+          tree level. Rows with a missing value in the column are dropped.
         - The order of columns in which the SamplingTree defines the final form
           of the SamplingTree.
+        - Nodes are views of the arrays; only the rows of a requested node are
+          materialized as a DataFrame.
+
+        String and categorical columns are stored as integer codes. A saved SamplingTree
+        is loaded memory-mapped, so that sampler processes share it without copying.
+
+        The table may hold only the index columns of a lazy DataSource; the `loader`
+        then reads the remaining columns of the materialized rows.
     """
+    INDEX_COLUMN = '__index__'
 
-    def __init__(self, df):
-        root_node = Node('/ROOT', df)
-        self.root = root_node
-        self.leaf = root_node
+    def __init__(self, df: Optional[pd.DataFrame] = None,
+                 loader: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None):
+        self.loader = loader
         self.split_cols = []
+        self.columns = {}
+        self.values = {}
+        self.categorical = {}
+        self.row_offsets = []
+        self.child_offsets = []
+        self.node_labels = [[]]
+        if df is not None:
+            for col in [self.INDEX_COLUMN] + list(df.columns):
+                values = df.index if col == self.INDEX_COLUMN else df[col]
+                self._set_column(col, values)
+            self.row_offsets.append(np.array([0, len(df)], dtype=np.int64))
+            self.node_labels = [['']]
+
+    @property
+    def root(self) -> 'Node':
+        return Node(self, 0, 0)
+
+    @property
+    def leaf(self) -> Optional['Node']:
+        """Left-most leaf of the SamplingTree."""
+        if len(self.row_offsets[-1]) < 2:
+            return None
+        return Node(self, len(self.split_cols), 0)
+
+    @property
+    def n_rows(self) -> int:
+        return int(self.row_offsets[0][-1])
 
     def split(self, col: str):
         """Creates a new level of a SamplingTree. Each node receives number
@@ -62,61 +198,217 @@ class SamplingTree:
             return
 
         # Check if column exists
-        cur_node = self.leaf
-        assert col in cur_node.data, f'Column {col} does not exist.'
-
-        # Split all leaves and create one new level
-        cur_node.split_node(col)
-        while cur_node.next is not None:
-            prev_node = cur_node
-            cur_node = cur_node.next
-            cur_node.split_node(col)
-            prev_node.children[-1].next = cur_node.children[0]
-            prev_node.next = None
-        self.leaf = self.leaf.children[0]
+        assert col in self.columns, f'Column {col} does not exist.'
+
+        # Codes ordered as the groups of `DataFrame.groupby`
+        if col in self.values:
+            codes, labels = np.asarray(self.columns[col]), self.values[col]
+        else:
+            codes, labels = pd.factorize(self.get_column(col), sort=True)
+        labels = [str(label) for label in labels]
+
+        # Rows are stably sorted by leaf and code; rows of missing values are dropped
+        leaf_offsets = self.row_offsets[-1]
+        leaf_idx = np.repeat(np.arange(len(leaf_offsets) - 1), np.diff(leaf_offsets))
+        keep = codes >= 0
+        order = np.flatnonzero(keep)[np.lexsort((codes[keep], leaf_idx[keep]))]
+        self.columns = {name: np.asarray(values)[order] for name, values in self.columns.items()}
+        leaf_idx, codes = leaf_idx[order], codes[order]
+
+        # Nodes of the existing levels remain contiguous ranges of rows
+        kept_before = np.concatenate([[0], np.cumsum(keep)])
+        self.row_offsets = [kept_before[offsets] for offsets in self.row_offsets]
+
+        # A new node starts wherever the leaf or the code changes
+        is_start = np.ones(len(order), dtype=bool)
+        is_start[1:] = (leaf_idx[1:] != leaf_idx[:-1]) | (codes[1:] != codes[:-1])
+        node_starts = np.flatnonzero(is_start)
+        self.child_offsets.append(np.searchsorted(leaf_idx[node_starts], np.arange(len(leaf_offsets)))
+                                  .astype(np.int64))
+        self.row_offsets.append(np.append(node_starts, len(order)).astype(np.int64))
+        self.node_labels.append([labels[code] for code in codes[node_starts]])
         self.split_cols.append(col)
 
+    def get_column(self, col: str, rows: Union[slice, NDArray] = slice(None)) -> Union[NDArray, pd.Categorical]:
+        """Decodes rows of a column.
 
-class Node:
-    """
-        Node object for SamplingTree.
+        Args:
+            col (str): Column name.
+            rows (Union[slice, NDArray]): Rows of the sorted table.
+
+        Returns:
+            Union[NDArray, pd.Categorical]: Values of the column.
+        """
+        values = self.columns[col][rows]
+        if col not in self.values:
+            return np.asarray(values)
+        if self.categorical[col]:
+            return pd.Categorical.from_codes(values, categories=self.values[col])
+        return self.values[col][values]
 
-        Splitting a node on a column with G unique values partitions
-        the DataFrame into G new DataFrames. For each new DataFrame a
-        child Node is created. Split Node content is erased to free memory.
+    def get_rows(self, rows: Union[slice, NDArray]) -> pd.DataFrame:
+        """Materializes rows of the sorted table.
 
-        All children nodes are chained via 'next' reference to allow
-        quick traversal of all leaf nodes.
-    """
+        Args:
+            rows (Union[slice, NDArray]): Rows of the sorted table.
 
-    def __init__(self, name, df):
-        self.node_name = name
-        self.data = df
-        self.parent = None
-        self.children = []
-        self.next = None
+        Returns:
+            pd.DataFrame: Rows with the original columns, dtypes and index.
+        """
+        columns = [col for col in self.columns if col != self.INDEX_COLUMN]
+        df = pd.DataFrame({col: self.get_column(col, rows) for col in columns},
+                          index=self.get_column(self.INDEX_COLUMN, rows),
+                          columns=columns)
+        return df if self.loader is None else self.loader(df)
 
-    def split_node(self, col: str):
-        """Leaf node is replaced with an internal node and N new leaf nodes,
-        where N is the number of unique values for column `col`.
+    def save(self, tree_dir: Path) -> None:
+        """Saves the SamplingTree into a directory of `.npy` arrays.
 
-        The dataframe in the original leaf node is split in such a way that
-        there is a single unique value in the split column in each of the new
-        leaf node. The values accross leaf nodes all are different.
+        The directory is written under a temporary name and renamed once complete.
 
         Args:
-            col (str): Column name.
+            tree_dir (Path): Output directory.
+        """
+        tmp_dir = tree_dir.with_name(f'.{tree_dir.name}.{os.getpid()}')
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        columns = list(self.columns)
+        for idx, col in enumerate(columns):
+            np.save(tmp_dir / f'column_{idx}.npy', np.asarray(self.columns[col]))
+            if col in self.values:
+                np.save(tmp_dir / f'values_{idx}.npy', np.asarray(self.values[col], dtype=object),
+                        allow_pickle=True)
+        for depth, offsets in enumerate(self.row_offsets):
+            np.save(tmp_dir / f'rows_{depth}.npy', offsets)
+        for depth, offsets in enumerate(self.child_offsets):
+            np.save(tmp_dir / f'children_{depth}.npy', offsets)
+        with open(tmp_dir / 'tree.json', 'w') as f:
+            json.dump({
+                'columns': columns,
+                'categorical': [self.categorical.get(col) for col in columns],
+                'split_cols': self.split_cols,
+                'node_labels': self.node_labels
+            }, f)
+        try:
+            os.replace(tmp_dir, tree_dir)
+        except OSError:
+            # Saved by another process in the meantime
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, tree_dir: Path,
+             loader: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> 'SamplingTree':
+        """Loads a saved SamplingTree with memory-mapped arrays.
+
+        Args:
+            tree_dir (Path): Directory of the saved SamplingTree.
+            loader (Optional[Callable[[pd.DataFrame], pd.DataFrame]]): Reads the remaining
+                columns of materialized rows.
+
+        Returns:
+            SamplingTree: Read-only SamplingTree.
         """
-        partitions = {col_val: df for col_val, df in self.data.groupby(col)}
-        for col_val, df in partitions.items():
-            new_node = Node(f'{self.node_name}/{col_val}', df)
-            new_node.parent = self
-            self.children.append(new_node)
+        with open(tree_dir / 'tree.json') as f:
+            tree_json = json.load(f)
+        tree = cls(loader=loader)
+        for idx, (col, categorical) in enumerate(zip(tree_json['columns'], tree_json['categorical'])):
+            tree.columns[col] = np.load(tree_dir / f'column_{idx}.npy', mmap_mode='r')
+            if categorical is not None:
+                tree.values[col] = np.load(tree_dir / f'values_{idx}.npy', allow_pickle=True)
+                tree.categorical[col] = categorical
+        tree.split_cols = tree_json['split_cols']
+        tree.row_offsets = [np.load(tree_dir / f'rows_{depth}.npy')
+                            for depth in range(len(tree.split_cols) + 1)]
+        tree.child_offsets = [np.load(tree_dir / f'children_{depth}.npy')
+                              for depth in range(len(tree.split_cols))]
+        tree.node_labels = tree_json['node_labels']
+        return tree
+
+    def _set_column(self, col: str, values: Union[pd.Series, pd.Index]) -> None:
+        """Stores a column; strings and other objects are stored as integer codes."""
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            self.columns[col] = np.asarray(values.cat.codes if isinstance(values, pd.Series) else values.codes)
+            self.values[col] = np.asarray(values.dtype.categories, dtype=object)
+            self.categorical[col] = True
+        elif isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biufcmM':
+            self.columns[col] = values.to_numpy()
+        else:
+            codes, uniques = pd.factorize(values, sort=self._is_sortable(values))
+            self.columns[col] = codes
+            self.values[col] = np.asarray(uniques, dtype=object)
+            self.categorical[col] = False
 
-        for node, next_node in zip(self.children[:-1], self.children[1:]):
-            node.next = next_node
+    @staticmethod
+    def _is_sortable(values: Union[pd.Series, pd.Index]) -> bool:
+        try:
+            pd.Index(values.dropna().unique()).sort_values()
+            return True
+        except TypeError:
+            return False
+
+
+class Node:
+    """
+        Node of a SamplingTree.
+
+        A Node is a view of a contiguous range of rows of the sorted table of
+        a SamplingTree. Only leaf nodes hold data, which is materialized on access.
+
+        All leaf nodes are chained via 'next' reference to allow
+        quick traversal of all leaf nodes.
+    """
 
-        self.data = None
+    def __init__(self, tree: SamplingTree, depth: int, idx: int):
+        self.tree = tree
+        self.depth = depth
+        self.idx = idx
+
+    @property
+    def node_name(self) -> str:
+        names = []
+        node = self
+        while node is not None:
+            names.append(node.tree.node_labels[node.depth][node.idx])
+            node = node.parent
+        return '/ROOT' + ''.join(f'/{name}' for name in reversed(names[:-1]))
+
+    @property
+    def parent(self) -> Optional['Node']:
+        if self.depth == 0:
+            return None
+        child_offsets = self.tree.child_offsets[self.depth - 1]
+        return Node(self.tree, self.depth - 1, int(np.searchsorted(child_offsets, self.idx, side='right')) - 1)
+
+    @property
+    def children(self) -> List['Node']:
+        if self.depth == len(self.tree.split_cols):
+            return []
+        child_offsets = self.tree.child_offsets[self.depth]
+        return [Node(self.tree, self.depth + 1, idx)
+                for idx in range(child_offsets[self.idx], child_offsets[self.idx + 1])]
+
+    @property
+    def next(self) -> Optional['Node']:
+        if self.depth != len(self.tree.split_cols) or self.idx + 2 >= len(self.tree.row_offsets[self.depth]):
+            return None
+        return Node(self.tree, self.depth, self.idx + 1)
+
+    @property
+    def rows(self) -> slice:
+        row_offsets = self.tree.row_offsets[self.depth]
+        return slice(int(row_offsets[self.idx]), int(row_offsets[self.idx + 1]))
+
+    @property
+    def data(self) -> Optional[pd.DataFrame]:
+        if self.depth != len(self.tree.split_cols):
+            return None
+        return self.tree.get_rows(self.rows)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Node) and (self.tree, self.depth, self.idx) == (other.tree, other.depth, other.idx)
+
+    def __hash__(self) -> int:
+        return hash((id(self.tree), self.depth, self.idx))
 
     def __repr__(self):
         return f'Node({self.node_name})'
@@ -135,6 +427,13 @@ class TreeSampler:
 
         Function requires that the DataSource.data is a list of paths to DataFrame objects.
 
+        When `index_dir` is configured, the SamplingTree is saved there and loaded
+        memory-mapped. A saved SamplingTree is reused as long as the dataset files,
+        their tables and the index levels are unchanged.
+
+        A lazy DataSource provides only the index columns; the remaining columns are
+        read by the DataSource once the rows are sampled.
+
         Args:
             data_source (DataSource): DataSource containing paths to input files
             index_levels (List[str]): List of column names appearing in the input DataFrames.
@@ -144,12 +443,68 @@ class TreeSampler:
         Returns:
             SamplingTree: SamplingTree data structure.
         """
-        df = self.data_source.get_table()
-        sampling_tree = SamplingTree(df)
+        lazy = getattr(self.data_source, 'lazy', False)
+        loader = self.data_source.get_rows if lazy else None
+        index_dir = getattr(self.config, 'index_dir', None)
+        if index_dir is not None:
+            tree_dir = Path(index_dir) / self.__index_key()
+            if (tree_dir / 'tree.json').exists():
+                log.info(f'Loading sampling tree from {tree_dir}')
+                return SamplingTree.load(tree_dir, loader)
+
+        if lazy:
+            df = self.data_source.get_index(self.config.index_levels)
+        else:
+            df = self.data_source.get_table()
+        sampling_tree = SamplingTree(df, loader)
         for index_level in self.config.index_levels:
             sampling_tree.split(index_level)
+
+        if index_dir is not None:
+            sampling_tree.save(tree_dir)
+            return SamplingTree.load(tree_dir, loader)
         return sampling_tree
 
+    def __index_key(self) -> str:
+        """SHA256 hash identifying the SamplingTree of the DataSource and index levels."""
+        dataset_fps = self.data_source.dataset_fp
+        if not isinstance(dataset_fps, list):
+            dataset_fps = [dataset_fps]
+        dataset_fps = [Path(dataset_fp).resolve() for dataset_fp in dataset_fps]
+        stats = [dataset_fp.stat() for dataset_fp in dataset_fps]
+        key = {
+            'data_source': type(self.data_source).__name__,
+            'dataset_fp': [str(dataset_fp) for dataset_fp in dataset_fps],
+            'fingerprint': [[stat.st_size, stat.st_mtime_ns] for stat in stats],
+            'tables': list(self.data_source.tables),
+            'compact_schema': getattr(self.data_source, 'compact_schema', False),
+            'columns': getattr(self.data_source, 'columns', None),
+            'lazy': getattr(self.data_source, 'lazy', False),
+            'index_levels': list(self.config.index_levels)
+        }
+        return hashlib.sha256(json.dumps(key).encode()).hexdigest()
+
+    def _get_metadata(self, entries: List[dict]) -> List[dict]:
+        """Retrieves metadata of entries, once for every table.
+
+        Args:
+            entries (List[dict]): Sampled entries.
+
+        Returns:
+            List[dict]: Metadata of each entry; entries of the same table share the metadata.
+        """
+        cache = {}
+        result = []
+        for entry in entries:
+            table_key = entry.get('_table_key')
+            if table_key is None:
+                result.append(self.data_source.get_metadata(entry))
+                continue
+            if table_key not in cache:
+                cache[table_key] = self.data_source.get_metadata(entry)
+            result.append(cache[table_key])
+        return result
+
     @abstractmethod
     def sample(self) -> List[SampledEntry]:
         """Defines sampling strategy for a TreeSampler"""
@@ -165,36 +520,41 @@ class RandomTreeSampler(TreeSampler):
     """
         RandomSampler samples randomly 'epoch_size' entries.
         Supports multi-level sampling by including 'index_level'.
+
+        Entries of an epoch are sampled at once. All leaves of a SamplingTree lie at
+        the same depth, so the child indices of all samples are drawn level by level
+        from the offset arrays of the SamplingTree, and the rows are gathered at once.
     """
 
     def __init__(self, config: ConfigProto, data_source: DataSource):
         super().__init__(config, data_source)
         self._rng = np.random.default_rng(self.config.seed)
 
-    def sample(self) -> List[SampledEntry]:
+    def sample(self) -> Union[List[SampledEntry], SampledEpoch]:
         """Returns a list of sampled entries of size equal to `RandomTreeSampler.size`.
 
         At every node a child branch is chosen uniformly from all children of the current node.
+        A row is then chosen uniformly from the leaf.
 
         Returns:
-            List[SampledEntry]: [description]
+            Union[List[SampledEntry], SampledEpoch]: Sampled entries, as a SampledEpoch
+                if `columnar` is set.
         """
-        result = []
-        for _ in range(self.config.epoch_size):
-            node = self.sampling_tree.root
-            while node.children:
-                idx = self._rng.integers(low=0, high=len(node.children))
-                node = node.children[idx]
-
-            entry = node.data.sample(random_state=self._rng.bit_generator).to_dict('records')[0]
-            metadata = self.data_source.get_metadata(entry)
-
-            sampled_entry = SampledEntry(
-                entry=entry,
-                metadata=metadata
-            )
-            result.append(sampled_entry)
-        return result
+        tree = self.sampling_tree
+        node_idx = np.zeros(self.config.epoch_size, dtype=np.int64)
+        for child_offsets in tree.child_offsets:
+            n_children = child_offsets[node_idx + 1] - child_offsets[node_idx]
+            node_idx = child_offsets[node_idx] + self._rng.integers(low=0, high=n_children)
+        leaf_offsets = tree.row_offsets[-1]
+        row_idx = leaf_offsets[node_idx] + self._rng.integers(
+            low=0, high=leaf_offsets[node_idx + 1] - leaf_offsets[node_idx])
+
+        rows = tree.get_rows(row_idx)
+        if self.config.columnar:
+            return SampledEpoch.from_table(rows, self.data_source)
+        entries = rows.to_dict('records')
+        return [SampledEntry(entry=entry, metadata=metadata)
+                for entry, metadata in zip(entries, self._get_metadata(entries))]
 
     def on_epoch_end(self) -> List[SampledEntry]:
         return self.sample()
@@ -204,11 +564,15 @@ class RandomTreeSampler(TreeSampler):
             super().__init__(json_dict)
             self.epoch_size = None
             self.index_levels = None
+            self.index_dir = None
+            self.columnar = None
             self.seed = None
 
         def parse(self):
             self.epoch_size = self.config.get('epoch_size', None)
             self.index_levels = self.config.get('index_levels', list())
+            self.index_dir = self.config.get('index_dir', None)
+            self.columnar = self.config.get('columnar', False)
             self.seed = self.config.get('seed', np.random.randint(low=0, high=999999))
 
 
@@ -222,16 +586,19 @@ class SequentialTreeSampler(TreeSampler):
         super().__init__(config, data_source)
         self.active_node = self.sampling_tree.leaf
 
-    def sample(self) -> Optional[List[SampledEntry]]:
+    def sample(self) -> Optional[Union[List[SampledEntry], SampledEpoch]]:
         """Returns the content of currently active SamplerTree node.
 
         Returns:
-            Optional[List[SampledEntry]]: List of sampled entries.
+            Optional[Union[List[SampledEntry], SampledEpoch]]: List of sampled entries,
+                as a SampledEpoch if `columnar` is set.
         """
+        if self.active_node is not None and self.config.columnar:
+            return SampledEpoch.from_table(self.active_node.data, self.data_source)
         if self.active_node is not None:
             result = []
-            for entry in self.active_node.data.to_dict('records'):
-                metadata = self.data_source.get_metadata(entry)
+            entries = self.active_node.data.to_dict('records')
+            for entry, metadata in zip(entries, self._get_metadata(entries)):
                 sampled_entry = SampledEntry(
                     entry=entry,
                     metadata=metadata
@@ -255,6 +622,86 @@ class SequentialTreeSampler(TreeSampler):
         def __init__(self, json_dict: dict):
             super().__init__(json_dict)
             self.index_levels = None
+            self.index_dir = None
+            self.columnar = None
 
         def parse(self):
             self.index_levels = self.config.get('index_levels', list())
+            self.index_dir = self.config.get('index_dir', None)
+            self.columnar = self.config.get('columnar', False)
+
+
+class RandomMaskSampler(RandomTreeSampler):
+    """
+        RandomMaskSampler samples randomly 'epoch_size' tiles from a MaskDataSource.
+        Supports multi-level sampling by including 'index_level' of the slide table.
+
+        A leaf is chosen as in RandomTreeSampler. The slide is then chosen from the leaf
+        with a probability proportional to its number of tiles, so that the tiles of
+        a leaf are sampled uniformly, as if sampled from the coordinate maps of the slides.
+        Leaves without tiles are skipped, as are nodes left without children.
+
+        The numbers of tiles of the slides are looked up once per epoch, and the leaves
+        and slides of all samples are drawn at once from the offset arrays of the SamplingTree.
+    """
+
+    def sample(self) -> Union[List[SampledEntry], SampledEpoch]:
+        """Returns a list of sampled entries of size equal to `RandomMaskSampler.size`.
+
+        Returns:
+            Union[List[SampledEntry], SampledEpoch]: Sampled entries, as a SampledEpoch
+                if `columnar` is set.
+        """
+        table_keys = self._sample_table_keys()
+
+        # Tiles of a slide are drawn at once and placed back in the drawn order
+        order = np.argsort(table_keys, kind='stable')
+        entries = [None] * len(table_keys)
+        unique_keys, starts, counts = np.unique(table_keys[order], return_index=True, return_counts=True)
+        for table_key, start, count in zip(unique_keys, starts, counts):
+            slide_entries = self.data_source.sample_entries(table_key, count, self._rng)
+            for idx, entry in zip(order[start:start + count], slide_entries):
+                entries[idx] = entry
+
+        if self.config.columnar:
+            return SampledEpoch.from_table(pd.DataFrame.from_records(entries), self.data_source)
+        return [SampledEntry(entry=entry, metadata=metadata)
+                for entry, metadata in zip(entries, self._get_metadata(entries))]
+
+    def _sample_table_keys(self) -> NDArray:
+        """Chooses the slides of an epoch by walking the SamplingTree down to leaves with tiles.
+
+        At every level a child is chosen uniformly from the children containing tiles, and
+        the slide is chosen from the leaf with a probability proportional to its number of tiles.
+
+        Returns:
+            NDArray: Table keys of the slides.
+        """
+        tree = self.sampling_tree
+        table_keys = np.asarray(tree.get_column('_table_key'), dtype=object)
+        codes, unique_keys = pd.factorize(table_keys)
+        n_tiles = np.array([self.data_source.count_tiles(table_key) for table_key in unique_keys],
+                           dtype=np.int64)[codes]
+        tile_offsets = np.concatenate([[0], np.cumsum(n_tiles)])
+
+        # Nodes containing tiles, from the leaves up
+        leaf_offsets = tree.row_offsets[-1]
+        has_tiles = [tile_offsets[leaf_offsets[1:]] > tile_offsets[leaf_offsets[:-1]]]
+        for child_offsets in reversed(tree.child_offsets):
+            n_nonempty = np.concatenate([[0], np.cumsum(has_tiles[0])])
+            has_tiles.insert(0, n_nonempty[child_offsets[1:]] > n_nonempty[child_offsets[:-1]])
+        if not has_tiles[0][0]:
+            raise ValueError('Data source contains no tiles.')
+
+        node_idx = np.zeros(self.config.epoch_size, dtype=np.int64)
+        for child_offsets, child_has_tiles in zip(tree.child_offsets, has_tiles[1:]):
+            nonempty_children = np.flatnonzero(child_has_tiles)
+            n_nonempty = np.concatenate([[0], np.cumsum(child_has_tiles)])
+            first, last = n_nonempty[child_offsets[node_idx]], n_nonempty[child_offsets[node_idx + 1]]
+            node_idx = nonempty_children[first + self._rng.integers(low=0, high=last - first)]
+
+        # A tile of the leaf is drawn, which chooses its slide
+        first, last = tile_offsets[leaf_offsets[node_idx]], tile_offsets[leaf_offsets[node_idx + 1]]
+        row_idx = np.searchsorted(tile_offsets, first + self._rng.integers(low=0, high=last - first),
+                                  side='right') - 1
+        return table_keys[row_idx]
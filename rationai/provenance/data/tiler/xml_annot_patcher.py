@@ -100,9 +100,12 @@ def export_provenance(log_fp: Path) -> None:
     ###                                                                    ###
 
     # Activity Node
+    profiling = log_t.get('profiling', {})
     gzact = bndl.activity(f"{NAMESPACE_PREPROC}:tilesGeneration", other_attributes={
         f"{NAMESPACE_PROV}:label": f"tiles generation",
-        "git_commit_hash": log_t['git_commit_hash']
+        "git_commit_hash": log_t['git_commit_hash'],
+        **{f"profiling_{key}": profiling[key] for key in ['wall_time', 'tiles', 'tiles_per_second']
+           if key in profiling}
     })
 
     # Output Entity Node
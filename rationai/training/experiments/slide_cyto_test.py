@@ -27,7 +27,7 @@ class SegmentationTest(BaseSequentialTest):
     def save_predictions(self, predictions, test_gen):
         output_data = test_gen.sampler.active_node.data
 
-        output_metadata = test_gen.epoch_samples[0].metadata
+        output_metadata = dict(test_gen.epoch_samples[0].metadata)
         output_table_key = test_gen.epoch_samples[0].entry['_table_key']
 
         seg_result_dir = Experiment.Config.experiment_dir / 'segmentations'
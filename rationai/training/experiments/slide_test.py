@@ -11,7 +11,6 @@ from rationai.training.experiments.base_sequential_test import BaseSequentialTes
 from rationai.training.base.experiments import Experiment
 from rationai.utils.class_handler import get_class
 from rationai.utils.provenance import SummaryWriter
-from rationai.utils.provenance import hash_tables_by_keys
 from rationai.utils.provenance import hash_table
 
 sw_log = SummaryWriter.getLogger('provenance')
@@ -32,10 +31,7 @@ class WSIBinaryClassifierTest(BaseSequentialTest):
             'a'
         )
         super().run()
-        hashes = hash_tables_by_keys(
-            hdfs_handler=self.generators_dict[self.config.test_gen].sampler.data_source.source,
-            table_keys=self.generators_dict[self.config.test_gen].sampler.data_source.tables,
-        )
+        hashes = self.generators_dict[self.config.test_gen].sampler.data_source.get_checksums()
         sw_log.set('splits', self.generators_dict[self.config.test_gen].name, value=hashes)
         self.hdfstore_output.close()
         sw_log.set('predictions', 'prediction_file', value=str(Experiment.Config.experiment_dir / "predictions.h5"))
@@ -50,7 +46,7 @@ class WSIBinaryClassifierTest(BaseSequentialTest):
         output_data = test_gen.sampler.active_node.data
         output_data['pred'] = predictions
 
-        output_metadata = test_gen.epoch_samples[0].metadata
+        output_metadata = dict(test_gen.epoch_samples[0].metadata)
         output_table_key = test_gen.epoch_samples[0].entry['_table_key']
 
         # Save into HDFStore
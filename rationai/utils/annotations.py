@@ -0,0 +1,157 @@
+"""Single-pass parsing of ASAP annotation XML files.
+
+An annotation file is parsed once into NumPy arrays: vertices of all polygons
+concatenated into a single (n_vertices, 2) array at level 0 resolution, offsets
+delimiting the individual polygons and the `PartOfGroup` keyword of each polygon.
+Polygons of any keyword set and scale are then selected without re-parsing.
+
+Parsed annotations are kept in memory for the recently used files and may be
+cached on disk in `.npz` files keyed by the SHA256 hash of the XML file.
+"""
+# Standard Imports
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Union
+import hashlib
+import os
+import xml.etree.ElementTree as ET
+
+# Third-party Imports
+import numpy as np
+from nptyping import NDArray
+
+# Local Imports
+
+
+MEMORY_CACHE_SIZE = 8
+
+_memory_cache = OrderedDict()
+
+
+@dataclass
+class Annotations:
+    """Polygons of an annotation file in the document order.
+
+    Attributes:
+        vertices (NDArray): float64 array of shape (n_vertices, 2) with (x, y)
+                            coordinates of all polygons at level 0 resolution.
+        offsets (NDArray): int64 array of shape (n_polygons + 1,); vertices of polygon
+                           `i` are `vertices[offsets[i]:offsets[i + 1]]`.
+        groups (NDArray): `PartOfGroup` keyword of each polygon.
+    """
+    vertices: NDArray
+    offsets: NDArray
+    groups: NDArray
+
+    def polygons(self, keywords: Optional[Iterable[str]] = None,
+                 scale_factor: float = 1.) -> List[NDArray]:
+        """Selects polygons of the given keywords.
+
+        Args:
+            keywords (Optional[Iterable[str]]): Keywords of the polygons. If None,
+                                                all polygons are returned.
+            scale_factor (float): Coordinates are divided by the scale factor.
+
+        Returns:
+            List[NDArray]: (n, 2) vertex arrays of the polygons in the document order.
+        """
+        if keywords is None:
+            selected = np.arange(len(self.groups))
+        else:
+            selected = np.flatnonzero(np.isin(self.groups, list(keywords)))
+        return [self.vertices[self.offsets[idx]:self.offsets[idx + 1]] / scale_factor
+                for idx in selected]
+
+    def polygons_by_group(self, scale_factor: float = 1.) -> Dict[str, List[NDArray]]:
+        """Groups polygons by their `PartOfGroup` keyword.
+
+        Args:
+            scale_factor (float): Coordinates are divided by the scale factor.
+
+        Returns:
+            Dict[str, List[NDArray]]: Vertex arrays of the polygons of each keyword.
+        """
+        return {group: self.polygons([group], scale_factor) for group in dict.fromkeys(self.groups)}
+
+
+def parse_annotations(annotation_fp: Union[str, Path]) -> Annotations:
+    """Parses an ASAP annotation XML file in a single pass.
+
+    Args:
+        annotation_fp (Union[str, Path]): Path to annotation file.
+
+    Returns:
+        Annotations: Parsed polygons.
+    """
+    coords, offsets, groups = [], [0], []
+    for _, elem in ET.iterparse(str(annotation_fp)):
+        if elem.tag == 'Coordinate':
+            coords.append(float(elem.get('X')))
+            coords.append(float(elem.get('Y')))
+        elif elem.tag == 'Annotation':
+            offsets.append(len(coords) // 2)
+            groups.append(elem.get('PartOfGroup') or '')
+            elem.clear()
+    return Annotations(vertices=np.array(coords, dtype=np.float64).reshape(-1, 2),
+                       offsets=np.array(offsets, dtype=np.int64),
+                       groups=np.array(groups, dtype=str))
+
+
+def load_annotations(annotation_fp: Union[str, Path], cache_dir: Optional[Path] = None) -> Annotations:
+    """Loads parsed annotations, parsing the annotation file only if not cached.
+
+    Parsed annotations of the recently used files are kept in memory. If cache
+    directory is given, they are also stored on disk under the SHA256 hash of the
+    annotation file, so that unchanged files are never parsed again.
+
+    Args:
+        annotation_fp (Union[str, Path]): Path to annotation file.
+        cache_dir (Optional[Path]): Directory of the on-disk cache.
+
+    Returns:
+        Annotations: Parsed polygons.
+    """
+    annotation_fp = Path(annotation_fp)
+    stat = annotation_fp.stat()
+    memory_key = (str(annotation_fp.resolve()), stat.st_size, stat.st_mtime_ns)
+    if memory_key in _memory_cache:
+        _memory_cache.move_to_end(memory_key)
+        return _memory_cache[memory_key]
+
+    if cache_dir is None:
+        annotations = parse_annotations(annotation_fp)
+    else:
+        cache_fp = Path(cache_dir) / f'{_file_sha256(annotation_fp)}.npz'
+        if cache_fp.exists():
+            with np.load(cache_fp) as cached:
+                annotations = Annotations(**cached)
+        else:
+            annotations = parse_annotations(annotation_fp)
+            _save_annotations(annotations, cache_fp)
+
+    _memory_cache[memory_key] = annotations
+    if len(_memory_cache) > MEMORY_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+    return annotations
+
+
+def _save_annotations(annotations: Annotations, cache_fp: Path) -> None:
+    """Stores parsed annotations, replacing the cache file only once complete."""
+    cache_fp.parent.mkdir(parents=True, exist_ok=True)
+    tmp_fp = cache_fp.with_name(f'.{cache_fp.stem}.{os.getpid()}.npz')
+    np.savez(tmp_fp, vertices=annotations.vertices,
+             offsets=annotations.offsets, groups=annotations.groups)
+    os.replace(tmp_fp, cache_fp)
+
+
+def _file_sha256(fp: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(fp, 'rb') as f:
+        for chunk in iter(lambda: f.read(2 ** 20), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
@@ -0,0 +1,77 @@
+"""Compact column schema of coordinate map tables.
+
+Coordinate maps may hold tens of millions of rows. Storing the coordinates as
+int32 and the annotation coverage as float16 reduces both the index file and the
+in-memory tables several times.
+
+The repeated string identifiers are converted into categoricals only when loaded,
+by `compact_tables` with categories shared by all tables. On disk, `slide_name`
+remains a fixed-width string column, as PyTables would write the categories of
+every table into a node of its own, which slows down both writing and loading.
+
+float16 keeps every non-zero coverage non-zero (unlike uint8 quantization), so
+`is_cancer` remains consistent with `annot_coverage`. The coverage itself is
+rounded to 11 significant bits. The same applies to all `*_coverage` columns,
+such as the columns of label definitions.
+"""
+# Standard Imports
+from typing import List
+
+# Third-party Imports
+import numpy as np
+import pandas as pd
+
+# Local Imports
+
+
+COMPACT_DTYPES = {
+    'coord_x': np.int32,
+    'coord_y': np.int32,
+    'annot_coverage': np.float16,
+    'epithelium_coverage': np.float16,
+    'tile_idx': np.int32
+}
+
+CATEGORICAL_COLUMNS = ['slide_name', '_table_key']
+
+COVERAGE_SUFFIX = '_coverage'
+
+
+def compact_table(table: pd.DataFrame) -> pd.DataFrame:
+    """Converts known numeric columns of a coordinate map into compact dtypes.
+
+    Args:
+        table (pd.DataFrame): Coordinate map.
+
+    Returns:
+        pd.DataFrame: Coordinate map with compact dtypes.
+    """
+    dtypes = {column: np.float16 for column in table.columns if str(column).endswith(COVERAGE_SUFFIX)}
+    dtypes.update({column: dtype for column, dtype in COMPACT_DTYPES.items() if column in table})
+    return table.astype(dtypes)
+
+
+def compact_tables(tables: List[pd.DataFrame]) -> List[pd.DataFrame]:
+    """Converts coordinate maps into compact dtypes with shared categories.
+
+    String identifiers are converted into categoricals. Categorical columns of all
+    tables share the same (sorted) categories, so that the tables can be concatenated
+    without falling back to object columns.
+
+    Args:
+        tables (List[pd.DataFrame]): Coordinate maps.
+
+    Returns:
+        List[pd.DataFrame]: Coordinate maps with compact dtypes.
+    """
+    tables = [compact_table(table) for table in tables]
+    for column in CATEGORICAL_COLUMNS:
+        # Values of each table are hashed once and their codes remapped to the shared categories
+        factorized = {idx: pd.factorize(table[column]) for idx, table in enumerate(tables) if column in table}
+        if not factorized:
+            continue
+        categories = pd.Index(sorted(set().union(*(uniques for _, uniques in factorized.values()))))
+        for idx, (codes, uniques) in factorized.items():
+            codes = np.where(codes < 0, -1, categories.get_indexer(uniques)[codes])
+            tables[idx] = tables[idx].assign(**{column: pd.Categorical.from_codes(codes, categories)})
+    return tables
@@ -0,0 +1,203 @@
+"""Persistent catalog of slide metadata and low-resolution levels.
+
+Opening a slide through OpenSlide is expensive on network storage, and several
+stages read the same low-resolution level of a slide again and again. The catalog
+stores for every slide its level dimensions, downsamples and properties in a JSON
+file, and the requested thumbnail levels as uncompressed `.npy` RGBA arrays that
+are written in stripes and memory-mapped when read.
+
+Entries are named by the SHA256 hash of the resolved slide path and are valid only
+as long as the size and modification time of the slide (and of the data directory
+of an MRXS slide) are unchanged; stale entries are replaced.
+
+`CachedSlide` can be used in place of an OpenSlide handle. Metadata and reads of
+the thumbnail levels are served from the catalog, while reads of the other levels
+open the slide on first use.
+"""
+# Standard Imports
+from pathlib import Path
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+from typing import Union
+import hashlib
+import json
+import os
+
+# Third-party Imports
+import numpy as np
+from nptyping import NDArray
+from PIL import Image
+from openslide import AbstractSlide
+import openslide
+
+# Local Imports
+
+
+THUMBNAIL_STRIPE_HEIGHT = 2048
+
+
+class CachedSlide:
+    """Slide handle backed by the slide catalog.
+
+    Attributes:
+        slide_fp (Path): Path to the slide.
+        level_count (int): Number of levels of the slide.
+        level_dimensions (Tuple[Tuple[int, int], ...]): (width, height) of the levels.
+        level_downsamples (Tuple[float, ...]): Downsample factors of the levels.
+        properties (Dict[str, str]): Properties of the slide.
+        dimensions (Tuple[int, int]): (width, height) of level 0.
+    """
+    def __init__(self, slide_fp: Path, metadata: dict, cache_dir: Path,
+                 thumbnail_levels: Iterable[int]):
+        self.slide_fp = slide_fp
+        self.level_count = metadata['level_count']
+        self.level_dimensions = tuple(tuple(size) for size in metadata['level_dimensions'])
+        self.level_downsamples = tuple(metadata['level_downsamples'])
+        self.properties = metadata['properties']
+        self.dimensions = self.level_dimensions[0]
+        self._cache_dir = cache_dir
+        self._thumbnail_levels = {level for level in thumbnail_levels if 0 <= level < self.level_count}
+        self._thumbnails = {}
+        self._oslide_wsi = None
+
+    def read_region(self, location: Tuple[int, int], level: int, size: Tuple[int, int]) -> Image.Image:
+        """Reads a region of a level as `OpenSlide.read_region` does.
+
+        Regions of thumbnail levels are cropped from the catalog; parts of a region
+        outside of the level are transparent.
+
+        Args:
+            location (Tuple[int, int]): (x, y) of the top-left pixel at level 0.
+            level (int): Level of the slide.
+            size (Tuple[int, int]): (width, height) of the region.
+
+        Returns:
+            Image.Image: RGBA image of the region.
+        """
+        if level not in self._thumbnail_levels:
+            return self._open().read_region(location, level, size)
+
+        thumbnail = self.get_thumbnail(level)
+        downsample = self.level_downsamples[level]
+        x0, y0 = int(round(location[0] / downsample)), int(round(location[1] / downsample))
+        region = np.zeros((size[1], size[0], 4), dtype=np.uint8)
+        src_x0, src_y0 = max(x0, 0), max(y0, 0)
+        src_x1 = min(x0 + size[0], thumbnail.shape[1])
+        src_y1 = min(y0 + size[1], thumbnail.shape[0])
+        if src_x0 < src_x1 and src_y0 < src_y1:
+            region[src_y0 - y0:src_y1 - y0, src_x0 - x0:src_x1 - x0] = thumbnail[src_y0:src_y1, src_x0:src_x1]
+        return Image.fromarray(region)
+
+    def get_thumbnail(self, level: int) -> NDArray:
+        """Retrieves a whole thumbnail level, reading the slide only if not yet cached.
+
+        Args:
+            level (int): Thumbnail level.
+
+        Returns:
+            NDArray: Read-only (height, width, 4) uint8 RGBA array of the level.
+        """
+        if level not in self._thumbnails:
+            thumbnail_fp = self._cache_dir / f'{_entry_name(self.slide_fp)}_level{level}.npy'
+            if not thumbnail_fp.exists():
+                _save_atomic(thumbnail_fp, lambda fp: self._write_thumbnail(fp, level))
+            self._thumbnails[level] = np.load(thumbnail_fp, mmap_mode='r')
+        return self._thumbnails[level]
+
+    def _write_thumbnail(self, thumbnail_fp: Path, level: int) -> None:
+        """Writes a level of the slide into a `.npy` file in horizontal stripes."""
+        width, height = self.level_dimensions[level]
+        downsample = self.level_downsamples[level]
+        thumbnail = np.lib.format.open_memmap(thumbnail_fp, mode='w+', dtype=np.uint8,
+                                              shape=(height, width, 4))
+        for y0 in range(0, height, THUMBNAIL_STRIPE_HEIGHT):
+            y1 = min(y0 + THUMBNAIL_STRIPE_HEIGHT, height)
+            thumbnail[y0:y1] = np.asarray(self._open().read_region((0, int(y0 * downsample)), level,
+                                                                   (width, y1 - y0)))
+        thumbnail.flush()
+        del thumbnail
+
+    def close(self) -> None:
+        if self._oslide_wsi is not None:
+            self._oslide_wsi.close()
+            self._oslide_wsi = None
+
+    def __enter__(self) -> 'CachedSlide':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def _open(self) -> AbstractSlide:
+        if self._oslide_wsi is None:
+            self._oslide_wsi = openslide.open_slide(str(self.slide_fp))
+        return self._oslide_wsi
+
+
+def open_slide(slide_fp: Union[str, Path], cache_dir: Optional[Path] = None,
+               thumbnail_levels: Iterable[int] = ()) -> Union[AbstractSlide, CachedSlide]:
+    """Opens a slide through the slide catalog.
+
+    Args:
+        slide_fp (Union[str, Path]): Path to the slide.
+        cache_dir (Optional[Path]): Directory of the catalog. If None, the slide
+                                    is opened by `openslide.open_slide`.
+        thumbnail_levels (Iterable[int]): Levels served from the catalog.
+
+    Returns:
+        Union[AbstractSlide, CachedSlide]: Slide handle.
+    """
+    slide_fp = Path(slide_fp).resolve()
+    if cache_dir is None:
+        return openslide.open_slide(str(slide_fp))
+
+    cache_dir = Path(cache_dir)
+    metadata_fp = cache_dir / f'{_entry_name(slide_fp)}.json'
+    fingerprint = _slide_fingerprint(slide_fp)
+    metadata = None
+    if metadata_fp.exists():
+        with open(metadata_fp) as f:
+            metadata = json.load(f)
+        if metadata['fingerprint'] != fingerprint:
+            # Thumbnails of a changed slide are stale as well
+            for thumbnail_fp in cache_dir.glob(f'{_entry_name(slide_fp)}_level*.npy'):
+                thumbnail_fp.unlink(missing_ok=True)
+            metadata = None
+
+    if metadata is None:
+        with openslide.open_slide(str(slide_fp)) as oslide_wsi:
+            metadata = {
+                'slide_fp': str(slide_fp),
+                'fingerprint': fingerprint,
+                'level_count': oslide_wsi.level_count,
+                'level_dimensions': oslide_wsi.level_dimensions,
+                'level_downsamples': oslide_wsi.level_downsamples,
+                'properties': dict(oslide_wsi.properties)
+            }
+        _save_atomic(metadata_fp, lambda fp: fp.write_text(json.dumps(metadata)))
+
+    return CachedSlide(slide_fp, metadata, cache_dir, thumbnail_levels)
+
+
+def _entry_name(slide_fp: Path) -> str:
+    return hashlib.sha256(str(slide_fp).encode()).hexdigest()
+
+
+def _slide_fingerprint(slide_fp: Path) -> list:
+    """Size and modification time of the slide and of the data directory of MRXS slides."""
+    stat = slide_fp.stat()
+    fingerprint = [stat.st_size, stat.st_mtime_ns]
+    data_dir = slide_fp.with_suffix('')
+    if data_dir != slide_fp and data_dir.is_dir():
+        stats = [fp.stat() for fp in data_dir.iterdir()]
+        fingerprint += [sum(stat.st_size for stat in stats), max((stat.st_mtime_ns for stat in stats), default=0)]
+    return fingerprint
+
+
+def _save_atomic(output_fp: Path, save) -> None:
+    """Saves a catalog file, replacing an existing file only once complete."""
+    output_fp.parent.mkdir(parents=True, exist_ok=True)
+    tmp_fp = output_fp.with_name(f'.{output_fp.stem}.{os.getpid()}{output_fp.suffix}')
+    save(tmp_fp)
+    os.replace(tmp_fp, output_fp)
@@ -9,9 +9,9 @@ import logging
 # Third-party Imports
 from PIL import Image
 from PIL import UnidentifiedImageError
-import xml.etree.ElementTree as ET
 
 # Local Imports
+from rationai.utils.annotations import load_annotations
 
 
 log = logging.getLogger('utils')
@@ -35,30 +35,15 @@ def open_pil_image(path: Union[str, Path]) -> Optional[Image.Image]:
 
 def read_polygons(annotation_filepath: Path,
                   scale_factor: float,
-                  keywords: List[str]) -> Tuple[Vertices, Vertices]:
+                  keywords: List[str]) -> List[Vertices]:
     """Utility function to read an annotation XML file and create
     a list of vertices for polygon delimiting the cancerous area.
     """
     if not annotation_filepath.exists():
-        return [], []
+        return []
 
-    # Read cancer polygon area
-    polygons = []
-
-    root = ET.parse(str(annotation_filepath)).getroot()
-    for anno_tag in root.findall('Annotations/Annotation'):
-        polygon = []
-
-        keyword = anno_tag.get('PartOfGroup')
-
-        if keyword in keywords:
-            for coord in anno_tag.findall('Coordinates/Coordinate'):
-                polygon.append((float(coord.get('X')) / scale_factor,
-                                float(coord.get('Y')) / scale_factor))
-        if polygon:
-            polygons.append(polygon)
-
-    return polygons
+    polygons = load_annotations(annotation_filepath).polygons(keywords, scale_factor)
+    return [list(map(tuple, polygon.tolist())) for polygon in polygons if len(polygon)]
 
 
 def divide_round_up(n, d):